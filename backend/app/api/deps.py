@@ -0,0 +1,24 @@
+"""
+Dependencias compartidas de la API: servicios por proceso y usuario autenticado con cache
+"""
+
+from functools import lru_cache
+
+from app.core.auth import (  # noqa: F401 - reexportados para los endpoints
+    ESTADOS_BLOQUEADOS,
+    UsuarioActual,
+    claims_cache,
+    credentials_exception,
+    decode_token,
+    get_current_user,
+    invalidate_user,
+    load_user,
+    oauth2_scheme,
+    user_cache,
+)
+from app.services.empresa_service import EmpresaService
+
+@lru_cache()
+def get_empresa_service() -> EmpresaService:
+    """EmpresaService compartido por todo el proceso (no mantiene estado por request)"""
+    return EmpresaService()
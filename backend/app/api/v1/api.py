@@ -16,7 +16,10 @@ from app.api.v1.endpoints import (
     notificaciones,
     reportes,
     usuarios,
-    documentos
+    documentos,
+    sync,
+    interoperatividad,
+    importaciones
 )
 
 api_router = APIRouter()
@@ -92,4 +95,22 @@ api_router.include_router(
     documentos.router,
     prefix="/documentos",
     tags=["Documentos"]
-) 
\ No newline at end of file
+)
+
+api_router.include_router(
+    sync.router,
+    prefix="/sync",
+    tags=["Sincronización móvil"]
+)
+
+api_router.include_router(
+    interoperatividad.router,
+    prefix="/interoperatividad",
+    tags=["Interoperatividad"]
+)
+
+api_router.include_router(
+    importaciones.router,
+    prefix="/importaciones",
+    tags=["Importación masiva"]
+)
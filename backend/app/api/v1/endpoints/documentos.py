@@ -0,0 +1,181 @@
+"""
+Endpoints para carga y descarga de documentos
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import RedirectResponse, Response
+import structlog
+
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.core.file_response import RangeFileResponse
+from app.core.logging import audit_logger
+from app.schemas.documentos import DocumentoResponse
+from app.services.document_storage import ArchivoDemasiadoGrande, get_storage
+from app.services.documento_service import (
+    delete_document,
+    get_document,
+    save_document,
+    validate_filename,
+)
+
+logger = structlog.get_logger()
+router = APIRouter()
+
+@router.post(
+    "/",
+    response_model=DocumentoResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Subir documento",
+    description=(
+        "Subir un archivo enviando su contenido binario como cuerpo de la solicitud. "
+        "El contenido se escribe por fragmentos sin cargarlo completo en memoria"
+    )
+)
+async def upload_documento(
+    request: Request,
+    nombre_archivo: str = Query(..., alias="nombreArchivo", max_length=255),
+    tipo_documento: str = Query(..., alias="tipoDocumento", description="RESOLUCION, TUC, CERTIFICADO, ..."),
+    entidad_asociada_id: str = Query(None, alias="entidadAsociadaId"),
+    current_user = Depends(get_current_user)
+):
+    """Subir documento (streaming)"""
+    try:
+        validate_filename(nombre_archivo)
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > settings.MAX_FILE_SIZE:
+            raise ArchivoDemasiadoGrande(
+                f"El archivo supera el tamaño máximo de {settings.MAX_FILE_SIZE} bytes"
+            )
+
+        doc = await save_document(
+            request.stream(),
+            nombre_archivo,
+            tipo_documento,
+            entidad_asociada_id,
+            current_user.id,
+            request.headers.get("content-type")
+        )
+        audit_logger.log_action(
+            "SUBIR_DOCUMENTO", current_user.id, "documentos", str(doc["_id"]),
+            {"nombreArchivo": doc["nombreArchivo"], "hash": doc["hash"]}
+        )
+        return DocumentoResponse.from_document(doc)
+        
+    except ArchivoDemasiadoGrande as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error("Error al subir documento", error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+@router.get(
+    "/{documento_id}",
+    response_model=DocumentoResponse,
+    summary="Obtener documento",
+    description="Obtener los metadatos de un documento"
+)
+async def get_documento(
+    documento_id: str,
+    current_user = Depends(get_current_user)
+):
+    """Obtener metadatos de documento"""
+    doc = await get_document(documento_id)
+    if not doc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Documento no encontrado"
+        )
+    return DocumentoResponse.from_document(doc)
+
+@router.api_route(
+    "/{documento_id}/descargar",
+    methods=["GET", "HEAD"],
+    summary="Descargar documento",
+    description="Descargar el contenido; soporta descargas parciales (Range) y revalidación por ETag"
+)
+async def descargar_documento(
+    documento_id: str,
+    request: Request,
+    inline: bool = Query(False, description="Mostrar en el navegador en lugar de descargar"),
+    current_user = Depends(get_current_user)
+):
+    """Descargar documento"""
+    doc = await get_document(documento_id)
+    if not doc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Documento no encontrado"
+        )
+
+    storage = get_storage()
+    url = await storage.download_url(doc["clave"], doc["nombreArchivo"])
+    if url:
+        return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+    etag = f'"{doc["hash"]}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    path = storage.local_path(doc["clave"])
+    if not path:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Contenido del documento no disponible"
+        )
+
+    # Range solo aplica si el contenido no cambió (If-Range con el mismo ETag)
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range and if_range != etag:
+        range_header = None
+
+    return RangeFileResponse(
+        path,
+        range_header=range_header,
+        media_type=doc.get("contentType"),
+        filename=doc["nombreArchivo"],
+        etag=etag,
+        inline=inline
+    )
+
+@router.delete(
+    "/{documento_id}",
+    summary="Eliminar documento",
+    description="Borrado lógico de un documento"
+)
+async def delete_documento(
+    documento_id: str,
+    current_user = Depends(get_current_user)
+):
+    """Eliminar documento"""
+    try:
+        success = await delete_document(documento_id)
+        
+        if not success:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Documento no encontrado"
+            )
+        
+        audit_logger.log_action("ELIMINAR_DOCUMENTO", current_user.id, "documentos", documento_id)
+        return {"success": True, "message": "Documento eliminado exitosamente"}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error al eliminar documento", documento_id=documento_id, error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
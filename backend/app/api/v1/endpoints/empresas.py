@@ -2,13 +2,23 @@
 Endpoints para gestión de empresas de transporte
 """
 
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.responses import JSONResponse
+from typing import List, Optional, Union
+import os
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Path, Query, status
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from bson import ObjectId
+from bson.errors import InvalidId
 import structlog
 
+from app.core.config import settings
 from app.core.database import empresas_collection
-from app.core.auth import get_current_user
+from app.core.indexes import RECIENTES
+from app.core.cache import cache, invalidate_empresa
+from app.core.logging import audit_logger
+from app.services.dashboard_stats import load_dimensions, apply_change
+from app.services.interoperatividad import interoperatividad, ProveedorNoDisponible
+from app.api.deps import get_current_user, get_empresa_service
 from app.models.empresa import (
     EmpresaTransporte,
     CreateEmpresaRequest,
@@ -16,26 +26,67 @@ from app.models.empresa import (
     EmpresaFilters
 )
 from app.services.empresa_service import EmpresaService
+from app.services.empresa_query import build_empresa_query, list_empresas_cursor
+from app.services.export_service import (
+    EMPRESA_EXPORT_COLUMNS,
+    EMPRESA_DEFAULT_COLUMNS,
+    select_columns,
+    projection_for,
+    stream_csv,
+    write_xlsx,
+    export_to_file,
+    new_export_path,
+    resolve_export_path
+)
+from app.services.empresa_search import search_empresas, update_search_fields
+from app.services.cumplimiento_service import get_snapshot, get_snapshots
+from app.services.empresa_transitions import transition_empresas
+from app.services.historial_service import get_historial, get_empresa_timeline
 from app.schemas.common import PaginatedResponse, ApiResponse
+from app.schemas.pagination import CursorPaginatedResponse
+from app.schemas.search import EmpresaSearchResult
+from app.schemas.cumplimiento import CumplimientoLoteRequest
+from app.schemas.transiciones import TransicionLoteRequest, TransicionLoteResponse
 
 logger = structlog.get_logger()
 router = APIRouter()
 
+HISTORIAL_LIMIT = 20
+
 @router.get(
     "/",
-    response_model=PaginatedResponse[EmpresaTransporte],
+    response_model=Union[
+        PaginatedResponse[EmpresaTransporte],
+        CursorPaginatedResponse[EmpresaTransporte]
+    ],
     summary="Listar empresas",
-    description="Obtener lista paginada de empresas de transporte"
+    description=(
+        "Obtener lista paginada de empresas de transporte. "
+        "Si se envía `cursor` (vacío para la primera página) se usa paginación por cursor "
+        "y la respuesta incluye `next_cursor`"
+    )
 )
 async def list_empresas(
     page: int = Query(1, ge=1, description="Número de página"),
     limit: int = Query(10, ge=1, le=100, description="Elementos por página"),
+    cursor: Optional[str] = Query(
+        None,
+        description="Cursor opaco de paginación; enviar vacío para iniciar la paginación por cursor"
+    ),
+    ordenar_por: str = Query(
+        "fechaRegistro",
+        regex="^(fechaRegistro|ruc|razonSocial)$",
+        description="Campo de ordenamiento (solo paginación por cursor)"
+    ),
+    orden_desc: bool = Query(True, description="Orden descendente (solo paginación por cursor)"),
+    incluir_total: bool = Query(False, description="Calcular el total (solo paginación por cursor)"),
     search: Optional[str] = Query(None, description="Término de búsqueda"),
     tipo_empresa: Optional[str] = Query(None, description="Tipo de empresa"),
     categoria: Optional[str] = Query(None, description="Categoría de empresa"),
     estado: Optional[str] = Query(None, description="Estado de la empresa"),
     departamento: Optional[str] = Query(None, description="Departamento"),
     provincia: Optional[str] = Query(None, description="Provincia"),
+    service: EmpresaService = Depends(get_empresa_service),
     current_user = Depends(get_current_user)
 ):
     """Listar empresas con filtros y paginación"""
@@ -49,11 +100,25 @@ async def list_empresas(
             provincia=provincia
         )
         
-        service = EmpresaService()
+        if cursor is not None:
+            return await list_empresas_cursor(
+                cursor,
+                limit,
+                filters,
+                sort_by=ordenar_por,
+                descending=orden_desc,
+                incluir_total=incluir_total
+            )
+        
         result = await service.list_empresas(page, limit, filters)
         
         return result
         
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error("Error al listar empresas", error=str(e))
         raise HTTPException(
@@ -61,6 +126,166 @@ async def list_empresas(
             detail="Error interno del servidor"
         )
 
+@router.get(
+    "/buscar",
+    response_model=List[EmpresaSearchResult],
+    summary="Buscar empresas",
+    description="Búsqueda por RUC, razón social o representante legal ordenada por relevancia"
+)
+async def buscar_empresas(
+    q: str = Query(..., min_length=2, description="RUC, razón social, DNI o nombre del representante"),
+    limit: int = Query(10, ge=1, le=50, description="Máximo de resultados"),
+    current_user = Depends(get_current_user)
+):
+    """Búsqueda de empresas para autocompletado"""
+    try:
+        return await search_empresas(q, limit)
+        
+    except Exception as e:
+        logger.error("Error al buscar empresas", q=q, error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+def _export_cursor(filters: EmpresaFilters, columnas: Optional[str]):
+    """Cursor de Motor y columnas para exportar empresas"""
+    columns = select_columns(EMPRESA_EXPORT_COLUMNS, columnas, EMPRESA_DEFAULT_COLUMNS)
+    cursor = empresas_collection() \
+        .find(build_empresa_query(filters), projection_for(columns)) \
+        .sort(RECIENTES) \
+        .batch_size(1000)
+    return cursor, columns
+
+@router.get(
+    "/exportar",
+    summary="Exportar empresas",
+    description=(
+        "Exportar en streaming (CSV o XLSX) todas las empresas que cumplen los filtros. "
+        "`columnas` acepta las claves del selector de columnas separadas por coma"
+    )
+)
+async def exportar_empresas(
+    formato: str = Query("csv", regex="^(csv|xlsx)$", description="Formato de salida"),
+    columnas: Optional[str] = Query(None, description="Columnas a exportar separadas por coma"),
+    search: Optional[str] = Query(None, description="Término de búsqueda"),
+    tipo_empresa: Optional[str] = Query(None, description="Tipo de empresa"),
+    categoria: Optional[str] = Query(None, description="Categoría de empresa"),
+    estado: Optional[str] = Query(None, description="Estado de la empresa"),
+    departamento: Optional[str] = Query(None, description="Departamento"),
+    provincia: Optional[str] = Query(None, description="Provincia"),
+    current_user = Depends(get_current_user)
+):
+    """Exportar empresas en streaming"""
+    try:
+        filters = EmpresaFilters(
+            search=search,
+            tipoEmpresa=tipo_empresa,
+            categoria=categoria,
+            estado=estado,
+            departamento=departamento,
+            provincia=provincia
+        )
+        cursor, columns = _export_cursor(filters, columnas)
+        
+        if formato == "csv":
+            return StreamingResponse(
+                stream_csv(cursor, columns),
+                media_type="text/csv; charset=utf-8",
+                headers={"Content-Disposition": 'attachment; filename="empresas.csv"'}
+            )
+        
+        _, path = new_export_path("empresas", "xlsx", current_user.id)
+        await write_xlsx(cursor, columns, path)
+        return FileResponse(
+            path,
+            filename="empresas.xlsx",
+            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            background=BackgroundTask(os.remove, path)
+        )
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error("Error al exportar empresas", error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+@router.post(
+    "/exportar/fondo",
+    response_model=dict,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Exportar empresas en segundo plano",
+    description="Generar la exportación en REPORTS_DIR para conjuntos muy grandes"
+)
+async def exportar_empresas_fondo(
+    background_tasks: BackgroundTasks,
+    formato: str = Query("csv", regex="^(csv|xlsx)$", description="Formato de salida"),
+    columnas: Optional[str] = Query(None, description="Columnas a exportar separadas por coma"),
+    search: Optional[str] = Query(None, description="Término de búsqueda"),
+    tipo_empresa: Optional[str] = Query(None, description="Tipo de empresa"),
+    categoria: Optional[str] = Query(None, description="Categoría de empresa"),
+    estado: Optional[str] = Query(None, description="Estado de la empresa"),
+    departamento: Optional[str] = Query(None, description="Departamento"),
+    provincia: Optional[str] = Query(None, description="Provincia"),
+    current_user = Depends(get_current_user)
+):
+    """Programar exportación de empresas"""
+    try:
+        filters = EmpresaFilters(
+            search=search,
+            tipoEmpresa=tipo_empresa,
+            categoria=categoria,
+            estado=estado,
+            departamento=departamento,
+            provincia=provincia
+        )
+        cursor, columns = _export_cursor(filters, columnas)
+        nombre, path = new_export_path("empresas", formato, current_user.id)
+        background_tasks.add_task(export_to_file, cursor, columns, formato, path)
+        
+        return {
+            "success": True,
+            "message": "Exportación programada",
+            "archivo": nombre,
+            "url": f"/api/v1/empresas/exportar/archivos/{nombre}"
+        }
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error("Error al programar exportación de empresas", error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+@router.get(
+    "/exportar/archivos/{archivo}",
+    summary="Descargar exportación",
+    description="Descargar una exportación generada en segundo plano por el usuario actual"
+)
+async def descargar_exportacion(
+    archivo: str,
+    current_user = Depends(get_current_user)
+):
+    """Descargar exportación generada"""
+    path = resolve_export_path(archivo, current_user.id)
+    if not path:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Exportación no encontrada o aún en proceso"
+        )
+    return FileResponse(path, filename=archivo)
+
 @router.get(
     "/{empresa_id}",
     response_model=EmpresaTransporte,
@@ -69,12 +294,16 @@ async def list_empresas(
 )
 async def get_empresa(
     empresa_id: str,
+    service: EmpresaService = Depends(get_empresa_service),
     current_user = Depends(get_current_user)
 ):
     """Obtener empresa por ID"""
     try:
-        service = EmpresaService()
-        empresa = await service.get_empresa(empresa_id)
+        empresa = await cache.get_or_load(
+            "empresa",
+            empresa_id,
+            lambda: service.get_empresa(empresa_id)
+        )
         
         if not empresa:
             raise HTTPException(
@@ -93,6 +322,23 @@ async def get_empresa(
             detail="Error interno del servidor"
         )
 
+async def _validar_ruc_sunat(ruc: str):
+    """
+    Verificar el RUC en SUNAT antes de registrar la empresa.
+
+    Usa la respuesta cacheada si el RUC ya fue consultado (p. ej. desde el
+    formulario). Si SUNAT no está configurado o no responde, el registro continúa.
+    """
+    if not settings.INTEROP_VALIDAR_RUC_AL_CREAR:
+        return
+    try:
+        datos = await interoperatividad.consultar_ruc(ruc)
+    except ProveedorNoDisponible as e:
+        logger.warning("RUC no verificado en SUNAT", ruc=ruc, motivo=str(e))
+        return
+    if datos is None:
+        raise ValueError("RUC no encontrado en SUNAT")
+
 @router.post(
     "/",
     response_model=EmpresaTransporte,
@@ -102,12 +348,20 @@ async def get_empresa(
 )
 async def create_empresa(
     empresa_data: CreateEmpresaRequest,
+    service: EmpresaService = Depends(get_empresa_service),
     current_user = Depends(get_current_user)
 ):
     """Crear nueva empresa"""
     try:
-        service = EmpresaService()
+        await _validar_ruc_sunat(empresa_data.ruc)
         empresa = await service.create_empresa(empresa_data, current_user.id)
+        await update_search_fields(empresa.id)
+        await invalidate_empresa(empresa.id)
+        await apply_change("empresas", None, await load_dimensions("empresas", empresa.id))
+        audit_logger.log_action(
+            "CREAR_EMPRESA", current_user.id, "empresas", empresa.id,
+            {"ruc": empresa.ruc}
+        )
         
         logger.info(
             "Empresa creada exitosamente",
@@ -139,11 +393,12 @@ async def create_empresa(
 async def update_empresa(
     empresa_id: str,
     empresa_data: UpdateEmpresaRequest,
+    service: EmpresaService = Depends(get_empresa_service),
     current_user = Depends(get_current_user)
 ):
     """Actualizar empresa"""
     try:
-        service = EmpresaService()
+        before = await load_dimensions("empresas", empresa_id)
         empresa = await service.update_empresa(empresa_id, empresa_data, current_user.id)
         
         if not empresa:
@@ -152,6 +407,14 @@ async def update_empresa(
                 detail="Empresa no encontrada"
             )
         
+        await update_search_fields(empresa_id)
+        await invalidate_empresa(empresa_id)
+        await apply_change("empresas", before, await load_dimensions("empresas", empresa_id))
+        audit_logger.log_action(
+            "ACTUALIZAR_EMPRESA", current_user.id, "empresas", empresa_id,
+            empresa_data.dict(exclude_unset=True)
+        )
+        
         logger.info(
             "Empresa actualizada exitosamente",
             empresa_id=empresa_id,
@@ -182,11 +445,12 @@ async def update_empresa(
 )
 async def delete_empresa(
     empresa_id: str,
+    service: EmpresaService = Depends(get_empresa_service),
     current_user = Depends(get_current_user)
 ):
     """Eliminar empresa (marcar como cancelada)"""
     try:
-        service = EmpresaService()
+        before = await load_dimensions("empresas", empresa_id)
         success = await service.delete_empresa(empresa_id, current_user.id)
         
         if not success:
@@ -195,6 +459,10 @@ async def delete_empresa(
                 detail="Empresa no encontrada"
             )
         
+        await invalidate_empresa(empresa_id)
+        await apply_change("empresas", before, await load_dimensions("empresas", empresa_id))
+        audit_logger.log_action("ELIMINAR_EMPRESA", current_user.id, "empresas", empresa_id)
+        
         logger.info(
             "Empresa eliminada exitosamente",
             empresa_id=empresa_id,
@@ -215,6 +483,62 @@ async def delete_empresa(
             detail="Error interno del servidor"
         )
 
+@router.post(
+    "/cumplimiento/lote",
+    response_model=dict,
+    summary="Cumplimiento de varias empresas",
+    description="Obtener en una sola consulta los snapshots de cumplimiento de varias empresas"
+)
+async def get_empresas_cumplimiento_lote(
+    request: CumplimientoLoteRequest,
+    current_user = Depends(get_current_user)
+):
+    """Obtener snapshots de cumplimiento por lote"""
+    try:
+        return await get_snapshots(request.empresaIds)
+        
+    except Exception as e:
+        logger.error("Error al obtener cumplimiento por lote", error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+@router.post(
+    "/lote/{accion}",
+    response_model=TransicionLoteResponse,
+    summary="Transición de empresas en lote",
+    description=(
+        "Suspender, reactivar o eliminar varias empresas en una sola transacción. "
+        "Al eliminar se desvinculan sus vehículos, rutas y conductores y se dan de baja sus TUC vigentes"
+    )
+)
+async def transicion_empresas_lote(
+    request: TransicionLoteRequest,
+    accion: str = Path(..., regex="^(suspender|reactivar|eliminar)$"),
+    current_user = Depends(get_current_user)
+):
+    """Aplicar una transición de estado a varias empresas"""
+    try:
+        result = await transition_empresas(accion, request.empresaIds, request.motivo, current_user.id)
+        audit_logger.log_action(
+            f"{accion.upper()}_EMPRESAS_LOTE", current_user.id, "empresas", result["loteId"],
+            {"motivo": request.motivo, "empresaIds": result["procesadas"]}
+        )
+        return result
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error("Error en transición de empresas en lote", accion=accion, error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
 @router.post(
     "/{empresa_id}/suspender",
     response_model=ApiResponse,
@@ -224,11 +548,12 @@ async def delete_empresa(
 async def suspend_empresa(
     empresa_id: str,
     motivo: str = Query(..., description="Motivo de la suspensión"),
+    service: EmpresaService = Depends(get_empresa_service),
     current_user = Depends(get_current_user)
 ):
     """Suspender empresa"""
     try:
-        service = EmpresaService()
+        before = await load_dimensions("empresas", empresa_id)
         success = await service.suspend_empresa(empresa_id, motivo, current_user.id)
         
         if not success:
@@ -237,6 +562,12 @@ async def suspend_empresa(
                 detail="Empresa no encontrada"
             )
         
+        await invalidate_empresa(empresa_id)
+        await apply_change("empresas", before, await load_dimensions("empresas", empresa_id))
+        audit_logger.log_action(
+            "SUSPENDER_EMPRESA", current_user.id, "empresas", empresa_id, {"motivo": motivo}
+        )
+        
         logger.info(
             "Empresa suspendida exitosamente",
             empresa_id=empresa_id,
@@ -267,11 +598,12 @@ async def suspend_empresa(
 async def reactivate_empresa(
     empresa_id: str,
     motivo: str = Query(..., description="Motivo de la reactivación"),
+    service: EmpresaService = Depends(get_empresa_service),
     current_user = Depends(get_current_user)
 ):
     """Reactivar empresa"""
     try:
-        service = EmpresaService()
+        before = await load_dimensions("empresas", empresa_id)
         success = await service.reactivate_empresa(empresa_id, motivo, current_user.id)
         
         if not success:
@@ -280,6 +612,12 @@ async def reactivate_empresa(
                 detail="Empresa no encontrada"
             )
         
+        await invalidate_empresa(empresa_id)
+        await apply_change("empresas", before, await load_dimensions("empresas", empresa_id))
+        audit_logger.log_action(
+            "REACTIVAR_EMPRESA", current_user.id, "empresas", empresa_id, {"motivo": motivo}
+        )
+        
         logger.info(
             "Empresa reactivada exitosamente",
             empresa_id=empresa_id,
@@ -303,18 +641,36 @@ async def reactivate_empresa(
 
 @router.get(
     "/{empresa_id}/historial",
-    response_model=List[dict],
+    response_model=CursorPaginatedResponse[dict],
     summary="Historial de empresa",
-    description="Obtener historial de cambios de una empresa"
+    description=(
+        "Obtener historial de cambios de una empresa, del más reciente al más antiguo, "
+        "paginado por cursor. `detalles` (valores anteriores y nuevos) solo se incluye si se solicita"
+    )
 )
 async def get_empresa_historial(
     empresa_id: str,
+    limit: int = Query(HISTORIAL_LIMIT, ge=1, le=100, description="Elementos por página"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco de paginación"),
+    detalles: bool = Query(False, description="Incluir el detalle de cada cambio"),
+    incluir_archivo: bool = Query(False, description="Continuar con los cambios archivados al agotar los recientes"),
     current_user = Depends(get_current_user)
 ):
     """Obtener historial de empresa"""
     try:
-        service = EmpresaService()
-        historial = await service.get_empresa_historial(empresa_id)
+        async def load():
+            if not await empresas_collection().count_documents({"_id": ObjectId(empresa_id)}, limit=1):
+                return None
+            items, next_cursor = await get_historial("empresas", empresa_id, limit, cursor, detalles, incluir_archivo)
+            return CursorPaginatedResponse[dict](
+                data=items, limit=limit, next_cursor=next_cursor, has_more=next_cursor is not None
+            )
+
+        # Solo la primera página por defecto se guarda en caché (clave invalidada en cada cambio)
+        if cursor is None and limit == HISTORIAL_LIMIT and not detalles and not incluir_archivo:
+            historial = await cache.get_or_load("empresa_historial", empresa_id, load)
+        else:
+            historial = await load()
         
         if historial is None:
             raise HTTPException(
@@ -326,6 +682,11 @@ async def get_empresa_historial(
         
     except HTTPException:
         raise
+    except (ValueError, InvalidId) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error("Error al obtener historial", empresa_id=empresa_id, error=str(e))
         raise HTTPException(
@@ -333,11 +694,64 @@ async def get_empresa_historial(
             detail="Error interno del servidor"
         )
 
+@router.get(
+    "/{empresa_id}/linea-tiempo",
+    response_model=CursorPaginatedResponse[dict],
+    summary="Línea de tiempo de empresa",
+    description=(
+        "Cambios de la empresa y de sus vehículos y conductores en una sola línea de tiempo, "
+        "del más reciente al más antiguo, paginada por cursor"
+    )
+)
+async def get_empresa_linea_tiempo(
+    empresa_id: str,
+    fuentes: str = Query(
+        "empresas,vehiculos",
+        description="Historiales a combinar, separados por coma (empresas, vehiculos, conductores)"
+    ),
+    limit: int = Query(HISTORIAL_LIMIT, ge=1, le=100, description="Elementos por página"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco de paginación"),
+    detalles: bool = Query(False, description="Incluir el detalle de cada cambio"),
+    current_user = Depends(get_current_user)
+):
+    """Obtener línea de tiempo de empresa"""
+    try:
+        if not await empresas_collection().count_documents({"_id": ObjectId(empresa_id)}, limit=1):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Empresa no encontrada"
+            )
+
+        items, next_cursor = await get_empresa_timeline(
+            empresa_id,
+            [fuente.strip() for fuente in fuentes.split(",") if fuente.strip()],
+            limit,
+            cursor,
+            detalles
+        )
+        return CursorPaginatedResponse[dict](
+            data=items, limit=limit, next_cursor=next_cursor, has_more=next_cursor is not None
+        )
+        
+    except HTTPException:
+        raise
+    except (ValueError, InvalidId) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error("Error al obtener línea de tiempo", empresa_id=empresa_id, error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
 @router.get(
     "/{empresa_id}/cumplimiento",
     response_model=dict,
     summary="Cumplimiento de empresa",
-    description="Obtener información de cumplimiento de una empresa"
+    description="Obtener el snapshot de cumplimiento de una empresa (incluye `calculadoEn`)"
 )
 async def get_empresa_cumplimiento(
     empresa_id: str,
@@ -345,8 +759,11 @@ async def get_empresa_cumplimiento(
 ):
     """Obtener cumplimiento de empresa"""
     try:
-        service = EmpresaService()
-        cumplimiento = await service.get_empresa_cumplimiento(empresa_id)
+        cumplimiento = await cache.get_or_load(
+            "empresa_cumplimiento",
+            empresa_id,
+            lambda: get_snapshot(empresa_id)
+        )
         
         if cumplimiento is None:
             raise HTTPException(
@@ -0,0 +1,130 @@
+"""
+Endpoints para la importación masiva de empresas y vehículos
+"""
+
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, status
+import structlog
+
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.core.logging import audit_logger
+from app.schemas.importaciones import ImportacionErrorFila, ImportacionJob
+from app.services.bulk_import import import_engine, save_upload
+from app.services.document_storage import ArchivoDemasiadoGrande
+
+logger = structlog.get_logger()
+router = APIRouter()
+
+@router.post(
+    "/{entidad}",
+    response_model=ImportacionJob,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Importar planilla",
+    description=(
+        "Subir una planilla CSV o XLSX enviando su contenido binario como cuerpo de la "
+        "solicitud. Las filas se validan e insertan por lotes en segundo plano; los "
+        "encabezados pueden ser los de la exportación o rutas de campo (`direccion.distrito`)"
+    )
+)
+async def importar(
+    request: Request,
+    entidad: str = Path(..., regex="^(empresas|vehiculos)$"),
+    nombre_archivo: str = Query(..., alias="nombreArchivo", max_length=255),
+    codificacion: str = Query("utf-8-sig", regex="^(utf-8-sig|latin-1|cp1252)$", description="Codificación del CSV"),
+    current_user = Depends(get_current_user)
+):
+    """Importar planilla"""
+    try:
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > settings.IMPORT_MAX_FILE_SIZE:
+            raise ArchivoDemasiadoGrande(
+                f"El archivo supera el tamaño máximo de {settings.IMPORT_MAX_FILE_SIZE} bytes"
+            )
+
+        path, formato = await save_upload(request.stream(), nombre_archivo)
+        job = await import_engine.submit(entidad, path, nombre_archivo, formato, codificacion, current_user.id)
+        audit_logger.log_action(
+            "IMPORTAR", current_user.id, entidad, str(job["_id"]),
+            {"nombreArchivo": job["nombreArchivo"]}
+        )
+        return ImportacionJob.from_document(job)
+
+    except ArchivoDemasiadoGrande as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error("Error al registrar importación", entidad=entidad, error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+@router.get(
+    "/{importacion_id}",
+    response_model=ImportacionJob,
+    summary="Estado de importación",
+    description="Consultar el avance de una importación"
+)
+async def get_importacion(
+    importacion_id: str = Path(..., description="ID de la importación"),
+    current_user = Depends(get_current_user)
+):
+    """Consultar estado de importación"""
+    job = await import_engine.get(importacion_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Importación no encontrada"
+        )
+    return ImportacionJob.from_document(job)
+
+@router.get(
+    "/{importacion_id}/errores",
+    response_model=List[ImportacionErrorFila],
+    summary="Errores de importación",
+    description="Errores por fila, ordenados por número de fila (paginar con `desde_fila`)"
+)
+async def get_errores_importacion(
+    importacion_id: str = Path(..., description="ID de la importación"),
+    desde_fila: int = Query(0, ge=0, description="Devolver errores posteriores a esta fila"),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user = Depends(get_current_user)
+):
+    """Listar errores de importación"""
+    try:
+        return await import_engine.get_errors(importacion_id, desde_fila, limit)
+
+    except Exception as e:
+        logger.error("Error al obtener errores de importación", importacion_id=importacion_id, error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+@router.post(
+    "/{importacion_id}/reanudar",
+    response_model=ImportacionJob,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Reanudar importación",
+    description="Continuar una importación interrumpida desde el último lote confirmado"
+)
+async def reanudar_importacion(
+    importacion_id: str = Path(..., description="ID de la importación"),
+    current_user = Depends(get_current_user)
+):
+    """Reanudar importación"""
+    job = await import_engine.resume(importacion_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="La importación no existe, está en curso o ya finalizó"
+        )
+    return ImportacionJob.from_document(job)
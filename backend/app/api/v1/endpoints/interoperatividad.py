@@ -0,0 +1,95 @@
+"""
+Endpoints de consulta a servicios externos (SUNAT, RENIEC)
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Path, status
+import structlog
+
+from app.api.deps import get_current_user
+from app.services.interoperatividad import interoperatividad, ProveedorNoDisponible
+
+logger = structlog.get_logger()
+router = APIRouter()
+
+@router.get(
+    "/estado",
+    summary="Estado de proveedores",
+    description="Configuración y estado del circuit breaker de cada proveedor externo"
+)
+async def get_estado(current_user = Depends(get_current_user)):
+    """Estado de los proveedores externos"""
+    return interoperatividad.status()
+
+@router.get(
+    "/sunat/ruc/{ruc}",
+    summary="Consultar RUC",
+    description="Consultar un RUC en SUNAT (respuesta cacheada)"
+)
+async def consultar_ruc(
+    ruc: str = Path(..., description="RUC de 11 dígitos"),
+    current_user = Depends(get_current_user)
+):
+    """Consultar RUC en SUNAT"""
+    try:
+        datos = await interoperatividad.consultar_ruc(ruc)
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except ProveedorNoDisponible as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error("Error al consultar RUC", ruc=ruc, error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+    if datos is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="RUC no encontrado en SUNAT"
+        )
+    return datos
+
+@router.get(
+    "/reniec/dni/{dni}",
+    summary="Consultar DNI",
+    description="Consultar un DNI en RENIEC (respuesta cacheada)"
+)
+async def consultar_dni(
+    dni: str = Path(..., description="DNI de 8 dígitos"),
+    current_user = Depends(get_current_user)
+):
+    """Consultar DNI en RENIEC"""
+    try:
+        datos = await interoperatividad.consultar_dni(dni)
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except ProveedorNoDisponible as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error("Error al consultar DNI", error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+    if datos is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="DNI no encontrado en RENIEC"
+        )
+    return datos
@@ -0,0 +1,133 @@
+"""
+Endpoints para reportes estadísticos generados en segundo plano
+"""
+
+import os
+from typing import Dict, List
+from fastapi import APIRouter, Depends, HTTPException, Path, status
+from fastapi.responses import FileResponse
+import structlog
+
+from app.api.deps import get_current_user
+from app.schemas.reportes import ReporteJob, ReporteRequest
+from app.services.dashboard_stats import get_dashboard_stats
+from app.services.report_jobs import REPORT_TYPES, COMPLETADO, report_engine
+
+logger = structlog.get_logger()
+router = APIRouter()
+
+@router.get(
+    "/tipos",
+    response_model=List[Dict[str, str]],
+    summary="Tipos de reporte",
+    description="Listar los reportes estadísticos disponibles"
+)
+async def list_tipos(current_user = Depends(get_current_user)):
+    """Listar tipos de reporte"""
+    return [
+        {"tipo": tipo, "descripcion": descripcion}
+        for tipo, (descripcion, _) in REPORT_TYPES.items()
+    ]
+
+@router.get(
+    "/dashboard",
+    response_model=dict,
+    summary="Estadísticas del dashboard",
+    description=(
+        "Contadores pre-agregados por estado, tipo de empresa y provincia, y TUC "
+        "por vencer en 30/60/90 días"
+    )
+)
+async def get_dashboard(current_user = Depends(get_current_user)):
+    """Obtener estadísticas del dashboard"""
+    try:
+        return await get_dashboard_stats()
+        
+    except Exception as e:
+        logger.error("Error al obtener estadísticas del dashboard", error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+@router.post(
+    "/",
+    response_model=ReporteJob,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Solicitar reporte",
+    description=(
+        "Registrar un reporte para generación en segundo plano. Una solicitud "
+        "idéntica a otra en curso o con resultado vigente devuelve el mismo trabajo"
+    )
+)
+async def solicitar_reporte(
+    solicitud: ReporteRequest,
+    current_user = Depends(get_current_user)
+):
+    """Solicitar reporte"""
+    try:
+        job = await report_engine.submit(
+            solicitud.tipo,
+            solicitud.parametros,
+            solicitud.formato,
+            current_user.id
+        )
+        return ReporteJob.from_document(job)
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error("Error al solicitar reporte", tipo=solicitud.tipo, error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+@router.get(
+    "/{job_id}",
+    response_model=ReporteJob,
+    summary="Estado de reporte",
+    description="Consultar el estado de un trabajo de reporte"
+)
+async def get_reporte(
+    job_id: str = Path(..., description="ID del trabajo"),
+    current_user = Depends(get_current_user)
+):
+    """Consultar estado de reporte"""
+    job = await report_engine.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Reporte no encontrado"
+        )
+    return ReporteJob.from_document(job)
+
+@router.get(
+    "/{job_id}/descargar",
+    summary="Descargar reporte",
+    description="Descargar el resultado de un reporte completado"
+)
+async def descargar_reporte(
+    job_id: str = Path(..., description="ID del trabajo"),
+    current_user = Depends(get_current_user)
+):
+    """Descargar reporte"""
+    job = await report_engine.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Reporte no encontrado"
+        )
+    if job["estado"] != COMPLETADO or not os.path.isfile(job.get("archivo", "")):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Reporte no disponible (estado: {job['estado']})"
+        )
+
+    return FileResponse(
+        job["archivo"],
+        filename=f"{job['tipo']}-{job['creadoEn']:%Y%m%d%H%M}.{job['formato']}"
+    )
@@ -0,0 +1,73 @@
+"""
+Endpoints de sincronización offline para la app móvil de fiscalización
+"""
+
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from bson import ObjectId
+import structlog
+
+from app.api.deps import get_current_user
+from app.schemas.sync import FiscalizacionesLoteRequest, FiscalizacionesLoteResponse
+from app.services.sync_service import SYNC_PROJECTIONS, get_changes, upload_fiscalizaciones
+
+logger = structlog.get_logger()
+router = APIRouter()
+
+@router.get(
+    "/cambios",
+    summary="Cambios desde la marca de agua",
+    description=(
+        "Changeset compacto de vehículos, conductores, TUC, rutas e infracciones "
+        "modificados desde la marca de agua. Repetir con la nueva `watermark` mientras `hayMas` sea true"
+    )
+)
+async def get_cambios(
+    watermark: Optional[str] = Query(None, description="Marca de agua devuelta por la sincronización anterior"),
+    colecciones: str = Query(
+        ",".join(SYNC_PROJECTIONS),
+        description="Colecciones a sincronizar separadas por coma"
+    ),
+    limite: int = Query(500, ge=1, le=2000, description="Máximo de documentos por colección"),
+    current_user = Depends(get_current_user)
+):
+    """Obtener cambios para sincronización delta"""
+    try:
+        nombres = [c.strip() for c in colecciones.split(",") if c.strip()]
+        result = await get_changes(watermark, nombres, limite)
+        return JSONResponse(jsonable_encoder(result, custom_encoder={ObjectId: str}))
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error("Error al obtener cambios de sincronización", error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+@router.post(
+    "/fiscalizaciones",
+    response_model=FiscalizacionesLoteResponse,
+    summary="Subir fiscalizaciones por lote",
+    description="Registrar en una sola llamada las actas y papeletas capturadas sin conexión (idempotente)"
+)
+async def post_fiscalizaciones(
+    request: FiscalizacionesLoteRequest,
+    current_user = Depends(get_current_user)
+):
+    """Subir lote de fiscalizaciones"""
+    try:
+        return await upload_fiscalizaciones(request.fiscalizaciones, current_user.id)
+        
+    except Exception as e:
+        logger.error("Error al sincronizar fiscalizaciones", error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
@@ -0,0 +1,146 @@
+"""
+Endpoints para TUC - Tarjetas Únicas de Circulación
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response, status
+import structlog
+
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.core.logging import audit_logger
+from app.services.tuc_rendering import tuc_renderer
+from app.services.tuc_verification import verify_tuc
+
+logger = structlog.get_logger()
+router = APIRouter()
+
+@router.get(
+    "/verificar/{numero}",
+    summary="Verificar TUC",
+    description=(
+        "Verificación pública (sin autenticación) de una TUC a partir de la URL "
+        "codificada en su código QR. Soporta revalidación con ETag / If-None-Match"
+    ),
+    responses={304: {"description": "La TUC no cambió desde la última verificación"}}
+)
+async def verificar_tuc(
+    request: Request,
+    numero: str = Path(..., max_length=40, description="Número de la TUC")
+):
+    """Verificar TUC por número (endpoint público)"""
+    try:
+        result = await verify_tuc(numero)
+    except Exception as e:
+        logger.error("Error al verificar TUC", numero=numero, error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="TUC no encontrada"
+        )
+
+    body, etag, restante = result
+    max_age = settings.TUC_VERIFICACION_MAX_AGE
+    stale = settings.TUC_VERIFICACION_STALE_WHILE_REVALIDATE
+    if restante is not None:
+        # Una TUC vigente no puede servirse desde caches intermedios después de vencer
+        max_age = max(0, min(max_age, restante))
+        stale = max(0, min(stale, restante - max_age))
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}, stale-while-revalidate={stale}",
+    }
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@router.post(
+    "/{tuc_id}/pdf",
+    summary="Generar PDF de TUC",
+    description="Generar la tarjeta en PDF con código QR y registrarla en documentos"
+)
+async def generar_pdf_tuc(
+    tuc_id: str,
+    current_user = Depends(get_current_user)
+):
+    """Generar PDF de una TUC"""
+    try:
+        tuc = await tuc_renderer.generate_one(tuc_id, current_user.id)
+    except Exception as e:
+        logger.error("Error al generar PDF de TUC", tuc_id=tuc_id, error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+    if not tuc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="TUC no encontrada"
+        )
+
+    audit_logger.log_action(
+        "GENERAR_PDF_TUC", current_user.id, "tucs", tuc_id,
+        {"documentoId": tuc.get("documentoId")}
+    )
+    return {
+        "numero": tuc["numero"],
+        "documentoId": tuc.get("documentoId"),
+        "url": f"/api/v1/documentos/{tuc.get('documentoId')}/descargar",
+    }
+
+@router.post(
+    "/empresa/{empresa_id}/reemitir",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Reemitir TUC de una empresa",
+    description=(
+        "Regenerar en segundo plano los PDF de todas las TUC vigentes de una "
+        "empresa (p. ej. tras una nueva resolución)"
+    )
+)
+async def reemitir_tucs_empresa(
+    empresa_id: str,
+    motivo: str = Query(None, description="Motivo de la reemisión"),
+    current_user = Depends(get_current_user)
+):
+    """Reemitir TUC de una empresa"""
+    try:
+        lote = await tuc_renderer.reissue_empresa(empresa_id, current_user.id, motivo)
+        audit_logger.log_action(
+            "REEMITIR_TUCS", current_user.id, "empresas", empresa_id,
+            {"loteId": str(lote["_id"]), "total": lote["total"], "motivo": motivo}
+        )
+        lote["id"] = str(lote.pop("_id"))
+        return lote
+        
+    except Exception as e:
+        logger.error("Error al reemitir TUC", empresa_id=empresa_id, error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+@router.get(
+    "/lotes/{lote_id}",
+    summary="Estado de lote de TUC",
+    description="Consultar el avance de un lote de reemisión"
+)
+async def get_lote_tucs(
+    lote_id: str,
+    current_user = Depends(get_current_user)
+):
+    """Consultar lote de reemisión"""
+    lote = await tuc_renderer.get_batch(lote_id)
+    if not lote:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lote no encontrado"
+        )
+    lote["id"] = str(lote.pop("_id"))
+    return lote
@@ -0,0 +1,146 @@
+"""
+Endpoints para gestión de vehículos
+"""
+
+import os
+import re
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING
+import structlog
+
+from app.api.deps import get_current_user
+from app.core.database import vehiculos_collection
+from app.schemas.pagination import CursorPaginatedResponse
+from app.services.historial_service import get_historial
+from app.services.export_service import (
+    VEHICULO_EXPORT_COLUMNS,
+    VEHICULO_DEFAULT_COLUMNS,
+    select_columns,
+    projection_for,
+    stream_csv,
+    write_xlsx,
+    new_export_path
+)
+
+logger = structlog.get_logger()
+router = APIRouter()
+
+def build_vehiculo_query(
+    empresa_id: Optional[str],
+    estado: Optional[str],
+    categoria: Optional[str],
+    placa: Optional[str]
+) -> Dict[str, Any]:
+    """Filtro de MongoDB para listados y exportaciones de vehículos"""
+    query: Dict[str, Any] = {"estaActivo": True}
+    if empresa_id:
+        try:
+            query["empresaId"] = {"$in": [ObjectId(empresa_id), empresa_id]}
+        except InvalidId:
+            query["empresaId"] = empresa_id
+    if estado:
+        query["estado"] = estado
+    if categoria:
+        query["categoria"] = categoria
+    if placa:
+        query["placa"] = {"$regex": f"^{re.escape(placa.strip().upper())}"}
+    return query
+
+@router.get(
+    "/exportar",
+    summary="Exportar vehículos",
+    description="Exportar en streaming (CSV o XLSX) los vehículos que cumplen los filtros"
+)
+async def exportar_vehiculos(
+    formato: str = Query("csv", regex="^(csv|xlsx)$", description="Formato de salida"),
+    columnas: Optional[str] = Query(None, description="Columnas a exportar separadas por coma"),
+    empresa_id: Optional[str] = Query(None, description="Empresa"),
+    estado: Optional[str] = Query(None, description="Estado del vehículo"),
+    categoria: Optional[str] = Query(None, description="Categoría (M1, M2, M3, ...)"),
+    placa: Optional[str] = Query(None, description="Prefijo de placa"),
+    current_user = Depends(get_current_user)
+):
+    """Exportar vehículos en streaming"""
+    try:
+        columns = select_columns(VEHICULO_EXPORT_COLUMNS, columnas, VEHICULO_DEFAULT_COLUMNS)
+        cursor = vehiculos_collection() \
+            .find(build_vehiculo_query(empresa_id, estado, categoria, placa), projection_for(columns)) \
+            .sort([("placa", ASCENDING)]) \
+            .batch_size(1000)
+        
+        if formato == "csv":
+            return StreamingResponse(
+                stream_csv(cursor, columns),
+                media_type="text/csv; charset=utf-8",
+                headers={"Content-Disposition": 'attachment; filename="vehiculos.csv"'}
+            )
+        
+        _, path = new_export_path("vehiculos", "xlsx", current_user.id)
+        await write_xlsx(cursor, columns, path)
+        return FileResponse(
+            path,
+            filename="vehiculos.xlsx",
+            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            background=BackgroundTask(os.remove, path)
+        )
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error("Error al exportar vehículos", error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+@router.get(
+    "/{vehiculo_id}/historial",
+    response_model=CursorPaginatedResponse[dict],
+    summary="Historial de vehículo",
+    description=(
+        "Obtener historial de cambios de un vehículo, del más reciente al más antiguo, "
+        "paginado por cursor"
+    )
+)
+async def get_vehiculo_historial(
+    vehiculo_id: str,
+    limit: int = Query(20, ge=1, le=100, description="Elementos por página"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco de paginación"),
+    detalles: bool = Query(False, description="Incluir el detalle de cada cambio"),
+    incluir_archivo: bool = Query(False, description="Continuar con los cambios archivados al agotar los recientes"),
+    current_user = Depends(get_current_user)
+):
+    """Obtener historial de vehículo"""
+    try:
+        if not await vehiculos_collection().count_documents({"_id": ObjectId(vehiculo_id)}, limit=1):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Vehículo no encontrado"
+            )
+
+        items, next_cursor = await get_historial("vehiculos", vehiculo_id, limit, cursor, detalles, incluir_archivo)
+        return CursorPaginatedResponse[dict](
+            data=items, limit=limit, next_cursor=next_cursor, has_more=next_cursor is not None
+        )
+        
+    except HTTPException:
+        raise
+    except (ValueError, InvalidId) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error("Error al obtener historial", vehiculo_id=vehiculo_id, error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
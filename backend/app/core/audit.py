@@ -0,0 +1,321 @@
+"""
+Escritor asíncrono por lotes de la colección de auditoría
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from bson import ObjectId, json_util
+from pymongo.errors import BulkWriteError
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+# Sufijo de los archivos del spool reservados por un proceso durante el reenvío
+CLAIM_SUFFIX = ".procesando"
+
+# Tras un reenvío fallido del spool no se reintenta antes de este tiempo (segundos)
+SPOOL_RETRY_INTERVAL = 30.0
+
+class AuditWriter:
+    """
+    Cola en memoria de eventos de auditoría con escritura por lotes en `auditoria`
+    (o en la colección indicada, p. ej. `interoperatividad`).
+
+    - enqueue() no bloquea ni accede a MongoDB: la latencia de las mutaciones no
+      incluye la escritura de auditoría.
+    - Los lotes se escriben con insert_many al alcanzar AUDIT_BATCH_SIZE o cada
+      AUDIT_FLUSH_INTERVAL segundos.
+    - Si la cola supera AUDIT_QUEUE_MAX o MongoDB no está disponible, los eventos
+      se envían al spool en disco (AUDIT_SPOOL_DIR) y se reenvían al iniciar y
+      después de cada escritura exitosa.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = settings.AUDIT_BATCH_SIZE,
+        flush_interval: float = settings.AUDIT_FLUSH_INTERVAL,
+        max_queue: int = settings.AUDIT_QUEUE_MAX,
+        spool_dir: Optional[str] = settings.AUDIT_SPOOL_DIR,
+        collection: str = "auditoria",
+        metrics_prefix: str = "audit"
+    ):
+        self.collection = collection
+        self.metrics_prefix = metrics_prefix
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.spool_dir = spool_dir
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._overflow: List[Dict[str, Any]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._next_replay = 0.0
+        self.written = 0
+        self.spooled = 0
+        self.dropped = 0
+
+    def enqueue(self, event: Dict[str, Any]):
+        """Encolar un evento de auditoría (no bloqueante)"""
+        if not settings.AUDIT_DB_ENABLED:
+            return
+        event.setdefault("fecha", datetime.utcnow())
+        # El _id se asigna al encolar: un reenvío repetido del spool no duplica eventos
+        event.setdefault("_id", ObjectId())
+
+        if len(self._buffer) < self.max_queue:
+            self._buffer.append(event)
+        elif self.spool_dir and len(self._overflow) < self.max_queue:
+            self._overflow.append(event)
+        else:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning("Cola de auditoría llena, eventos descartados", descartados=self.dropped)
+            return
+
+        if self._wakeup is not None and (
+            len(self._buffer) >= self.batch_size or self._overflow
+        ):
+            self._wakeup.set()
+
+    async def start(self):
+        """Reenviar el spool pendiente e iniciar el ciclo de escritura"""
+        if not settings.AUDIT_DB_ENABLED or self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        await self.replay_spool()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Escritor de auditoría iniciado", coleccion=self.collection)
+
+    async def stop(self):
+        """Detener el ciclo y vaciar la cola pendiente"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        logger.info(
+            "Escritor de auditoría detenido",
+            coleccion=self.collection,
+            escritos=self.written,
+            en_spool=self.spooled,
+            descartados=self.dropped
+        )
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                written = self.written
+                if not await self.flush():
+                    self._next_replay = time.monotonic() + SPOOL_RETRY_INTERVAL
+                # Con MongoDB disponible otra vez (o cumplido el intervalo de
+                # reintento), se reenvía lo que quedó en el spool
+                elif (self.written > written or time.monotonic() >= self._next_replay) \
+                        and await asyncio.to_thread(self._has_spool):
+                    if not await self.replay_spool():
+                        self._next_replay = time.monotonic() + SPOOL_RETRY_INTERVAL
+            except Exception as e:
+                logger.error("Error en el escritor de auditoría", error=str(e))
+
+    async def flush(self) -> bool:
+        """Escribir todos los eventos encolados en lotes; False si algún lote fue al spool"""
+        ok = True
+        async with self._lock:
+            if self._overflow:
+                overflow, self._overflow = self._overflow, []
+                await self._spool(overflow)
+
+            while self._buffer:
+                batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                ok = await self._write(batch) and ok
+        return ok
+
+    def _collection(self):
+        from app.core.database import get_collection
+
+        return get_collection(self.collection)
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> bool:
+        try:
+            await self._collection().insert_many(batch, ordered=False)
+            self.written += len(batch)
+            return True
+        except Exception as e:
+            logger.warning("No se pudo escribir auditoría en MongoDB", error=str(e), eventos=len(batch))
+            if self.spool_dir:
+                await self._spool(batch)
+            else:
+                self.dropped += len(batch)
+            return False
+
+    async def _spool(self, events: List[Dict[str, Any]]):
+        """Agregar eventos a un archivo JSONL del spool en disco"""
+        path = os.path.join(self.spool_dir, f"{self.collection}-{int(time.time() // 3600)}.jsonl")
+        lines = []
+        for event in events:
+            try:
+                lines.append(json_util.dumps(event) + "\n")
+            except (TypeError, ValueError) as e:
+                # Un evento no serializable no debe impedir guardar el resto
+                self.dropped += 1
+                logger.error("Evento de auditoría no serializable", error=str(e))
+
+        def append():
+            os.makedirs(self.spool_dir, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as spool:
+                spool.write("".join(lines))
+
+        try:
+            await asyncio.to_thread(append)
+            self.spooled += len(lines)
+        except OSError as e:
+            self.dropped += len(lines)
+            logger.error("No se pudo escribir el spool de auditoría", path=path, error=str(e))
+
+    def _is_spool_file(self, name: str) -> bool:
+        return name.startswith(f"{self.collection}-") and name.endswith(".jsonl")
+
+    def _has_spool(self) -> bool:
+        """Hay archivos del spool sin reservar"""
+        if not self.spool_dir or not os.path.isdir(self.spool_dir):
+            return False
+        return any(self._is_spool_file(name) for name in os.listdir(self.spool_dir))
+
+    def _pending_spool(self) -> int:
+        """Eventos en el spool (incluye los archivos reservados por un reenvío en curso)"""
+        if not self.spool_dir or not os.path.isdir(self.spool_dir):
+            return 0
+        total = 0
+        for name in os.listdir(self.spool_dir):
+            if not (self._is_spool_file(name) or
+                    (name.startswith(f"{self.collection}-") and name.endswith(CLAIM_SUFFIX))):
+                continue
+            try:
+                with open(os.path.join(self.spool_dir, name), "rb") as spool:
+                    total += sum(1 for line in spool if line.strip())
+            except FileNotFoundError:
+                pass
+        return total
+
+    def _claim(self, name: str) -> Optional[str]:
+        """
+        Reservar un archivo del spool renombrándolo con el PID del proceso.
+
+        El rename es atómico: si varios workers reenvían el spool al iniciar,
+        solo uno obtiene cada archivo.
+        """
+        path = os.path.join(self.spool_dir, name)
+        claimed = f"{path}.{os.getpid()}{CLAIM_SUFFIX}"
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            return None
+        return claimed
+
+    def _pending_path(self) -> str:
+        """Nombre nuevo para devolver eventos al spool sin pisar un archivo existente"""
+        return os.path.join(self.spool_dir, f"{self.collection}-pendiente-{ObjectId()}.jsonl")
+
+    def _release_stale_claims(self):
+        """Devolver al spool los archivos reservados por procesos que ya no existen"""
+        for name in os.listdir(self.spool_dir):
+            if not (name.startswith(f"{self.collection}-") and name.endswith(CLAIM_SUFFIX)):
+                continue
+            pid = name[:-len(CLAIM_SUFFIX)].rsplit(".", 1)[-1]
+            if not pid.isdigit() or int(pid) == os.getpid():
+                continue
+            try:
+                os.kill(int(pid), 0)
+            except ProcessLookupError:
+                try:
+                    os.rename(os.path.join(self.spool_dir, name), self._pending_path())
+                except FileNotFoundError:
+                    pass
+            except PermissionError:
+                pass
+
+    async def _insert_spooled(self, events: List[Dict[str, Any]]) -> bool:
+        for i in range(0, len(events), self.batch_size):
+            try:
+                await self._collection().insert_many(events[i:i + self.batch_size], ordered=False)
+            except BulkWriteError as e:
+                # Claves duplicadas: eventos ya escritos (cada evento lleva su _id)
+                if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                    logger.warning("Spool de auditoría pendiente", error=str(e))
+                    return False
+            except Exception as e:
+                logger.warning("Spool de auditoría pendiente", error=str(e))
+                return False
+        return True
+
+    async def replay_spool(self) -> bool:
+        """
+        Reenviar a MongoDB los eventos guardados en el spool.
+
+        Cada archivo se reserva antes de leerlo, así que varios workers pueden
+        reenviar el mismo directorio a la vez. Devuelve False si MongoDB rechazó
+        algún archivo (queda en el spool para el siguiente intento).
+        """
+        if not self.spool_dir or not os.path.isdir(self.spool_dir):
+            return True
+
+        await asyncio.to_thread(self._release_stale_claims)
+        for name in sorted(os.listdir(self.spool_dir)):
+            if not self._is_spool_file(name):
+                continue
+            claimed = self._claim(name)
+            if claimed is None:
+                continue
+
+            def read():
+                with open(claimed, encoding="utf-8") as spool:
+                    return [json_util.loads(line) for line in spool if line.strip()]
+
+            try:
+                events = await asyncio.to_thread(read)
+                inserted = await self._insert_spooled(events)
+            except BaseException:
+                os.rename(claimed, self._pending_path())
+                raise
+            if not inserted:
+                # Devolver el archivo al spool con un nombre nuevo (el original puede
+                # haber vuelto a crearse con eventos recientes)
+                os.rename(claimed, self._pending_path())
+                return False
+            os.remove(claimed)
+            logger.info("Spool de auditoría reenviado", path=claimed, eventos=len(events))
+        return True
+
+    def render_metrics(self) -> str:
+        """Contadores del escritor en formato de texto de Prometheus"""
+        p = self.metrics_prefix
+        return (
+            f"# TYPE {p}_events_queued gauge\n"
+            f"{p}_events_queued {len(self._buffer) + len(self._overflow)}\n"
+            f"# TYPE {p}_events_written_total counter\n"
+            f"{p}_events_written_total {self.written}\n"
+            f"# TYPE {p}_events_spooled_total counter\n"
+            f"{p}_events_spooled_total {self.spooled}\n"
+            f"# TYPE {p}_events_dropped_total counter\n"
+            f"{p}_events_dropped_total {self.dropped}\n"
+            f"# TYPE {p}_spool_pending gauge\n"
+            f"{p}_spool_pending {self._pending_spool()}\n"
+        )
+
+# Instancia global del escritor de auditoría
+audit_writer = AuditWriter()
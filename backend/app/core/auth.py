@@ -0,0 +1,196 @@
+"""
+Autenticación: validación de tokens de acceso y usuario actual con cache
+"""
+
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from bson import ObjectId
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from jose import JWTError, jwt
+from pydantic import BaseModel
+import structlog
+
+from app.core.config import settings
+from app.core import database
+from app.core.database import usuarios_collection
+
+logger = structlog.get_logger()
+
+# Valor del claim `type` de los tokens de acceso; los tokens sin `type`
+# (emitidos antes de distinguir tipos) se consideran de acceso
+ACCESS_TOKEN_TYPE = "access"
+
+# Estados de usuario que no permiten operar
+ESTADOS_BLOQUEADOS = {"INACTIVO", "SUSPENDIDO", "BLOQUEADO"}
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
+
+class UsuarioActual(BaseModel):
+    """Usuario autenticado resuelto a partir del token"""
+
+    id: str
+    username: Optional[str] = None
+    email: Optional[str] = None
+    rol: Optional[str] = None
+    estado: Optional[str] = None
+
+class _ClaimsCache:
+    """Claims de JWT ya validados, indexados por token hasta su expiración"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._items: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        item = self._items.get(token)
+        if item is None:
+            return None
+        claims, expires_at = item
+        if expires_at <= time.time():
+            self._items.pop(token, None)
+            return None
+        self._items.move_to_end(token)
+        return claims
+
+    def set(self, token: str, claims: Dict[str, Any]):
+        expires_at = float(claims.get("exp") or time.time() + 60)
+        self._items[token] = (claims, expires_at)
+        self._items.move_to_end(token)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+class _UserCache:
+    """Cache de usuarios de vida corta: Redis si está disponible, memoria local si no"""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._local: Dict[str, Tuple[Dict[str, Any], float]] = {}
+
+    @staticmethod
+    def key(user_id: str) -> str:
+        return f"drtc:usuario:{user_id}"
+
+    async def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        client = database.redis_client
+        if client is not None:
+            try:
+                cached = await client.get(self.key(user_id))
+                return json.loads(cached) if cached else None
+            except Exception as e:
+                logger.warning("Cache de usuarios no disponible", error=str(e))
+
+        item = self._local.get(user_id)
+        if item and item[1] > time.monotonic():
+            return item[0]
+        self._local.pop(user_id, None)
+        return None
+
+    async def set(self, user_id: str, user: Dict[str, Any]):
+        self._local[user_id] = (user, time.monotonic() + self.ttl)
+        client = database.redis_client
+        if client is not None:
+            try:
+                await client.set(self.key(user_id), json.dumps(user), ex=self.ttl)
+            except Exception as e:
+                logger.warning("No se pudo cachear usuario", error=str(e))
+
+    async def invalidate(self, user_id: str):
+        self._local.pop(user_id, None)
+        client = database.redis_client
+        if client is not None:
+            try:
+                await client.delete(self.key(user_id))
+            except Exception as e:
+                logger.warning("No se pudo invalidar usuario en cache", error=str(e))
+
+# Instancias globales de las caches de autenticación
+claims_cache = _ClaimsCache(settings.AUTH_CLAIMS_CACHE_SIZE)
+user_cache = _UserCache(settings.AUTH_USER_CACHE_TTL)
+
+async def invalidate_user(user_id: str):
+    """
+    Invalidar el usuario cacheado.
+
+    Se invoca desde el change feed ante cualquier cambio de `estado`, `rol`,
+    contraseña o desactivación en `usuarios`, de modo que ningún proceso sigue
+    aceptando al usuario con datos anteriores.
+    """
+    await user_cache.invalidate(user_id)
+
+def credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="No se pudieron validar las credenciales",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def decode_token(token: str) -> Dict[str, Any]:
+    """Validar el JWT de acceso, reutilizando los claims ya validados mientras no expire"""
+    if settings.AUTH_CACHE_ENABLED:
+        claims = claims_cache.get(token)
+        if claims is not None:
+            return claims
+
+    try:
+        claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        raise credentials_exception()
+
+    if not claims.get("sub"):
+        raise credentials_exception()
+
+    # Un refresh token solo sirve para obtener un nuevo token de acceso
+    if claims.get("type", ACCESS_TOKEN_TYPE) != ACCESS_TOKEN_TYPE:
+        raise credentials_exception()
+
+    if settings.AUTH_CACHE_ENABLED:
+        claims_cache.set(token, claims)
+    return claims
+
+async def load_user(user_id: str) -> Optional[Dict[str, Any]]:
+    """Obtener los datos mínimos del usuario desde cache o desde `usuarios`"""
+    if settings.AUTH_CACHE_ENABLED:
+        cached = await user_cache.get(user_id)
+        if cached is not None:
+            return cached
+
+    try:
+        doc = await usuarios_collection().find_one(
+            {"_id": ObjectId(user_id)},
+            {"username": 1, "email": 1, "rol": 1, "estado": 1, "estaActivo": 1}
+        )
+    except Exception:
+        return None
+    if not doc:
+        return None
+
+    user = {
+        "id": str(doc["_id"]),
+        "username": doc.get("username"),
+        "email": doc.get("email"),
+        "rol": doc.get("rol"),
+        "estado": doc.get("estado"),
+        "estaActivo": doc.get("estaActivo", True),
+    }
+    if settings.AUTH_CACHE_ENABLED:
+        await user_cache.set(user_id, user)
+    return user
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> UsuarioActual:
+    """Usuario autenticado; en el caso común no requiere consultas a MongoDB"""
+    claims = decode_token(token)
+    user = await load_user(claims["sub"])
+    if not user:
+        raise credentials_exception()
+
+    if user.get("estaActivo") is False or user.get("estado") in ESTADOS_BLOQUEADOS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Usuario inactivo"
+        )
+
+    return UsuarioActual(**user)
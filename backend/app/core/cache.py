@@ -0,0 +1,158 @@
+"""
+Cache de lectura (read-through) sobre Redis
+"""
+
+import json
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+from fastapi.encoders import jsonable_encoder
+import structlog
+
+from app.core.config import settings
+from app.core import database
+
+logger = structlog.get_logger()
+
+# TTL por entidad (segundos)
+CACHE_TTLS: Dict[str, int] = {
+    "empresa": settings.CACHE_TTL_EMPRESA,
+    "empresa_historial": settings.CACHE_TTL_EMPRESA_HISTORIAL,
+    "empresa_cumplimiento": settings.CACHE_TTL_EMPRESA_CUMPLIMIENTO,
+    "tuc_verificacion": settings.CACHE_TTL_TUC_VERIFICACION,
+    "sunat_ruc": settings.INTEROP_CACHE_TTL_RUC,
+    "reniec_dni": settings.INTEROP_CACHE_TTL_DNI,
+}
+
+class ReadThroughCache:
+    """
+    Cache read-through con invalidación explícita.
+
+    Si Redis no está disponible (no inicializado o con errores) las lecturas
+    se resuelven directamente con el loader contra MongoDB.
+    """
+
+    def __init__(self, prefix: str = "drtc"):
+        self.prefix = prefix
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.misses: Dict[str, int] = defaultdict(int)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def key(self, namespace: str, entity_id: str) -> str:
+        """Construir la clave de cache de una entidad"""
+        return f"{self.prefix}:{namespace}:{entity_id}"
+
+    def _client(self):
+        if not settings.CACHE_ENABLED:
+            return None
+        return database.redis_client
+
+    async def get_or_load(
+        self,
+        namespace: str,
+        entity_id: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[Union[int, Callable[[str], int]]] = None
+    ) -> Any:
+        """Obtener un valor desde cache o cargarlo y almacenarlo"""
+        async def load_text() -> Optional[str]:
+            value = await loader()
+            if value is None:
+                return None
+            return json.dumps(jsonable_encoder(value), separators=(",", ":"))
+
+        text = await self.get_or_load_text(namespace, entity_id, load_text, ttl)
+        return json.loads(text) if text is not None else None
+
+    async def get_or_load_text(
+        self,
+        namespace: str,
+        entity_id: str,
+        loader: Callable[[], Awaitable[Optional[str]]],
+        ttl: Optional[Union[int, Callable[[str], int]]] = None
+    ) -> Optional[str]:
+        """
+        Variante sin (de)serialización: almacena el texto tal como lo produce el loader.
+
+        `ttl` puede ser una función del texto cargado, para entradas cuya validez
+        depende de su contenido (p. ej. una fecha de vencimiento).
+        """
+        client = self._client()
+        if client is None:
+            return await loader()
+
+        key = self.key(namespace, entity_id)
+        try:
+            cached = await client.get(key)
+        except Exception as e:
+            self.errors[namespace] += 1
+            logger.warning("Cache no disponible, leyendo de MongoDB", key=key, error=str(e))
+            return await loader()
+
+        if cached is not None:
+            self.hits[namespace] += 1
+            return cached
+
+        self.misses[namespace] += 1
+        value = await loader()
+        if value is None:
+            return None
+
+        if callable(ttl):
+            ttl = ttl(value)
+        try:
+            await client.set(
+                key,
+                value,
+                ex=ttl or CACHE_TTLS.get(namespace, settings.CACHE_DEFAULT_TTL)
+            )
+        except Exception as e:
+            self.errors[namespace] += 1
+            logger.warning("No se pudo escribir en cache", key=key, error=str(e))
+
+        return value
+
+    async def invalidate(self, namespace: str, *entity_ids: str):
+        """Eliminar entradas de cache de un namespace"""
+        await self.delete(*[self.key(namespace, entity_id) for entity_id in entity_ids])
+
+    async def delete(self, *keys: str):
+        """Eliminar claves de cache ignorando fallos de Redis"""
+        client = self._client()
+        if client is None or not keys:
+            return
+        try:
+            await client.delete(*keys)
+        except Exception as e:
+            logger.warning("No se pudo invalidar cache", keys=list(keys), error=str(e))
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de aciertos y fallos por namespace"""
+        namespaces = set(self.hits) | set(self.misses) | set(self.errors)
+        result = {}
+        for namespace in sorted(namespaces):
+            hits = self.hits[namespace]
+            misses = self.misses[namespace]
+            total = hits + misses
+            result[namespace] = {
+                "hits": hits,
+                "misses": misses,
+                "errors": self.errors[namespace],
+                "hit_ratio": round(hits / total, 4) if total else 0.0,
+            }
+        return {
+            "enabled": settings.CACHE_ENABLED,
+            "redis_available": database.redis_client is not None,
+            "namespaces": result,
+        }
+
+# Instancia global del cache
+cache = ReadThroughCache()
+
+async def invalidate_empresa(empresa_id: str):
+    """Invalidar todas las vistas cacheadas de una empresa"""
+    await cache.delete(
+        cache.key("empresa", empresa_id),
+        cache.key("empresa_historial", empresa_id),
+        cache.key("empresa_cumplimiento", empresa_id),
+    )
@@ -37,6 +37,11 @@ class Settings(BaseSettings):
         default=10,
         env="MONGODB_MAX_POOL_SIZE"
     )
+    # En producción se recomienda False y ejecutar `python -m scripts.indexes sync` al desplegar
+    MONGODB_CREATE_INDEXES_ON_STARTUP: bool = Field(
+        default=True,
+        env="MONGODB_CREATE_INDEXES_ON_STARTUP"
+    )
     
     # Redis Cache
     REDIS_URL: str = Field(
@@ -46,6 +51,20 @@ class Settings(BaseSettings):
     REDIS_DB: int = Field(default=0, env="REDIS_DB")
     REDIS_PASSWORD: Optional[str] = Field(default=None, env="REDIS_PASSWORD")
     
+    # Cache de lectura
+    CACHE_ENABLED: bool = Field(default=True, env="CACHE_ENABLED")
+    CACHE_DEFAULT_TTL: int = Field(default=300, env="CACHE_DEFAULT_TTL")  # segundos
+    CACHE_TTL_EMPRESA: int = Field(default=600, env="CACHE_TTL_EMPRESA")
+    CACHE_TTL_EMPRESA_HISTORIAL: int = Field(default=120, env="CACHE_TTL_EMPRESA_HISTORIAL")
+    CACHE_TTL_EMPRESA_CUMPLIMIENTO: int = Field(default=900, env="CACHE_TTL_EMPRESA_CUMPLIMIENTO")
+    CACHE_TTL_TUC_VERIFICACION: int = Field(default=3600, env="CACHE_TTL_TUC_VERIFICACION")
+    # Cache HTTP (CDN / app móvil) de la verificación pública de TUC
+    TUC_VERIFICACION_MAX_AGE: int = Field(default=60, env="TUC_VERIFICACION_MAX_AGE")
+    TUC_VERIFICACION_STALE_WHILE_REVALIDATE: int = Field(
+        default=300,
+        env="TUC_VERIFICACION_STALE_WHILE_REVALIDATE"
+    )
+    
     # JWT Authentication
     SECRET_KEY: str = Field(
         default="your-secret-key-change-in-production",
@@ -60,6 +79,10 @@ class Settings(BaseSettings):
         default=7,
         env="REFRESH_TOKEN_EXPIRE_DAYS"
     )
+    # Cache de claims JWT validados y de usuarios autenticados
+    AUTH_CACHE_ENABLED: bool = Field(default=True, env="AUTH_CACHE_ENABLED")
+    AUTH_CLAIMS_CACHE_SIZE: int = Field(default=10000, env="AUTH_CLAIMS_CACHE_SIZE")
+    AUTH_USER_CACHE_TTL: int = Field(default=60, env="AUTH_USER_CACHE_TTL")  # segundos
     
     # Archivos y Storage
     UPLOAD_DIR: str = Field(
@@ -74,6 +97,14 @@ class Settings(BaseSettings):
         default=["pdf", "jpg", "jpeg", "png", "doc", "docx"],
         env="ALLOWED_FILE_TYPES"
     )
+    # Importación masiva de planillas (CSV / XLSX)
+    IMPORT_MAX_FILE_SIZE: int = Field(
+        default=100 * 1024 * 1024,  # 100MB
+        env="IMPORT_MAX_FILE_SIZE"
+    )
+    IMPORT_BATCH_SIZE: int = Field(default=1000, env="IMPORT_BATCH_SIZE")
+    # Almacenamiento de documentos: "local" (UPLOAD_DIR) o "s3" (AWS_S3_BUCKET, requiere aioboto3)
+    DOCUMENT_STORAGE: str = Field(default="local", env="DOCUMENT_STORAGE")
     
     # AWS S3 (opcional)
     AWS_ACCESS_KEY_ID: Optional[str] = Field(default=None, env="AWS_ACCESS_KEY_ID")
@@ -87,22 +118,61 @@ class Settings(BaseSettings):
     SMTP_USER: Optional[str] = Field(default=None, env="SMTP_USER")
     SMTP_PASSWORD: Optional[str] = Field(default=None, env="SMTP_PASSWORD")
     SMTP_TLS: bool = Field(default=True, env="SMTP_TLS")
+    SMTP_FROM: str = Field(default="notificaciones@drtcpuno.gob.pe", env="SMTP_FROM")
+    SMTP_POOL_SIZE: int = Field(default=4, env="SMTP_POOL_SIZE")
     
     # Integraciones externas
     RENIEC_API_URL: Optional[str] = Field(default=None, env="RENIEC_API_URL")
     RENIEC_API_KEY: Optional[str] = Field(default=None, env="RENIEC_API_KEY")
     SUNAT_API_URL: Optional[str] = Field(default=None, env="SUNAT_API_URL")
     SUNAT_API_KEY: Optional[str] = Field(default=None, env="SUNAT_API_KEY")
+    INTEROP_TIMEOUT: float = Field(default=10.0, env="INTEROP_TIMEOUT")
+    INTEROP_MAX_CONCURRENCY: int = Field(
+        default=5,  # consultas simultáneas por proveedor
+        env="INTEROP_MAX_CONCURRENCY"
+    )
+    INTEROP_BREAKER_THRESHOLD: int = Field(default=5, env="INTEROP_BREAKER_THRESHOLD")
+    INTEROP_BREAKER_RESET: float = Field(
+        default=30.0,  # segundos con el circuito abierto antes de reintentar
+        env="INTEROP_BREAKER_RESET"
+    )
+    INTEROP_CACHE_TTL_RUC: int = Field(default=604800, env="INTEROP_CACHE_TTL_RUC")  # 7 días
+    INTEROP_CACHE_TTL_DNI: int = Field(default=2592000, env="INTEROP_CACHE_TTL_DNI")  # 30 días
+    INTEROP_CACHE_TTL_NO_ENCONTRADO: int = Field(default=3600, env="INTEROP_CACHE_TTL_NO_ENCONTRADO")  # 1 hora
+    # Validar el RUC contra SUNAT al registrar una empresa (si SUNAT está configurado)
+    INTEROP_VALIDAR_RUC_AL_CREAR: bool = Field(default=True, env="INTEROP_VALIDAR_RUC_AL_CREAR")
     
     # Configuración específica del sistema
     REGION: str = Field(default="PUNO", env="REGION")
     ENTIDAD: str = Field(default="DRTC_PUNO", env="ENTIDAD")
     
+    # Generación de TUC en PDF
+    TUC_RENDER_WORKERS: int = Field(
+        default=2,  # procesos del pool de renderizado
+        env="TUC_RENDER_WORKERS"
+    )
+    TUC_QR_BASE_URL: str = Field(
+        default="https://transportes.drtcpuno.gob.pe/api/v1/tucs/verificar",
+        env="TUC_QR_BASE_URL"
+    )
+    TUC_FONT_PATH: Optional[str] = Field(default=None, env="TUC_FONT_PATH")
+    TUC_FONT_BOLD_PATH: Optional[str] = Field(default=None, env="TUC_FONT_BOLD_PATH")
+    TUC_LOGO_PATH: Optional[str] = Field(default=None, env="TUC_LOGO_PATH")
+    
     # Configuración de reportes
     REPORTS_DIR: str = Field(
         default="./reports",
         env="REPORTS_DIR"
     )
+    REPORT_MAX_WORKERS: int = Field(default=2, env="REPORT_MAX_WORKERS")
+    REPORT_CACHE_TTL: int = Field(
+        default=3600,  # segundos que se reutiliza un resultado idéntico
+        env="REPORT_CACHE_TTL"
+    )
+    REPORT_JOB_STALE_TIMEOUT: int = Field(
+        default=300,  # segundos sin latido tras los que un trabajo se considera abandonado
+        env="REPORT_JOB_STALE_TIMEOUT"
+    )
     
     # Configuración de notificaciones
     NOTIFICATION_VENCIMIENTO_ANTICIPADO: int = Field(
@@ -113,10 +183,65 @@ class Settings(BaseSettings):
         default=3,
         env="NOTIFICATION_MAX_RETRY"
     )
+    NOTIFICATION_RETRY_BASE_DELAY: int = Field(
+        default=300,  # segundos; se duplica en cada reintento
+        env="NOTIFICATION_RETRY_BASE_DELAY"
+    )
+    NOTIFICATION_RETRY_MAX_DELAY: int = Field(default=21600, env="NOTIFICATION_RETRY_MAX_DELAY")
+    NOTIFICATION_DISPATCH_ENABLED: bool = Field(default=True, env="NOTIFICATION_DISPATCH_ENABLED")
+    NOTIFICATION_DISPATCH_INTERVAL: float = Field(
+        default=10.0,  # segundos entre lotes cuando la cola está vacía
+        env="NOTIFICATION_DISPATCH_INTERVAL"
+    )
+    NOTIFICATION_BATCH_SIZE: int = Field(default=100, env="NOTIFICATION_BATCH_SIZE")
+    EXPIRY_SCAN_ENABLED: bool = Field(default=True, env="EXPIRY_SCAN_ENABLED")
+    EXPIRY_SCAN_INTERVAL: int = Field(
+        default=3600,  # segundos entre ejecuciones del escáner de vencimientos
+        env="EXPIRY_SCAN_INTERVAL"
+    )
+    
+    # Sincronización delta: solo se entregan cambios con actualizadoEn anterior a
+    # ahora - SYNC_WATERMARK_LAG, para no adelantar el cursor sobre escrituras en curso
+    SYNC_WATERMARK_LAG: float = Field(default=5.0, env="SYNC_WATERMARK_LAG")  # segundos
+    
+    # Bus de invalidación (change streams o polling sobre actualizadoEn)
+    CHANGE_FEED_ENABLED: bool = Field(default=True, env="CHANGE_FEED_ENABLED")
+    CHANGE_FEED_MODE: str = Field(
+        default="auto",
+        env="CHANGE_FEED_MODE",
+        regex="^(auto|change_stream|polling)$"
+    )
+    CHANGE_FEED_POLL_INTERVAL: float = Field(default=2.0, env="CHANGE_FEED_POLL_INTERVAL")  # segundos
+    DASHBOARD_REBUILD_DELAY: float = Field(
+        default=10.0,  # segundos que se agrupan cambios antes de recalcular el dashboard
+        env="DASHBOARD_REBUILD_DELAY"
+    )
     
     # Configuración de logging
     LOG_LEVEL: str = Field(default="INFO", env="LOG_LEVEL")
     LOG_FILE: Optional[str] = Field(default=None, env="LOG_FILE")
+    # Fracción de requests exitosas que se registran en el log (errores y lentas siempre)
+    REQUEST_LOG_SAMPLE_RATE: float = Field(default=0.01, env="REQUEST_LOG_SAMPLE_RATE")
+    REQUEST_LOG_SLOW_MS: int = Field(default=1000, env="REQUEST_LOG_SLOW_MS")
+    
+    # Auditoría persistida en la colección `auditoria`
+    AUDIT_DB_ENABLED: bool = Field(default=True, env="AUDIT_DB_ENABLED")
+    AUDIT_BATCH_SIZE: int = Field(default=200, env="AUDIT_BATCH_SIZE")
+    AUDIT_FLUSH_INTERVAL: float = Field(default=2.0, env="AUDIT_FLUSH_INTERVAL")  # segundos
+    AUDIT_QUEUE_MAX: int = Field(default=10000, env="AUDIT_QUEUE_MAX")
+    AUDIT_SPOOL_DIR: Optional[str] = Field(default="./logs/audit_spool", env="AUDIT_SPOOL_DIR")
+    
+    # Archivado mensual de auditoría e historial (colecciones por mes o JSONL comprimido)
+    ARCHIVE_ENABLED: bool = Field(default=True, env="ARCHIVE_ENABLED")
+    ARCHIVE_INTERVAL: int = Field(
+        default=86400,  # segundos entre ejecuciones del archivado
+        env="ARCHIVE_INTERVAL"
+    )
+    ARCHIVE_MODE: str = Field(default="collection", env="ARCHIVE_MODE", regex="^(collection|jsonl)$")
+    ARCHIVE_DIR: str = Field(default="./archive", env="ARCHIVE_DIR")
+    ARCHIVE_AUDITORIA_DAYS: int = Field(default=180, env="ARCHIVE_AUDITORIA_DAYS")
+    ARCHIVE_HISTORIAL_DAYS: int = Field(default=365, env="ARCHIVE_HISTORIAL_DAYS")
+    ARCHIVE_BATCH_SIZE: int = Field(default=5000, env="ARCHIVE_BATCH_SIZE")
     
     # Configuración de seguridad
     PASSWORD_MIN_LENGTH: int = Field(default=8, env="PASSWORD_MIN_LENGTH")
@@ -127,7 +252,20 @@ class Settings(BaseSettings):
     
     # Configuración de rate limiting
     RATE_LIMIT_REQUESTS: int = Field(default=100, env="RATE_LIMIT_REQUESTS")
-    RATE_LIMIT_WINDOW: int = Field(default=3600, env="RATE_LIMIT_WINDOW")  # segundos
+    RATE_LIMIT_WINDOW: int = Field(default=60, env="RATE_LIMIT_WINDOW")  # segundos
+    RATE_LIMIT_ENABLED: bool = Field(default=True, env="RATE_LIMIT_ENABLED")
+    # Límites por grupo de rutas: "prefijo=solicitudes/ventana@ip|user", separados por comas.
+    # La verificación pública de TUC se atiende detrás de CDN/NAT (miles de usuarios
+    # por IP de salida): su límite solo corta abusos (5000 solicitudes/s por IP)
+    RATE_LIMIT_GROUPS: str = Field(
+        default="/api/v1/auth=20/60@ip,/api/v1/tucs/verificar=300000/60@ip",
+        env="RATE_LIMIT_GROUPS"
+    )
+    # Usar X-Forwarded-For como IP del cliente (solo detrás de un proxy confiable)
+    RATE_LIMIT_TRUST_FORWARDED: bool = Field(default=False, env="RATE_LIMIT_TRUST_FORWARDED")
+    # Proxies confiables delante de la API: la IP del cliente es la entrada en
+    # esa posición contando desde la derecha de X-Forwarded-For
+    RATE_LIMIT_TRUSTED_PROXIES: int = Field(default=1, env="RATE_LIMIT_TRUSTED_PROXIES")
     
     @validator("ALLOWED_HOSTS", pre=True)
     def parse_allowed_hosts(cls, v):
@@ -8,6 +8,7 @@ from typing import Optional
 import structlog
 
 from app.core.config import settings
+from app.core.indexes import INDEX_SPECS, sync_indexes
 
 logger = structlog.get_logger()
 
@@ -18,7 +19,7 @@ redis_client: Optional[aioredis.Redis] = None
 
 async def init_db():
     """Inicializar conexiones a MongoDB y Redis"""
-    global mongodb_client, mongodb_database, redis_client
+    global mongodb_client, mongodb_database
     
     try:
         # Conectar a MongoDB
@@ -35,27 +36,38 @@ async def init_db():
         
         logger.info("Conexión a MongoDB establecida", database=settings.MONGODB_DB)
         
-        # Conectar a Redis
-        logger.info("Conectando a Redis", url=settings.REDIS_URL)
-        redis_client = aioredis.from_url(
-            settings.REDIS_URL,
-            db=settings.REDIS_DB,
-            password=settings.REDIS_PASSWORD,
-            encoding="utf-8",
-            decode_responses=True
-        )
-        
-        # Verificar conexión Redis
-        await redis_client.ping()
-        logger.info("Conexión a Redis establecida")
+        # Conectar a Redis (opcional: sin Redis el sistema funciona sin cache)
+        await init_redis()
         
-        # Crear índices necesarios
-        await create_indexes()
+        # Crear índices necesarios (o delegarlo al comando scripts.indexes)
+        if settings.MONGODB_CREATE_INDEXES_ON_STARTUP:
+            await create_indexes()
         
     except Exception as e:
         logger.error("Error al conectar a las bases de datos", error=str(e))
         raise
 
+async def init_redis():
+    """Inicializar Redis; si no está disponible se continúa sin cache"""
+    global redis_client
+    
+    logger.info("Conectando a Redis", url=settings.REDIS_URL)
+    client = aioredis.from_url(
+        settings.REDIS_URL,
+        db=settings.REDIS_DB,
+        password=settings.REDIS_PASSWORD,
+        encoding="utf-8",
+        decode_responses=True
+    )
+    
+    try:
+        await client.ping()
+        redis_client = client
+        logger.info("Conexión a Redis establecida")
+    except Exception as e:
+        redis_client = None
+        logger.warning("Redis no disponible, el sistema funcionará sin cache", error=str(e))
+
 async def close_db():
     """Cerrar conexiones a las bases de datos"""
     global mongodb_client, redis_client
@@ -73,71 +85,9 @@ async def close_db():
         logger.error("Error al cerrar conexiones", error=str(e))
 
 async def create_indexes():
-    """Crear índices necesarios en MongoDB"""
+    """Crear índices necesarios en MongoDB según INDEX_SPECS"""
     try:
-        # Índices para empresas
-        await mongodb_database.empresas.create_index("ruc", unique=True)
-        await mongodb_database.empresas.create_index("estado")
-        await mongodb_database.empresas.create_index("tipoEmpresa")
-        await mongodb_database.empresas.create_index("fechaRegistro")
-        await mongodb_database.empresas.create_index("fechaVencimiento")
-        
-        # Índices para vehículos
-        await mongodb_database.vehiculos.create_index("placa", unique=True)
-        await mongodb_database.vehiculos.create_index("empresaId")
-        await mongodb_database.vehiculos.create_index("estado")
-        await mongodb_database.vehiculos.create_index("tipoVehiculo")
-        await mongodb_database.vehiculos.create_index("fechaVencimiento")
-        
-        # Índices para conductores
-        await mongodb_database.conductores.create_index("dni", unique=True)
-        await mongodb_database.conductores.create_index("estado")
-        await mongodb_database.conductores.create_index("fechaVencimientoLicencia")
-        
-        # Índices para rutas
-        await mongodb_database.rutas.create_index("codigo", unique=True)
-        await mongodb_database.rutas.create_index("empresaId")
-        await mongodb_database.rutas.create_index("estado")
-        await mongodb_database.rutas.create_index("tipoRuta")
-        
-        # Índices para expedientes
-        await mongodb_database.expedientes.create_index("numero", unique=True)
-        await mongodb_database.expedientes.create_index("tipo")
-        await mongodb_database.expedientes.create_index("estado")
-        await mongodb_database.expedientes.create_index("fechaApertura")
-        
-        # Índices para resoluciones
-        await mongodb_database.resoluciones.create_index("numero")
-        await mongodb_database.resoluciones.create_index("tipo")
-        await mongodb_database.resoluciones.create_index("estado")
-        await mongodb_database.resoluciones.create_index("fechaEmision")
-        
-        # Índices para TUC
-        await mongodb_database.tucs.create_index("numero", unique=True)
-        await mongodb_database.tucs.create_index("vehiculoId")
-        await mongodb_database.tucs.create_index("empresaId")
-        await mongodb_database.tucs.create_index("estado")
-        await mongodb_database.tucs.create_index("fechaVencimiento")
-        
-        # Índices para notificaciones
-        await mongodb_database.notificaciones.create_index("destinatario.id")
-        await mongodb_database.notificaciones.create_index("tipo")
-        await mongodb_database.notificaciones.create_index("estado")
-        await mongodb_database.notificaciones.create_index("fechaEnvio")
-        
-        # Índices para usuarios
-        await mongodb_database.usuarios.create_index("email", unique=True)
-        await mongodb_database.usuarios.create_index("username", unique=True)
-        await mongodb_database.usuarios.create_index("estado")
-        await mongodb_database.usuarios.create_index("rol")
-        
-        # Índices para auditoría
-        await mongodb_database.auditoria.create_index("entidad")
-        await mongodb_database.auditoria.create_index("entidadId")
-        await mongodb_database.auditoria.create_index("usuarioId")
-        await mongodb_database.auditoria.create_index("fecha")
-        
-        logger.info("Índices de MongoDB creados exitosamente")
+        await sync_indexes(mongodb_database, INDEX_SPECS)
         
     except Exception as e:
         logger.error("Error al crear índices", error=str(e))
@@ -0,0 +1,173 @@
+"""
+Respuesta de archivo con soporte de Range y envío zero-copy
+"""
+
+import os
+import re
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+import aiofiles
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+# Descargas de archivos servidas con RangeFileResponse o FileResponse
+DOWNLOAD_PATH_PATTERN = re.compile(r"/descargar/?$")
+
+# Tamaño de lectura cuando el servidor no soporta zero-copy
+CHUNK_SIZE = 64 * 1024
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Interpretar un header Range de un solo intervalo.
+
+    Devuelve (inicio, fin) inclusivos, None si no hay Range utilizable (se
+    responde el archivo completo) o lanza ValueError si el rango no es satisfacible.
+    """
+    if not header:
+        return None
+    match = RANGE_PATTERN.match(header.strip())
+    if not match:
+        # Rangos múltiples o unidades distintas: se ignoran
+        return None
+
+    start_text, end_text = match.groups()
+    if not start_text and not end_text:
+        return None
+    if not start_text:
+        length = int(end_text)
+        if length == 0:
+            raise ValueError("Rango no satisfacible")
+        start, end = max(size - length, 0), size - 1
+    else:
+        start = int(start_text)
+        end = min(int(end_text), size - 1) if end_text else size - 1
+
+    if start >= size or start > end:
+        raise ValueError("Rango no satisfacible")
+    return start, end
+
+def content_disposition(filename: str, inline: bool = False) -> str:
+    kind = "inline" if inline else "attachment"
+    ascii_name = filename.encode("ascii", "ignore").decode() or "archivo"
+    return f"{kind}; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(filename)}"
+
+class RangeFileResponse(Response):
+    """
+    Envía un archivo local completo (200) o parcial (206 según Range).
+
+    Si el servidor ASGI ofrece la extensión `http.response.zerocopysend`, el
+    contenido se envía con sendfile desde el descriptor; si no, se lee en
+    fragmentos con aiofiles sin cargar el archivo en memoria.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        range_header: Optional[str] = None,
+        media_type: Optional[str] = None,
+        filename: Optional[str] = None,
+        etag: Optional[str] = None,
+        inline: bool = False
+    ):
+        self.path = path
+        size = os.path.getsize(path)
+        headers = {"Accept-Ranges": "bytes"}
+        if etag:
+            headers["ETag"] = etag
+        if filename:
+            headers["Content-Disposition"] = content_disposition(filename, inline)
+
+        try:
+            requested = parse_range(range_header, size)
+        except ValueError:
+            requested = None
+            self.offset, self.count = 0, 0
+            status_code = 416
+            headers["Content-Range"] = f"bytes */{size}"
+        else:
+            if requested:
+                start, end = requested
+                status_code = 206
+                headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            else:
+                start, end = 0, size - 1
+                status_code = 200
+            self.offset, self.count = start, end - start + 1
+
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.headers["content-length"] = str(self.count)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if scope.get("method") == "HEAD" or self.count == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if ZEROCOPY_EXTENSION in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file.fileno(),
+                    "offset": self.offset,
+                    "count": self.count,
+                })
+            return
+
+        remaining = self.count
+        async with aiofiles.open(self.path, "rb") as file:
+            await file.seek(self.offset)
+            while remaining > 0:
+                chunk = await file.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": remaining > 0,
+                })
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b""})
+
+class DownloadAwareGZipMiddleware:
+    """
+    GZip para las respuestas de la API, salvo las descargas de archivos.
+
+    GZipResponder comprime también las respuestas 206, con lo que los offsets de
+    Content-Range dejan de coincidir con los bytes enviados, y descarta los
+    mensajes `http.response.zerocopysend`. Las rutas de descarga y las
+    solicitudes con Range pasan sin comprimir; al resto se les oculta la
+    extensión zero-copy, que el compresor no puede reenviar.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 500):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        has_range = any(name == b"range" for name, _ in scope.get("headers", []))
+        if has_range or DOWNLOAD_PATH_PATTERN.search(scope.get("path", "")):
+            await self.app(scope, receive, send)
+            return
+
+        extensions = scope.get("extensions") or {}
+        if ZEROCOPY_EXTENSION in extensions:
+            scope = {
+                **scope,
+                "extensions": {key: value for key, value in extensions.items() if key != ZEROCOPY_EXTENSION},
+            }
+        await self.gzip(scope, receive, send)
@@ -0,0 +1,300 @@
+"""
+Especificación declarativa de índices de MongoDB y reporte de planes de consulta
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+import structlog
+
+logger = structlog.get_logger()
+
+# Solo registros activos: coincide con la regla de borrado lógico (estaActivo)
+ACTIVOS = {"estaActivo": True}
+
+def _activos(keys: List[Tuple[str, int]], **kwargs) -> IndexModel:
+    """Índice parcial restringido a documentos con estaActivo: true"""
+    name = "_".join(f"{field}_{direction}" for field, direction in keys) + "_activos"
+    return IndexModel(keys, name=name, partialFilterExpression=ACTIVOS, **kwargs)
+
+# Orden por defecto de los listados (fecha de registro más reciente primero)
+RECIENTES = [("fechaRegistro", DESCENDING), ("_id", DESCENDING)]
+
+# Marca de agua de sincronización delta (incluye registros inactivos como lápidas)
+SYNC_WATERMARK = IndexModel([("actualizadoEn", ASCENDING), ("_id", ASCENDING)])
+
+# Los índices compuestos siguen el orden igualdad → orden → rango (ESR).
+# Un índice parcial solo se usa si la consulta incluye estaActivo: true; los
+# servicios que filtran por empresaId o estado sin esa condición (conteos,
+# validaciones, reportes) conservan índices simples sobre esos campos.
+INDEX_SPECS: Dict[str, List[IndexModel]] = {
+    "empresas": [
+        IndexModel([("ruc", ASCENDING)], unique=True),
+        IndexModel([("estado", ASCENDING)]),
+        IndexModel([("tipoEmpresa", ASCENDING)]),
+        _activos(RECIENTES),
+        _activos([("estado", ASCENDING)] + RECIENTES),
+        _activos([("tipoEmpresa", ASCENDING), ("estado", ASCENDING)] + RECIENTES),
+        _activos([("categoria", ASCENDING), ("estado", ASCENDING)] + RECIENTES),
+        _activos(
+            [("direccion.departamento", ASCENDING), ("direccion.provincia", ASCENDING),
+             ("estado", ASCENDING)] + RECIENTES
+        ),
+        _activos([("razonSocial.principal", ASCENDING), ("_id", ASCENDING)]),
+        _activos([("busqueda.terminos", ASCENDING)]),
+        _activos([("representanteLegal.dni", ASCENDING)]),
+        IndexModel([("fechaVencimiento", ASCENDING)]),
+        SYNC_WATERMARK,
+    ],
+    "vehiculos": [
+        IndexModel([("placa", ASCENDING)], unique=True),
+        IndexModel([("empresaId", ASCENDING)]),
+        IndexModel([("estado", ASCENDING)]),
+        _activos([("empresaId", ASCENDING), ("estado", ASCENDING), ("placa", ASCENDING)]),
+        _activos([("estado", ASCENDING), ("tipoVehiculo", ASCENDING)]),
+        IndexModel([("fechaVencimiento", ASCENDING)]),
+        SYNC_WATERMARK,
+    ],
+    "conductores": [
+        IndexModel([("dni", ASCENDING)], unique=True),
+        IndexModel([("estado", ASCENDING)]),
+        _activos([("estado", ASCENDING), ("apellidos", ASCENDING)]),
+        _activos([("empresasAsociadasIds", ASCENDING), ("fechaVencimientoLicencia", ASCENDING)]),
+        IndexModel([("fechaVencimientoLicencia", ASCENDING)]),
+        SYNC_WATERMARK,
+    ],
+    "rutas": [
+        IndexModel([("codigo", ASCENDING)], unique=True),
+        _activos([("empresaId", ASCENDING), ("estado", ASCENDING)]),
+        _activos([("tipoRuta", ASCENDING), ("estado", ASCENDING)]),
+        SYNC_WATERMARK,
+    ],
+    "expedientes": [
+        IndexModel([("numero", ASCENDING)], unique=True),
+        _activos([("estado", ASCENDING), ("fechaApertura", DESCENDING)]),
+        _activos([("tipo", ASCENDING), ("estado", ASCENDING), ("fechaApertura", DESCENDING)]),
+    ],
+    "resoluciones": [
+        IndexModel([("numero", ASCENDING)]),
+        _activos([("empresaId", ASCENDING), ("fechaEmision", DESCENDING)]),
+        _activos([("empresaId", ASCENDING), ("fechaVigenciaFin", ASCENDING)]),
+        _activos([("tipo", ASCENDING), ("estado", ASCENDING), ("fechaEmision", DESCENDING)]),
+        SYNC_WATERMARK,
+    ],
+    "tucs": [
+        IndexModel([("numero", ASCENDING)], unique=True),
+        IndexModel([("vehiculoId", ASCENDING)]),
+        IndexModel([("empresaId", ASCENDING)]),
+        IndexModel([("estado", ASCENDING)]),
+        _activos([("empresaId", ASCENDING), ("estado", ASCENDING), ("fechaVencimiento", ASCENDING)]),
+        _activos([("estado", ASCENDING), ("fechaVencimiento", ASCENDING)]),
+        SYNC_WATERMARK,
+    ],
+    "infracciones": [
+        IndexModel([("codigo", ASCENDING)], unique=True),
+        SYNC_WATERMARK,
+    ],
+    "fiscalizaciones": [
+        IndexModel([("idempotencyKey", ASCENDING)], unique=True),
+        IndexModel([("vehiculoInspeccionado.placa", ASCENDING), ("fechaHora", DESCENDING)]),
+        IndexModel([("inspector.id", ASCENDING), ("fechaHora", DESCENDING)]),
+    ],
+    "empresas_cumplimiento": [
+        IndexModel([("calculadoEn", ASCENDING)]),
+        IndexModel([("cumple", ASCENDING)]),
+    ],
+    "documentos": [
+        _activos([("entidadAsociadaId", ASCENDING), ("fechaSubida", DESCENDING)]),
+        IndexModel([("hash", ASCENDING)]),
+    ],
+    "tucs_lotes": [
+        IndexModel([("empresaId", ASCENDING), ("creadoEn", DESCENDING)]),
+    ],
+    "importaciones": [
+        IndexModel([("solicitadoPorId", ASCENDING), ("creadoEn", DESCENDING)]),
+    ],
+    "importaciones_errores": [
+        IndexModel([("importacionId", ASCENDING), ("fila", ASCENDING)], unique=True),
+    ],
+    # Historial paginado por (entidad, fechaCambio, _id) descendente
+    "empresas_historial": [
+        IndexModel([("empresaId", ASCENDING), ("fechaCambio", DESCENDING), ("_id", DESCENDING)]),
+    ],
+    "vehiculos_historial": [
+        IndexModel([("vehiculoId", ASCENDING), ("fechaCambio", DESCENDING), ("_id", DESCENDING)]),
+    ],
+    "conductores_historial": [
+        IndexModel([("conductorId", ASCENDING), ("fechaCambio", DESCENDING), ("_id", DESCENDING)]),
+    ],
+    "expedientes_historial": [
+        IndexModel([("expedienteId", ASCENDING), ("fechaCambio", DESCENDING), ("_id", DESCENDING)]),
+    ],
+    "reportes_jobs": [
+        # Un solo trabajo vigente (en curso o con resultado no expirado) por hash
+        IndexModel([("hash", ASCENDING)], name="hash_1_vigente", unique=True,
+                   partialFilterExpression={"vigente": True}),
+        # Los registros de trabajos se eliminan un día después de expirar su resultado
+        IndexModel([("expiraEn", ASCENDING)], expireAfterSeconds=86400),
+    ],
+    "notificaciones": [
+        IndexModel([("destinatario.id", ASCENDING), ("fechaEnvio", DESCENDING)]),
+        IndexModel([("estado", ASCENDING), ("tipo", ASCENDING), ("fechaEnvio", ASCENDING)]),
+        IndexModel([("claveDeduplicacion", ASCENDING)], unique=True, sparse=True),
+        IndexModel([("estado", ASCENDING), ("proximoIntento", ASCENDING)]),
+    ],
+    "usuarios": [
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("username", ASCENDING)], unique=True),
+        IndexModel([("rol", ASCENDING), ("estado", ASCENDING)]),
+        SYNC_WATERMARK,
+    ],
+    "auditoria": [
+        IndexModel([("entidad", ASCENDING), ("entidadId", ASCENDING), ("fecha", DESCENDING)]),
+        IndexModel([("usuarioId", ASCENDING), ("fecha", DESCENDING)]),
+        IndexModel([("fecha", DESCENDING)]),
+    ],
+    "archivo_particiones": [
+        IndexModel([("coleccion", ASCENDING), ("mes", DESCENDING)]),
+    ],
+    # Offsets de los miembros gzip de cada entidad en las particiones JSONL
+    "archivo_indice": [
+        IndexModel([("particion", ASCENDING), ("valor", ASCENDING)], unique=True),
+    ],
+}
+
+# Opciones que deben coincidir para considerar que un índice existente cumple la especificación
+_COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+def _matches(existing: Dict[str, Any], spec: Dict[str, Any]) -> bool:
+    """Indicar si un índice existente (index_information) equivale a la especificación"""
+    if [tuple(k) for k in existing.get("key", [])] != list(spec["key"].items()):
+        return False
+    return all(existing.get(option) == spec.get(option) for option in _COMPARED_OPTIONS)
+
+async def _sync_collection(database, collection_name: str, models: List[IndexModel]) -> List[str]:
+    """Crear en una sola llamada los índices faltantes de una colección"""
+    collection = database[collection_name]
+    existing = await collection.index_information()
+
+    missing = []
+    for model in models:
+        spec = model.document
+        current = existing.get(spec["name"])
+        if current is None:
+            missing.append(model)
+        elif not _matches(current, spec):
+            logger.warning(
+                "Índice existente con opciones distintas a la especificación",
+                collection=collection_name,
+                index=spec["name"],
+            )
+
+    if not missing:
+        return []
+    return await collection.create_indexes(missing)
+
+async def sync_indexes(database, specs: Dict[str, List[IndexModel]] = INDEX_SPECS) -> Dict[str, List[str]]:
+    """
+    Sincronizar índices de todas las colecciones en paralelo.
+
+    Es idempotente: las colecciones cuyos índices ya coinciden con la
+    especificación no envían ningún createIndexes.
+    """
+    names = list(specs)
+    results = await asyncio.gather(
+        *(_sync_collection(database, name, specs[name]) for name in names)
+    )
+    created = {name: result for name, result in zip(names, results) if result}
+    logger.info("Índices de MongoDB sincronizados", creados=created)
+    return created
+
+# Claves de índice examinadas por documento devuelto antes de considerar
+# que una consulta no está acotada por su límite
+KEYS_PER_RESULT = 3
+
+# Formas de consulta representativas de los listados, usadas para el reporte de planes.
+# Cada entrada: (colección, filtro, orden)
+QUERY_SHAPES: List[Tuple[str, Dict[str, Any], List[Tuple[str, int]]]] = [
+    ("empresas", dict(ACTIVOS), RECIENTES),
+    ("empresas", {**ACTIVOS, "estado": "HABILITADA"}, RECIENTES),
+    ("empresas", {**ACTIVOS, "tipoEmpresa": "PASAJEROS", "estado": "HABILITADA"}, RECIENTES),
+    ("empresas", {**ACTIVOS, "categoria": "M3", "estado": "HABILITADA"}, RECIENTES),
+    (
+        "empresas",
+        {**ACTIVOS, "direccion.departamento": "PUNO", "direccion.provincia": "PUNO",
+         "estado": "HABILITADA"},
+        RECIENTES,
+    ),
+    ("empresas", dict(ACTIVOS), [("razonSocial.principal", ASCENDING), ("_id", ASCENDING)]),
+    # Búsqueda: término completo y prefijo común; ambos deben ser IXSCAN acotados por el límite
+    ("empresas", {**ACTIVOS, "busqueda.terminos": {"$all": ["transportes"]}}, []),
+    ("empresas", {**ACTIVOS, "busqueda.terminos": {"$regex": "^trans"}}, []),
+    ("empresas", {**ACTIVOS, "representanteLegal.dni": "40123456"}, []),
+    ("vehiculos", {**ACTIVOS, "empresaId": "000000000000000000000000", "estado": "ACTIVO"},
+     [("placa", ASCENDING)]),
+    ("vehiculos", {"empresaId": "000000000000000000000000"}, []),
+    ("tucs", {**ACTIVOS, "empresaId": "000000000000000000000000", "estado": "VIGENTE"}, []),
+    ("tucs", {"empresaId": "000000000000000000000000", "estado": "VIGENTE"}, []),
+    ("conductores", {"estado": "HABILITADO"}, []),
+    ("empresas", {"tipoEmpresa": "PASAJEROS", "estado": "HABILITADA"}, []),
+    ("expedientes", {**ACTIVOS, "estado": "EN_EVALUACION"}, [("fechaApertura", DESCENDING)]),
+]
+
+def _walk_plan(stage: Optional[Dict[str, Any]], indexes: List[str], stages: List[str]):
+    """Recorrer un plan de ejecución acumulando índices y etapas"""
+    if not stage:
+        return
+    stages.append(stage.get("stage", ""))
+    if stage.get("indexName"):
+        indexes.append(stage["indexName"])
+    _walk_plan(stage.get("inputStage"), indexes, stages)
+    for child in stage.get("inputStages", []):
+        _walk_plan(child, indexes, stages)
+
+def summarize_explain(explain: Dict[str, Any]) -> Dict[str, Any]:
+    """Resumir la salida de explain(): índice usado y si hubo ordenamiento en memoria"""
+    planner = explain.get("queryPlanner", {})
+    winning = planner.get("winningPlan", {})
+    # En motores SBE el plan clásico viene anidado en queryPlan
+    winning = winning.get("queryPlan", winning)
+
+    indexes: List[str] = []
+    stages: List[str] = []
+    _walk_plan(winning, indexes, stages)
+
+    stats = explain.get("executionStats", {})
+    return {
+        "indexes": indexes,
+        "collection_scan": "COLLSCAN" in stages,
+        "in_memory_sort": "SORT" in stages,
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "returned": stats.get("nReturned"),
+    }
+
+async def report_query_plans(database, limit: int = 20) -> List[Dict[str, Any]]:
+    """Ejecutar explain() sobre las consultas representativas y reportar el plan elegido"""
+    report = []
+    for collection_name, query, sort in QUERY_SHAPES:
+        cursor = database[collection_name].find(query).limit(limit)
+        if sort:
+            cursor = cursor.sort(sort)
+        summary = summarize_explain(await cursor.explain())
+        # Sin etapas bloqueantes el recorrido se detiene al alcanzar el límite;
+        # el margen cubre claves repetidas de índices multikey
+        summary["keys_bounded"] = (summary["keys_examined"] or 0) <= limit * KEYS_PER_RESULT
+        report.append({
+            "collection": collection_name,
+            "filter": sorted(query.keys()),
+            "sort": [field for field, _ in sort],
+            **summary,
+        })
+        if summary["in_memory_sort"] or summary["collection_scan"] or not summary["keys_bounded"]:
+            logger.warning(
+                "Consulta sin índice adecuado",
+                collection=collection_name,
+                filter=sorted(query.keys()),
+                sort=[field for field, _ in sort],
+            )
+    return report
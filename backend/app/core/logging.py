@@ -4,13 +4,16 @@ Configuración de logging estructurado
 
 import sys
 import logging
+from datetime import datetime
 from typing import Any, Dict
+from fastapi.encoders import jsonable_encoder
 import structlog
 from structlog.stdlib import LoggerFactory
 from structlog.processors import JSONRenderer, TimeStamper, add_log_level
 from structlog.types import Processor
 
 from app.core.config import settings
+from app.core.audit import audit_writer
 
 def setup_logging():
     """Configurar logging estructurado"""
@@ -79,6 +82,9 @@ class AuditLogger:
         success: bool = True
     ):
         """Registrar acción de auditoría"""
+        # Los detalles pueden traer date/Enum (p. ej. .dict() de un esquema): se
+        # normalizan a JSON para que un evento no invalide el lote completo
+        details = jsonable_encoder(details or {})
         self.logger.info(
             "Acción de auditoría",
             action=action,
@@ -89,6 +95,16 @@ class AuditLogger:
             success=success,
             event_type="audit"
         )
+        audit_writer.enqueue({
+            "fecha": datetime.utcnow(),
+            "tipoEvento": "audit",
+            "accion": action,
+            "usuarioId": user_id,
+            "entidad": entity,
+            "entidadId": entity_id,
+            "detalles": details or {},
+            "exito": success
+        })
     
     def log_login(self, user_id: str, success: bool, ip_address: str = None):
         """Registrar intento de login"""
@@ -135,6 +151,7 @@ class SecurityLogger:
         severity: str = "INFO"
     ):
         """Registrar evento de seguridad"""
+        details = jsonable_encoder(details or {})
         self.logger.warning(
             "Evento de seguridad",
             event_type=event_type,
@@ -144,6 +161,17 @@ class SecurityLogger:
             severity=severity,
             event_category="security"
         )
+        audit_writer.enqueue({
+            "fecha": datetime.utcnow(),
+            "tipoEvento": "security",
+            "accion": event_type,
+            "usuarioId": user_id,
+            "entidad": "SEGURIDAD",
+            "entidadId": None,
+            "ipAddress": ip_address,
+            "detalles": details or {},
+            "severidad": severity
+        })
     
     def log_unauthorized_access(
         self,
@@ -0,0 +1,162 @@
+"""
+Métricas de requests HTTP e instrumentación de bajo costo
+"""
+
+import random
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple
+
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+# Límites superiores de los buckets del histograma de latencia (segundos)
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# Plantilla usada cuando la request no coincide con ninguna ruta
+UNMATCHED_ROUTE = "<sin_ruta>"
+
+class Histogram:
+    """Histograma acumulativo con buckets fijos"""
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts: List[int] = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+class RequestMetrics:
+    """Registro en memoria (por proceso) de latencias, códigos de estado y requests en curso"""
+
+    def __init__(self):
+        self.latency: Dict[Tuple[str, str], Histogram] = defaultdict(Histogram)
+        self.status: Dict[Tuple[str, str, int], int] = defaultdict(int)
+        self.in_flight = 0
+
+    def observe(self, method: str, route: str, status_code: int, duration: float):
+        self.latency[(method, route)].observe(duration)
+        self.status[(method, route, status_code)] += 1
+
+    def render(self) -> str:
+        """Exportar las métricas en formato de texto de Prometheus"""
+        lines = [
+            "# HELP http_requests_in_flight Requests HTTP en curso",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP http_requests_total Requests HTTP por ruta y código de estado",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, code), value in sorted(self.status.items()):
+            lines.append(
+                f'http_requests_total{{method="{method}",route="{route}",status="{code}"}} {value}'
+            )
+
+        lines += [
+            "# HELP http_request_duration_seconds Latencia de requests HTTP por ruta",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), hist in sorted(self.latency.items()):
+            labels = f'method="{method}",route="{route}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, hist.counts):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {hist.count}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {hist.total:.6f}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {hist.count}")
+
+        return "\n".join(lines) + "\n"
+
+# Instancia global de métricas
+request_metrics = RequestMetrics()
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI de instrumentación.
+
+    Registra latencia por plantilla de ruta (no por URL), conteo por código de
+    estado y requests en curso. Los logs por request se muestrean según
+    REQUEST_LOG_SAMPLE_RATE; errores y requests lentas se registran siempre.
+    """
+
+    def __init__(self, app, metrics: RequestMetrics = request_metrics):
+        self.app = app
+        self.metrics = metrics
+        self.sample_rate = settings.REQUEST_LOG_SAMPLE_RATE
+        self.slow_seconds = settings.REQUEST_LOG_SLOW_MS / 1000
+        self._random: Callable[[], float] = random.random
+        self._templates: Dict[Callable, str] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            self.metrics.in_flight -= 1
+            route = self._route_template(scope)
+            method = scope["method"]
+            self.metrics.observe(method, route, status_code, duration)
+
+            if (
+                status_code >= 500
+                or duration >= self.slow_seconds
+                or self._random() < self.sample_rate
+            ):
+                client = scope.get("client")
+                log = logger.warning if status_code >= 500 or duration >= self.slow_seconds else logger.info
+                log(
+                    "Request completado",
+                    method=method,
+                    route=route,
+                    path=scope.get("path"),
+                    status_code=status_code,
+                    duration_ms=round(duration * 1000, 2),
+                    client_ip=client[0] if client else None
+                )
+
+    def _route_template(self, scope) -> str:
+        """Plantilla de la ruta resuelta por el router (p. ej. /api/v1/empresas/{empresa_id})"""
+        route = scope.get("route")
+        if route is not None:
+            return getattr(route, "path_format", None) or getattr(route, "path", UNMATCHED_ROUTE)
+
+        endpoint = scope.get("endpoint")
+        app = scope.get("app")
+        if endpoint is None or app is None:
+            return UNMATCHED_ROUTE
+
+        template = self._templates.get(endpoint)
+        if template is None:
+            template = UNMATCHED_ROUTE
+            for candidate in app.router.routes:
+                if getattr(candidate, "endpoint", None) is endpoint:
+                    template = getattr(candidate, "path_format", None) or candidate.path
+                    break
+            self._templates[endpoint] = template
+        return template
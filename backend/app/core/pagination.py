@@ -0,0 +1,112 @@
+"""
+Paginación por cursor (keyset) para colecciones de MongoDB
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+def _encode_value(value: Any) -> Any:
+    """Serializar un valor de ordenamiento preservando su tipo BSON"""
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    if isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    return value
+
+def _decode_value(value: Any) -> Any:
+    """Reconstruir un valor de ordenamiento serializado con _encode_value"""
+    if isinstance(value, dict):
+        if "$date" in value:
+            return datetime.fromisoformat(value["$date"])
+        if "$oid" in value:
+            return ObjectId(value["$oid"])
+    return value
+
+def encode_cursor(sort_field: str, direction: int, doc: Dict[str, Any]) -> str:
+    """Generar un cursor opaco a partir del último documento de la página"""
+    value: Any = doc
+    for part in sort_field.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+
+    payload = {
+        "f": sort_field,
+        "d": direction,
+        "v": _encode_value(value),
+        "id": str(doc["_id"]),
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, sort_field: str, direction: int) -> Tuple[Any, ObjectId]:
+    """Decodificar un cursor y validar que corresponda al ordenamiento solicitado"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        value = _decode_value(payload["v"])
+        last_id = ObjectId(payload["id"])
+    except Exception:
+        raise ValueError("Cursor de paginación inválido")
+
+    if payload.get("f") != sort_field or payload.get("d") != direction:
+        raise ValueError("El cursor no corresponde al ordenamiento solicitado")
+
+    return value, last_id
+
+def keyset_filter(
+    query: Dict[str, Any],
+    sort_field: str,
+    direction: int,
+    cursor: Optional[str]
+) -> Dict[str, Any]:
+    """Combinar el filtro de la consulta con la condición de keyset del cursor"""
+    if not cursor:
+        return query
+
+    value, last_id = decode_cursor(cursor, sort_field, direction)
+    op = "$gt" if direction == ASCENDING else "$lt"
+    if value is None:
+        # Los nulos (o campos ausentes) ordenan antes que cualquier valor y
+        # ninguna comparación de rango los incluye: en orden ascendente siguen
+        # todos los valores no nulos, en descendente solo quedan nulos
+        after = [{sort_field: {"$ne": None}}] if direction == ASCENDING else []
+    else:
+        after = [{sort_field: {op: value}}]
+    condition = {
+        "$or": after + [
+            {sort_field: value, "_id": {op: last_id}},
+        ]
+    }
+    return {"$and": [query, condition]} if query else condition
+
+async def paginate_keyset(
+    collection,
+    query: Dict[str, Any],
+    sort_field: str,
+    direction: int = DESCENDING,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    projection: Optional[Dict[str, Any]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Obtener una página usando keyset pagination.
+
+    Se lee un documento adicional para saber si existe una página siguiente,
+    de modo que el costo de cada página es el mismo sin importar su profundidad.
+    """
+    mongo_query = keyset_filter(query, sort_field, direction, cursor)
+    docs = await collection.find(mongo_query, projection) \
+        .sort([(sort_field, direction), ("_id", direction)]) \
+        .limit(limit + 1) \
+        .to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(sort_field, direction, docs[-1])
+
+    return docs, next_cursor
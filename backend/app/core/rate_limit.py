@@ -0,0 +1,231 @@
+"""
+Limitación de solicitudes (token bucket) en Redis con respaldo local por proceso
+"""
+
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+import structlog
+
+from app.core.config import settings
+from app.core import database
+from app.core.auth import decode_token
+
+logger = structlog.get_logger()
+
+# Un solo script atómico por verificación: recarga el bucket según el tiempo
+# transcurrido, consume un token si hay disponible y renueva la expiración.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local data = redis.call('HMGET', KEYS[1], 't', 'ts')
+local tokens = tonumber(data[1]) or capacity
+local ts = tonumber(data[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 't', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate))
+return {allowed, tostring(tokens)}
+"""
+
+# Rutas que nunca se limitan
+EXEMPT_PATHS = ("/health", "/metrics", "/docs", "/redoc", "/openapi.json")
+
+# Tras un fallo de Redis se usa el limitador local durante este tiempo (segundos)
+REDIS_RETRY_AFTER = 5.0
+
+class RateLimitGroup:
+    """Límite aplicado a las rutas que comienzan con `prefix`"""
+
+    def __init__(self, prefix: str, limit: int, window: int, key_by: str = "user"):
+        self.prefix = prefix
+        self.limit = limit
+        self.window = window
+        self.key_by = key_by
+        # Tokens por milisegundo
+        self.rate = limit / (window * 1000)
+
+def parse_groups(spec: str) -> List[RateLimitGroup]:
+    """
+    Interpretar RATE_LIMIT_GROUPS: "prefijo=límite/ventana@clave" separados por comas,
+    con clave "ip" o "user" (p. ej. "/api/v1/auth=20/60@ip").
+    """
+    groups = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        prefix, rule = item.split("=", 1)
+        rule, _, key_by = rule.partition("@")
+        limit, window = rule.split("/", 1)
+        groups.append(RateLimitGroup(prefix.strip(), int(limit), int(window), key_by.strip() or "user"))
+    return groups
+
+def default_groups() -> List[RateLimitGroup]:
+    """Grupos configurados (más específicos primero) y el límite general de la API"""
+    groups = parse_groups(settings.RATE_LIMIT_GROUPS)
+    groups.append(RateLimitGroup("/api/", settings.RATE_LIMIT_REQUESTS, settings.RATE_LIMIT_WINDOW, "user"))
+    return sorted(groups, key=lambda g: len(g.prefix), reverse=True)
+
+class LocalTokenBucket:
+    """Limitador en memoria del proceso (respaldo cuando Redis no está disponible)"""
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def check(self, key: str, group: RateLimitGroup, now_ms: float) -> Tuple[bool, float]:
+        tokens, ts = self._buckets.pop(key, (group.limit, now_ms))
+        tokens = min(group.limit, tokens + max(0.0, now_ms - ts) * group.rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now_ms)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return allowed, tokens
+
+class RateLimiter:
+    """Verificación de límites con Redis (script atómico) o con el bucket local"""
+
+    def __init__(self, prefix: str = "drtc:rl"):
+        self.prefix = prefix
+        self.local = LocalTokenBucket()
+        self._script = None
+        self._script_client = None
+        self._redis_down_until = 0.0
+        self.rejected = 0
+
+    def _redis_script(self):
+        client = database.redis_client
+        if client is None or time.monotonic() < self._redis_down_until:
+            return None
+        if self._script is None or self._script_client is not client:
+            self._script = client.register_script(TOKEN_BUCKET_LUA)
+            self._script_client = client
+        return self._script
+
+    async def check(self, group: RateLimitGroup, identity: str) -> Tuple[bool, float]:
+        """Consumir un token; devuelve (permitido, tokens restantes)"""
+        key = f"{self.prefix}:{group.prefix}:{identity}"
+        now_ms = time.time() * 1000
+        script = self._redis_script()
+        if script is not None:
+            try:
+                allowed, tokens = await script(keys=[key], args=[group.limit, group.rate, int(now_ms)])
+                return bool(int(allowed)), float(tokens)
+            except Exception as e:
+                self._redis_down_until = time.monotonic() + REDIS_RETRY_AFTER
+                logger.warning("Rate limit sin Redis, usando límite local", error=str(e))
+        return self.local.check(key, group, now_ms)
+
+    def render_metrics(self) -> str:
+        return (
+            "# TYPE rate_limit_rejected_total counter\n"
+            f"rate_limit_rejected_total {self.rejected}\n"
+        )
+
+def _client_ip(scope) -> str:
+    """
+    IP del cliente para los límites por IP.
+
+    Las entradas de X-Forwarded-For a la izquierda las escribe el propio
+    cliente; solo son confiables las que agregaron nuestros proxies. Con N
+    proxies, el cliente es la N-ésima entrada desde la derecha. Si hay menos
+    entradas, el request no pasó por todos los proxies y se usa la conexión.
+    """
+    client = scope.get("client")
+    direct = client[0] if client else "desconocido"
+    if not settings.RATE_LIMIT_TRUST_FORWARDED or settings.RATE_LIMIT_TRUSTED_PROXIES < 1:
+        return direct
+
+    forwarded: List[str] = []
+    for name, value in scope.get("headers", []):
+        if name == b"x-forwarded-for":
+            forwarded.extend(p.strip() for p in value.decode("latin-1").split(",") if p.strip())
+    if len(forwarded) < settings.RATE_LIMIT_TRUSTED_PROXIES:
+        return direct
+    return forwarded[-settings.RATE_LIMIT_TRUSTED_PROXIES]
+
+def _user_identity(scope) -> Optional[str]:
+    """
+    Usuario de un token de acceso válido.
+
+    Se valida la firma (con el mismo cache de claims que get_current_user, así
+    que el request no lo verifica dos veces) para que la identidad sea la misma
+    en todos los workers desde el primer request. Un token inválido o
+    inventado se limita por IP y no permite evadir el límite.
+    """
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            token = value.decode("latin-1")
+            if token.lower().startswith("bearer "):
+                try:
+                    return f"u:{decode_token(token[7:])['sub']}"
+                except HTTPException:
+                    return None
+            return None
+    return None
+
+class RateLimitMiddleware:
+    """
+    Middleware ASGI de limitación por grupo de rutas y por usuario o IP.
+
+    Responde 429 con Retry-After cuando el bucket está vacío.
+    """
+
+    def __init__(self, app, limiter: Optional[RateLimiter] = None, groups: Optional[List[RateLimitGroup]] = None):
+        self.app = app
+        self.limiter = limiter or rate_limiter
+        self.groups = groups if groups is not None else default_groups()
+
+    def _group(self, path: str) -> Optional[RateLimitGroup]:
+        for group in self.groups:
+            if path.startswith(group.prefix):
+                return group
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope.get("path", "")
+        group = None if path.startswith(EXEMPT_PATHS) else self._group(path)
+        if group is None:
+            await self.app(scope, receive, send)
+            return
+
+        identity = (_user_identity(scope) if group.key_by == "user" else None) or f"ip:{_client_ip(scope)}"
+        allowed, tokens = await self.limiter.check(group, identity)
+        if allowed:
+            await self.app(scope, receive, send)
+            return
+
+        self.limiter.rejected += 1
+        retry_after = max(1, math.ceil((1 - tokens) / group.rate / 1000))
+        body = json.dumps({
+            "success": False,
+            "message": "Demasiadas solicitudes, intente nuevamente más tarde",
+        }).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+                (b"x-ratelimit-limit", str(group.limit).encode()),
+                (b"x-ratelimit-remaining", b"0"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+# Instancia global del limitador
+rate_limiter = RateLimiter()
@@ -5,7 +5,7 @@ Backend FastAPI
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 import structlog
 from contextlib import asynccontextmanager
 
@@ -13,6 +13,19 @@ from app.core.config import settings
 from app.core.database import init_db, close_db
 from app.api.v1.api import api_router
 from app.core.logging import setup_logging
+from app.core.audit import audit_writer
+from app.core.cache import cache
+from app.core.file_response import DownloadAwareGZipMiddleware
+from app.core.metrics import MetricsMiddleware, request_metrics
+from app.core.rate_limit import RateLimitMiddleware, rate_limiter
+from app.services.report_jobs import report_engine
+from app.services.expiry_scanner import expiry_scheduler
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.interoperatividad import interoperatividad
+from app.services.tuc_rendering import tuc_renderer
+from app.services.change_feed import change_feed
+from app.services.bulk_import import import_engine
+from app.services.archiver import archiver, archive_scheduler
 
 # Configurar logging
 setup_logging()
@@ -25,11 +38,26 @@ async def lifespan(app: FastAPI):
     logger.info("Iniciando Sistema de Gestión de Transportes - DRTC Puno")
     await init_db()
     logger.info("Base de datos inicializada")
+    await audit_writer.start()
+    await interoperatividad.start()
+    await change_feed.start()
+    expiry_scheduler.start()
+    archive_scheduler.start()
+    notification_dispatcher.start()
     
     yield
     
     # Shutdown
     logger.info("Cerrando aplicación")
+    await change_feed.stop()
+    await expiry_scheduler.stop()
+    await archive_scheduler.stop()
+    await notification_dispatcher.stop()
+    await report_engine.shutdown()
+    await import_engine.shutdown()
+    await tuc_renderer.shutdown()
+    await interoperatividad.close()
+    await audit_writer.stop()
     await close_db()
     logger.info("Aplicación cerrada")
 
@@ -71,6 +99,9 @@ def create_application() -> FastAPI:
         lifespan=lifespan
     )
     
+    # Limitación de solicitudes (queda dentro de CORS para que los 429 lleven sus headers)
+    app.add_middleware(RateLimitMiddleware)
+    
     # Configurar CORS
     app.add_middleware(
         CORSMiddleware,
@@ -80,29 +111,15 @@ def create_application() -> FastAPI:
         allow_headers=["*"],
     )
     
+    # Compresión de respuestas (changesets de sincronización, listados); las descargas
+    # de archivos se envían sin comprimir para conservar Range y zero-copy
+    app.add_middleware(DownloadAwareGZipMiddleware, minimum_size=1024)
+    
     # Incluir rutas de la API
     app.include_router(api_router, prefix="/api/v1")
     
-    # Middleware para logging de requests
-    @app.middleware("http")
-    async def log_requests(request: Request, call_next):
-        logger.info(
-            "Request iniciado",
-            method=request.method,
-            url=str(request.url),
-            client_ip=request.client.host if request.client else None
-        )
-        
-        response = await call_next(request)
-        
-        logger.info(
-            "Request completado",
-            method=request.method,
-            url=str(request.url),
-            status_code=response.status_code
-        )
-        
-        return response
+    # Middleware de métricas y logging muestreado de requests
+    app.add_middleware(MetricsMiddleware)
     
     # Exception handler global
     @app.exception_handler(Exception)
@@ -138,6 +155,34 @@ async def health_check():
         "version": "1.0.0"
     }
 
+# Métricas en formato Prometheus
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Latencias por ruta, códigos de estado y requests en curso"""
+    return (
+        request_metrics.render()
+        + audit_writer.render_metrics()
+        + interoperatividad.log_writer.render_metrics()
+        + rate_limiter.render_metrics()
+    )
+
+# Estadísticas del cache de lectura
+@app.get("/health/cache")
+async def cache_stats():
+    """Contadores de aciertos y fallos del cache Redis"""
+    return cache.stats()
+
+# Estado del bus de invalidación
+@app.get("/health/cambios")
+async def change_feed_status():
+    """Modo del bus de invalidación y eventos procesados por colección"""
+    return change_feed.status()
+
+@app.get("/health/archivo")
+async def archive_status():
+    """Última ejecución del archivado de auditoría e historial"""
+    return archiver.status()
+
 # Ruta raíz
 @app.get("/")
 async def root():
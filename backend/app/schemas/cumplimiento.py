@@ -0,0 +1,11 @@
+"""
+Esquemas para consultas de cumplimiento de empresas
+"""
+
+from typing import List
+from pydantic import BaseModel, Field
+
+class CumplimientoLoteRequest(BaseModel):
+    """Solicitud de snapshots de cumplimiento para varias empresas"""
+
+    empresaIds: List[str] = Field(..., min_items=1, max_items=500)
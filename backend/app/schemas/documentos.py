@@ -0,0 +1,25 @@
+"""
+Esquemas de respuesta para documentos
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+from pydantic import BaseModel
+
+class DocumentoResponse(BaseModel):
+    """Metadatos de un documento almacenado"""
+
+    id: str
+    nombreArchivo: str
+    url: str
+    tipoDocumento: str
+    entidadAsociadaId: Optional[str] = None
+    contentType: str
+    tamano: int
+    hash: str
+    fechaSubida: datetime
+    usuarioSubidaId: Optional[str] = None
+
+    @classmethod
+    def from_document(cls, doc: Dict[str, Any]) -> "DocumentoResponse":
+        return cls(id=str(doc["_id"]), **{k: v for k, v in doc.items() if k != "_id"})
@@ -0,0 +1,57 @@
+"""
+Esquemas para la importación masiva de empresas y vehículos
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field, validator
+
+class VehiculoImportRow(BaseModel):
+    """Fila de vehículo de una planilla; la empresa se identifica por RUC o por id"""
+
+    placa: str = Field(..., min_length=5, max_length=10)
+    rucEmpresa: Optional[str] = Field(default=None, regex=r"^\d{11}$")
+    empresaId: Optional[str] = None
+    rutaId: Optional[str] = None
+    categoria: Optional[str] = None
+    marca: Optional[str] = None
+    modelo: Optional[str] = None
+    anioFabricacion: Optional[int] = Field(default=None, ge=1950, le=2100)
+    estado: str = "ACTIVO"
+    datosTecnicos: Optional[Dict[str, Any]] = None
+
+    @validator("placa")
+    def normalize_placa(cls, v):
+        return v.strip().upper()
+
+    @validator("empresaId", always=True)
+    def require_empresa(cls, v, values):
+        if not v and not values.get("rucEmpresa"):
+            raise ValueError("Se requiere rucEmpresa o empresaId")
+        return v
+
+class ImportacionJob(BaseModel):
+    """Estado de una importación"""
+
+    id: str
+    entidad: str
+    nombreArchivo: str
+    estado: str
+    filasProcesadas: int = 0
+    insertados: int = 0
+    errores: int = 0
+    creadoEn: datetime
+    iniciadoEn: Optional[datetime] = None
+    finalizadoEn: Optional[datetime] = None
+    error: Optional[str] = None
+
+    @classmethod
+    def from_document(cls, doc: Dict[str, Any]) -> "ImportacionJob":
+        return cls(id=str(doc["_id"]), **{k: v for k, v in doc.items() if k != "_id"})
+
+class ImportacionErrorFila(BaseModel):
+    """Errores de validación o escritura de una fila (numerada desde la fila de datos 1)"""
+
+    fila: int
+    errores: List[str]
+    datos: Dict[str, Any] = Field(default_factory=dict)
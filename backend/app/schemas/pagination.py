@@ -0,0 +1,28 @@
+"""
+Esquemas de respuesta para paginación por cursor
+"""
+
+from typing import Generic, List, Optional, TypeVar
+from pydantic import Field
+from pydantic.generics import GenericModel
+
+T = TypeVar("T")
+
+class CursorPaginatedResponse(GenericModel, Generic[T]):
+    """Respuesta paginada por cursor (keyset)"""
+
+    data: List[T] = Field(default_factory=list, description="Elementos de la página")
+    limit: int = Field(..., description="Elementos por página")
+    next_cursor: Optional[str] = Field(
+        default=None,
+        description="Cursor opaco para obtener la página siguiente; null si no hay más"
+    )
+    has_more: bool = Field(default=False, description="Indica si existe una página siguiente")
+    total: Optional[int] = Field(
+        default=None,
+        description="Total de elementos (solo si se solicita con incluir_total)"
+    )
+    total_estimado: bool = Field(
+        default=False,
+        description="Indica si el conteo alcanzó su límite y el total es una cota inferior"
+    )
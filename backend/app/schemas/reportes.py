@@ -0,0 +1,33 @@
+"""
+Esquemas para trabajos de generación de reportes
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+from pydantic import BaseModel, Field
+
+class ReporteRequest(BaseModel):
+    """Solicitud de un reporte estadístico en segundo plano"""
+
+    tipo: str = Field(..., description="Tipo de reporte (ver GET /reportes/tipos)")
+    parametros: Dict[str, Any] = Field(default_factory=dict)
+    formato: str = Field(default="csv", regex="^(csv|json)$")
+
+class ReporteJob(BaseModel):
+    """Estado de un trabajo de reporte"""
+
+    id: str
+    tipo: str
+    parametros: Dict[str, Any]
+    formato: str
+    estado: str
+    creadoEn: datetime
+    iniciadoEn: Optional[datetime] = None
+    finalizadoEn: Optional[datetime] = None
+    expiraEn: datetime
+    filas: Optional[int] = None
+    error: Optional[str] = None
+
+    @classmethod
+    def from_document(cls, doc: Dict[str, Any]) -> "ReporteJob":
+        return cls(id=str(doc["_id"]), **{k: v for k, v in doc.items() if k != "_id"})
@@ -0,0 +1,16 @@
+"""
+Esquemas de respuesta para la búsqueda de empresas
+"""
+
+from typing import Optional
+from pydantic import BaseModel, Field
+
+class EmpresaSearchResult(BaseModel):
+    """Resultado compacto de búsqueda (typeahead)"""
+
+    id: str
+    ruc: str
+    razonSocial: Optional[str] = None
+    estado: Optional[str] = None
+    representanteLegal: Optional[str] = None
+    relevancia: int = Field(default=0, description="Puntaje de relevancia")
@@ -0,0 +1,48 @@
+"""
+Esquemas para la sincronización offline de la app móvil de fiscalización
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+class InspectorRef(BaseModel):
+    id: str
+    nombre: Optional[str] = None
+
+class VehiculoRef(BaseModel):
+    placa: str
+    id: Optional[str] = None
+
+class PapeletaSync(BaseModel):
+    nroPapeleta: str
+    infraccionesIds: List[str] = Field(default_factory=list)
+    observaciones: Optional[str] = None
+    montoTotal: float = 0
+    estado: str = Field(default="EMITIDA", regex="^(EMITIDA|PAGADA|IMPUGNADA)$")
+
+class FiscalizacionSync(BaseModel):
+    """Acta de fiscalización registrada sin conexión"""
+
+    idempotencyKey: str = Field(..., min_length=8, max_length=100)
+    fechaHora: datetime
+    inspector: InspectorRef
+    vehiculoInspeccionado: VehiculoRef
+    resultado: str = Field(..., regex="^(CON_INFRACCION|SIN_INFRACCION)$")
+    papeleta: Optional[PapeletaSync] = None
+    ubicacion: Optional[Dict[str, Any]] = None
+
+class FiscalizacionesLoteRequest(BaseModel):
+    fiscalizaciones: List[FiscalizacionSync] = Field(..., min_items=1, max_items=500)
+
+class ResultadoItemSync(BaseModel):
+    idempotencyKey: str
+    estado: str = Field(..., description="CREADO | DUPLICADO | ERROR")
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+class FiscalizacionesLoteResponse(BaseModel):
+    creados: int
+    duplicados: int
+    errores: int
+    resultados: List[ResultadoItemSync]
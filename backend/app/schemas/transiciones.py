@@ -0,0 +1,25 @@
+"""
+Esquemas para transiciones de estado de empresas en lote
+"""
+
+from typing import Dict, List
+from pydantic import BaseModel, Field
+
+class TransicionLoteRequest(BaseModel):
+    """Empresas afectadas por una misma acción regulatoria"""
+
+    empresaIds: List[str] = Field(..., min_items=1, max_items=500)
+    motivo: str = Field(..., min_length=3, max_length=500)
+
+class TransicionLoteResponse(BaseModel):
+    """Resultado de una transición en lote"""
+
+    loteId: str
+    accion: str
+    estado: str
+    procesadas: List[str]
+    omitidas: List[Dict[str, str]]
+    vehiculosDesvinculados: int = 0
+    rutasDesvinculadas: int = 0
+    tucsDadasDeBaja: int = 0
+    conductoresDesvinculados: int = 0
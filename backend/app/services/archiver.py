@@ -0,0 +1,439 @@
+"""
+Archivado por mes de la auditoría y de las colecciones de historial
+"""
+
+import asyncio
+import gzip
+import os
+import socket
+import zlib
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId, json_util
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pydantic import BaseModel
+import structlog
+
+from app.core.config import settings
+from app.core.database import get_collection
+from app.core.pagination import decode_cursor, keyset_filter
+
+logger = structlog.get_logger()
+
+CATALOG_COLLECTION = "archivo_particiones"
+ENTITY_INDEX_COLLECTION = "archivo_indice"
+CHECKPOINT_COLLECTION = "scheduler_checkpoints"
+LEASE_ID = "archivo:lease"
+
+# El lease se renueva tras cada lote; si un proceso se detiene, otro puede
+# retomar el archivado después de este tiempo
+LEASE_TTL = timedelta(minutes=5)
+
+# Las fechas se leen sin zona horaria, igual que las que devuelve Motor
+JSON_OPTIONS = json_util.JSONOptions(tz_aware=False)
+
+class ArchiveLeaseLost(RuntimeError):
+    """Otro proceso tomó el lease de archivado (el lease propio expiró)"""
+
+class ArchiveTarget(BaseModel):
+    """Colección cuyos documentos antiguos se mueven a particiones mensuales"""
+
+    coleccion: str
+    campo: str
+    dias: int
+    indice: List[Tuple[str, int]]
+
+    @property
+    def referencia(self) -> str:
+        """Campo por el que se consultan los archivos (primer campo del índice)"""
+        return self.indice[0][0]
+
+def _historial(coleccion: str, referencia: str) -> ArchiveTarget:
+    return ArchiveTarget(
+        coleccion=coleccion,
+        campo="fechaCambio",
+        dias=settings.ARCHIVE_HISTORIAL_DAYS,
+        indice=[(referencia, ASCENDING), ("fechaCambio", DESCENDING), ("_id", DESCENDING)],
+    )
+
+ARCHIVE_TARGETS: List[ArchiveTarget] = [
+    ArchiveTarget(
+        coleccion="auditoria",
+        campo="fecha",
+        dias=settings.ARCHIVE_AUDITORIA_DAYS,
+        indice=[("entidad", ASCENDING), ("entidadId", ASCENDING), ("fecha", DESCENDING)],
+    ),
+    _historial("empresas_historial", "empresaId"),
+    _historial("vehiculos_historial", "vehiculoId"),
+    _historial("conductores_historial", "conductorId"),
+    _historial("expedientes_historial", "expedienteId"),
+]
+
+def catalog_collection():
+    return get_collection(CATALOG_COLLECTION)
+
+def archive_collection_name(coleccion: str, mes: str) -> str:
+    return f"{coleccion}_archivo_{mes.replace('-', '_')}"
+
+def archive_file_path(coleccion: str, mes: str) -> str:
+    return os.path.join(settings.ARCHIVE_DIR, coleccion, f"{mes}.jsonl.gz")
+
+def _month(doc: Dict[str, Any], campo: str) -> Tuple[str, datetime]:
+    """Mes de partición según el campo de fecha (o la creación del _id si falta)"""
+    fecha = doc.get(campo)
+    if not isinstance(fecha, datetime):
+        fecha = doc["_id"].generation_time.replace(tzinfo=None)
+    return fecha.strftime("%Y-%m"), fecha
+
+def entity_index_collection():
+    return get_collection(ENTITY_INDEX_COLLECTION)
+
+def _append_jsonl(path: str, docs: List[Dict[str, Any]]) -> int:
+    """
+    Agregar un lote como un miembro gzip independiente al final del archivo.
+
+    Devuelve el offset en bytes donde comienza el miembro, para leerlo luego
+    sin descomprimir el resto del archivo.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "ab") as raw:
+        offset = raw.tell()
+        with gzip.GzipFile(fileobj=raw, mode="wb") as archive:
+            archive.write("".join(json_util.dumps(doc) + "\n" for doc in docs).encode("utf-8"))
+    return offset
+
+def _read_member(raw, offset: int, chunk_size: int = 64 * 1024) -> str:
+    """Descomprimir solo el miembro gzip que comienza en `offset`"""
+    raw.seek(offset)
+    decompressor = zlib.decompressobj(wbits=31)
+    parts = []
+    while not decompressor.eof:
+        chunk = raw.read(chunk_size)
+        if not chunk:
+            break
+        parts.append(decompressor.decompress(chunk))
+    return b"".join(parts).decode("utf-8")
+
+class Archiver:
+    """
+    Mueve documentos más antiguos que ARCHIVE_*_DAYS a particiones mensuales.
+
+    El destino (ARCHIVE_MODE) es una colección por mes (`<colección>_archivo_AAAA_MM`)
+    o un JSONL comprimido por mes en ARCHIVE_DIR. Los documentos se copian y luego
+    se eliminan de la colección principal; si el proceso se interrumpe entre ambos
+    pasos, la siguiente ejecución los vuelve a copiar (las colecciones ignoran
+    duplicados y la lectura de JSONL descarta _id repetidos). Cada partición se
+    registra en `archivo_particiones` con su rango de fechas.
+    """
+
+    def __init__(
+        self,
+        mode: str = settings.ARCHIVE_MODE,
+        batch_size: int = settings.ARCHIVE_BATCH_SIZE
+    ):
+        self.mode = mode
+        self.batch_size = batch_size
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._indexed: set = set()
+        self.last_run: Optional[datetime] = None
+        self.last_result: Dict[str, int] = {}
+
+    async def _acquire_lease(self, ttl: timedelta) -> bool:
+        """Evitar que dos procesos archiven a la vez (API con varios workers y cron)"""
+        now = datetime.utcnow()
+        try:
+            await get_collection(CHECKPOINT_COLLECTION).update_one(
+                {"_id": LEASE_ID, "$or": [{"expiraEn": {"$lt": now}}, {"propietario": self.owner}]},
+                {"$set": {"propietario": self.owner, "expiraEn": now + ttl}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def _release_lease(self):
+        await get_collection(CHECKPOINT_COLLECTION).delete_one({"_id": LEASE_ID, "propietario": self.owner})
+
+    async def _write_collection(self, target: ArchiveTarget, mes: str, docs: List[Dict[str, Any]]) -> str:
+        name = archive_collection_name(target.coleccion, mes)
+        collection = get_collection(name)
+        if name not in self._indexed:
+            # Solo el índice de consulta: los demás índices quedan en la colección principal
+            await collection.create_index(target.indice)
+            self._indexed.add(name)
+        try:
+            await collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            # Documentos ya copiados en una ejecución interrumpida
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+        return name
+
+    async def _renew_lease(self):
+        if not await self._acquire_lease(LEASE_TTL):
+            raise ArchiveLeaseLost("El lease de archivado pasó a otro proceso")
+
+    async def _write_jsonl(self, target: ArchiveTarget, mes: str, docs: List[Dict[str, Any]]) -> str:
+        path = archive_file_path(target.coleccion, mes)
+        offset = await asyncio.to_thread(_append_jsonl, path, docs)
+
+        # Offsets de los miembros que contienen cada entidad: la lectura del
+        # historial de una entidad descomprime solo esos miembros
+        valores = {doc.get(target.referencia) for doc in docs} - {None}
+        if valores:
+            particion = _partition_id(target.coleccion, mes, "jsonl")
+            await entity_index_collection().bulk_write([
+                UpdateOne(
+                    {"particion": particion, "valor": valor},
+                    {"$addToSet": {"offsets": offset}},
+                    upsert=True
+                )
+                for valor in valores
+            ], ordered=False)
+        return path
+
+    async def _register(self, target: ArchiveTarget, mes: str, ubicacion: str, fechas: List[datetime]):
+        await catalog_collection().update_one(
+            {"_id": _partition_id(target.coleccion, mes, self.mode)},
+            {
+                "$setOnInsert": {
+                    "coleccion": target.coleccion,
+                    "mes": mes,
+                    "destino": self.mode,
+                    "ubicacion": ubicacion,
+                    # Las particiones JSONL anteriores al índice por entidad se leen completas
+                    "indiceEntidades": self.mode == "jsonl",
+                },
+                "$inc": {"documentos": len(fechas)},
+                "$min": {"desde": min(fechas)},
+                "$max": {"hasta": max(fechas)},
+                "$set": {"actualizadoEn": datetime.utcnow()},
+            },
+            upsert=True
+        )
+
+    async def archive_target(self, target: ArchiveTarget, now: Optional[datetime] = None) -> int:
+        """
+        Archivar los documentos de una colección anteriores al límite de antigüedad.
+
+        La selección usa el índice de _id (ObjectId.from_datetime del límite), por lo
+        que no requiere un índice adicional sobre el campo de fecha.
+        """
+        limite = ObjectId.from_datetime((now or datetime.utcnow()) - timedelta(days=target.dias))
+        hot = get_collection(target.coleccion)
+        total = 0
+
+        while True:
+            docs = await hot.find({"_id": {"$lt": limite}}) \
+                .sort("_id", ASCENDING) \
+                .limit(self.batch_size) \
+                .to_list(length=None)
+            if not docs:
+                break
+
+            por_mes: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+            fechas: Dict[str, List[datetime]] = defaultdict(list)
+            for doc in docs:
+                mes, fecha = _month(doc, target.campo)
+                por_mes[mes].append(doc)
+                fechas[mes].append(fecha)
+
+            for mes, grupo in por_mes.items():
+                if self.mode == "jsonl":
+                    ubicacion = await self._write_jsonl(target, mes, grupo)
+                else:
+                    ubicacion = await self._write_collection(target, mes, grupo)
+                await self._register(target, mes, ubicacion, fechas[mes])
+
+            await hot.delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+            total += len(docs)
+            await self._renew_lease()
+            if len(docs) < self.batch_size:
+                break
+
+        if total:
+            logger.info("Documentos archivados", coleccion=target.coleccion, documentos=total, destino=self.mode)
+        return total
+
+    async def run(self) -> Dict[str, int]:
+        """Archivar todas las colecciones configuradas"""
+        if not await self._acquire_lease(LEASE_TTL):
+            logger.info("Archivado en curso en otro proceso")
+            return {}
+
+        results = {}
+        try:
+            for target in ARCHIVE_TARGETS:
+                try:
+                    results[target.coleccion] = await self.archive_target(target)
+                except ArchiveLeaseLost:
+                    logger.warning("Lease de archivado perdido, se detiene la ejecución", coleccion=target.coleccion)
+                    break
+                except Exception as e:
+                    logger.error("Error al archivar", coleccion=target.coleccion, error=str(e))
+        finally:
+            await self._release_lease()
+        self.last_run = datetime.utcnow()
+        self.last_result = results
+        return results
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "habilitado": settings.ARCHIVE_ENABLED,
+            "destino": self.mode,
+            "ultimaEjecucion": self.last_run.isoformat() if self.last_run else None,
+            "archivados": self.last_result,
+        }
+
+    async def partitions(self, coleccion: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Particiones registradas, de la más reciente a la más antigua"""
+        query = {"coleccion": coleccion} if coleccion else {}
+        return await catalog_collection().find(query) \
+            .sort([("coleccion", ASCENDING), ("mes", DESCENDING)]) \
+            .to_list(length=None)
+
+# Instancia global del archivador
+archiver = Archiver()
+
+def _project(doc: Dict[str, Any], projection: Optional[Dict[str, int]]) -> Dict[str, Any]:
+    if not projection:
+        return doc
+    if all(not value for value in projection.values()):
+        return {key: value for key, value in doc.items() if key not in projection}
+    return {key: value for key, value in doc.items() if key == "_id" or projection.get(key)}
+
+def _partition_id(coleccion: str, mes: str, destino: str) -> str:
+    return f"{coleccion}:{mes}:{destino}"
+
+def _read_jsonl(
+    path: str,
+    field: str,
+    values: List[Any],
+    sort_field: str,
+    after: Optional[Tuple[Any, ObjectId]],
+    offsets: Optional[List[int]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Documentos de un JSONL de archivo que coinciden con el filtro y el cursor.
+
+    Con `offsets` solo se descomprimen esos miembros gzip; sin ellos (particiones
+    anteriores al índice por entidad) se recorre el archivo completo.
+    """
+    if not os.path.exists(path):
+        return []
+    allowed = set(values)
+    found: Dict[Any, Dict[str, Any]] = {}
+
+    def collect(lines):
+        for line in lines:
+            if not line.strip():
+                continue
+            doc = json_util.loads(line, json_options=JSON_OPTIONS)
+            if doc.get(field) not in allowed:
+                continue
+            if after is not None and (doc.get(sort_field), doc["_id"]) >= after:
+                continue
+            found[doc["_id"]] = doc
+
+    if offsets is None:
+        with gzip.open(path, "rt", encoding="utf-8") as archive:
+            collect(archive)
+    else:
+        with open(path, "rb") as raw:
+            for offset in sorted(set(offsets)):
+                collect(_read_member(raw, offset).splitlines())
+    return sorted(found.values(), key=lambda doc: (doc.get(sort_field), doc["_id"]), reverse=True)
+
+async def _entity_offsets(partition_id: str, values: List[Any]) -> List[int]:
+    offsets: List[int] = []
+    async for entry in entity_index_collection().find(
+        {"particion": partition_id, "valor": {"$in": values}}, {"offsets": 1}
+    ):
+        offsets.extend(entry.get("offsets", []))
+    return offsets
+
+async def find_archived(
+    coleccion: str,
+    field: str,
+    values: List[Any],
+    sort_field: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    projection: Optional[Dict[str, int]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Leer de las particiones archivadas en orden (sort_field, _id) descendente.
+
+    Continúa el mismo cursor keyset de la colección principal: las particiones
+    se recorren de la más reciente a la más antigua y se omiten las que son
+    posteriores al cursor.
+    """
+    after = decode_cursor(cursor, sort_field, DESCENDING) if cursor else None
+    docs: List[Dict[str, Any]] = []
+    # El índice por entidad solo cubre el campo de referencia del destino
+    indexed = any(t.coleccion == coleccion and t.referencia == field for t in ARCHIVE_TARGETS)
+
+    for partition in await catalog_collection().find({"coleccion": coleccion}).sort("mes", DESCENDING).to_list(length=None):
+        if len(docs) >= limit:
+            break
+        if after is not None and after[0] is not None and partition.get("desde") and partition["desde"] > after[0]:
+            continue
+
+        remaining = limit - len(docs)
+        if partition["destino"] == "jsonl":
+            offsets = None
+            if indexed and partition.get("indiceEntidades"):
+                offsets = await _entity_offsets(partition["_id"], values)
+                if not offsets:
+                    continue
+            found = await asyncio.to_thread(
+                _read_jsonl, partition["ubicacion"], field, values, sort_field, after, offsets
+            )
+            docs.extend(_project(doc, projection) for doc in found[:remaining])
+        else:
+            query = keyset_filter({field: {"$in": values}}, sort_field, DESCENDING, cursor)
+            docs.extend(
+                await get_collection(partition["ubicacion"]).find(query, projection)
+                    .sort([(sort_field, DESCENDING), ("_id", DESCENDING)])
+                    .limit(remaining)
+                    .to_list(length=None)
+            )
+
+    return docs
+
+class ArchiveScheduler:
+    """Ejecución periódica del archivado dentro del proceso de la API"""
+
+    def __init__(self, interval: float = settings.ARCHIVE_INTERVAL):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if not settings.ARCHIVE_ENABLED or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info("Archivado periódico iniciado", intervalo=self.interval, destino=archiver.mode)
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await archiver.run()
+            except Exception as e:
+                logger.error("Error en el archivado periódico", error=str(e))
+            await asyncio.sleep(self.interval)
+
+# Instancia global del programador de archivado
+archive_scheduler = ArchiveScheduler()
@@ -0,0 +1,546 @@
+"""
+Importación masiva de empresas y vehículos desde planillas CSV / XLSX
+"""
+
+import asyncio
+import csv
+import itertools
+import os
+import uuid
+from datetime import date, datetime, timedelta
+from enum import Enum
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+import aiofiles
+from bson import ObjectId
+from bson.errors import InvalidId
+from pydantic import ValidationError
+from pymongo import InsertOne, UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError
+import structlog
+
+from app.core.config import settings
+from app.core.database import get_collection, empresas_collection
+from app.models.empresa import CreateEmpresaRequest
+from app.schemas.importaciones import VehiculoImportRow
+from app.services.dashboard_stats import stats_rebuilder
+from app.services.document_storage import ArchivoDemasiadoGrande
+from app.services.empresa_search import build_search_fields, normalize
+from app.services.export_service import EMPRESA_EXPORT_COLUMNS, VEHICULO_EXPORT_COLUMNS, ColumnSpec
+
+logger = structlog.get_logger()
+
+JOBS_COLLECTION = "importaciones"
+ERRORS_COLLECTION = "importaciones_errores"
+
+# Estados de una importación
+PENDIENTE = "PENDIENTE"
+EN_PROCESO = "EN_PROCESO"
+COMPLETADO = "COMPLETADO"
+ERROR = "ERROR"
+
+FORMATOS = ("csv", "xlsx")
+
+DUPLICATE_KEY = 11000
+
+# Una importación EN_PROCESO sin avance en este tiempo se considera abandonada
+STALE_AFTER = timedelta(minutes=5)
+
+# Fila tal como se leyó de la planilla (encabezado -> valor)
+Row = Dict[str, Any]
+
+def jobs_collection():
+    return get_collection(JOBS_COLLECTION)
+
+def errors_collection():
+    return get_collection(ERRORS_COLLECTION)
+
+def imports_dir() -> str:
+    path = os.path.join(settings.UPLOAD_DIR, "importaciones")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def _header_map(columns: Dict[str, ColumnSpec], aliases: Dict[str, str]) -> Dict[str, str]:
+    """
+    Encabezado normalizado -> ruta del campo.
+
+    Acepta los encabezados y claves de la exportación (una planilla exportada
+    se puede volver a importar) y rutas con puntos (p. ej. `direccion.distrito`).
+    """
+    mapping = {normalize(k): v for k, v in aliases.items()}
+    for key, (header, path) in columns.items():
+        if isinstance(path, str):
+            mapping.setdefault(normalize(header), path)
+            mapping.setdefault(normalize(key), path)
+    return mapping
+
+def _bson_value(value: Any) -> Any:
+    """Adaptar la salida de .dict() a tipos BSON (enums y fechas sin hora)"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    if isinstance(value, dict):
+        return {k: _bson_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_bson_value(v) for v in value]
+    return value
+
+def _object_id(value: Any) -> Any:
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return value
+
+def _empresa_document(datos: Dict[str, Any]) -> Dict[str, Any]:
+    doc = _bson_value(CreateEmpresaRequest.parse_obj(datos).dict(exclude_none=True))
+    doc.setdefault("estado", "HABILITADA")
+    doc["busqueda"] = build_search_fields(doc)
+    return doc
+
+def _vehiculo_document(datos: Dict[str, Any]) -> Dict[str, Any]:
+    doc = VehiculoImportRow.parse_obj(datos).dict(exclude_none=True)
+    if doc.get("empresaId"):
+        doc["empresaId"] = _object_id(doc["empresaId"])
+    if doc.get("rutaId"):
+        doc["rutaId"] = _object_id(doc["rutaId"])
+    return doc
+
+async def _resolve_empresas(
+    validos: List[Tuple[int, Dict[str, Any]]]
+) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[Dict[str, Any]]]:
+    """Reemplazar rucEmpresa por empresaId con una sola consulta por lote"""
+    rucs = {doc["rucEmpresa"] for _, doc in validos if doc.get("rucEmpresa")}
+    empresas: Dict[str, ObjectId] = {}
+    if rucs:
+        cursor = empresas_collection().find({"ruc": {"$in": list(rucs)}, "estaActivo": True}, {"ruc": 1})
+        empresas = {doc["ruc"]: doc["_id"] async for doc in cursor}
+
+    resueltos, errores = [], []
+    for fila, doc in validos:
+        ruc = doc.pop("rucEmpresa", None)
+        if ruc and not doc.get("empresaId"):
+            if ruc not in empresas:
+                errores.append(_row_error(fila, [f"rucEmpresa: empresa {ruc} no registrada"], {"placa": doc["placa"]}))
+                continue
+            doc["empresaId"] = empresas[ruc]
+        resueltos.append((fila, doc))
+    return resueltos, errores
+
+class ImportType:
+    """Entidad importable: colección, clave única, validación de filas e historial"""
+
+    def __init__(
+        self,
+        coleccion: str,
+        clave: str,
+        columns: Dict[str, ColumnSpec],
+        build: Callable[[Dict[str, Any]], Dict[str, Any]],
+        historial: str,
+        referencia: str,
+        aliases: Optional[Dict[str, str]] = None,
+        resolve: Optional[Callable] = None
+    ):
+        self.coleccion = coleccion
+        self.clave = clave
+        self.headers = _header_map(columns, aliases or {})
+        self.build = build
+        self.historial = historial
+        self.referencia = referencia
+        self.resolve = resolve
+
+IMPORT_TYPES: Dict[str, ImportType] = {
+    "empresas": ImportType(
+        "empresas", "ruc", EMPRESA_EXPORT_COLUMNS, _empresa_document,
+        historial="empresas_historial", referencia="empresaId",
+    ),
+    "vehiculos": ImportType(
+        "vehiculos", "placa", VEHICULO_EXPORT_COLUMNS, _vehiculo_document,
+        historial="vehiculos_historial", referencia="vehiculoId",
+        aliases={"RUC Empresa": "rucEmpresa", "rucEmpresa": "rucEmpresa"},
+        resolve=_resolve_empresas,
+    ),
+}
+
+def _open_rows(path: str, formato: str, encoding: str) -> Iterator[Row]:
+    """Recorrer las filas de la planilla sin cargarla completa en memoria"""
+    if formato == "xlsx":
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError("Importación XLSX no disponible (instalar openpyxl)")
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            headers = [str(h).strip() if h is not None else "" for h in next(rows, ())]
+            for values in rows:
+                if any(v not in (None, "") for v in values):
+                    yield dict(zip(headers, values))
+        finally:
+            workbook.close()
+    else:
+        with open(path, encoding=encoding, newline="") as source:
+            sample = source.read(4096)
+            source.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+            except csv.Error:
+                dialect = csv.excel
+            for row in csv.DictReader(source, dialect=dialect):
+                if any(v for v in row.values() if isinstance(v, str) and v.strip()):
+                    yield row
+
+def _row_data(row: Row, headers: Dict[str, str]) -> Dict[str, Any]:
+    """Convertir una fila plana en el documento anidado que espera el modelo"""
+    data: Dict[str, Any] = {}
+    for header, value in row.items():
+        if not header:
+            continue
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            # Las celdas numéricas de XLSX (RUC, DNI, teléfonos) llegan como
+            # números; los campos de texto del modelo no los aceptan
+            value = str(value)
+        if isinstance(value, str):
+            value = value.strip()
+        if value is None or value == "":
+            continue
+        path = headers.get(normalize(header), header.strip())
+        parts = path.split(".")
+        target = data
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+            if not isinstance(target, dict):
+                raise ValueError(f"Columna en conflicto: {header}")
+        target[parts[-1]] = value
+    return data
+
+def _row_error(fila: int, errores: List[str], datos: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "fila": fila,
+        "errores": errores,
+        "datos": {str(k): str(v) for k, v in datos.items() if k and v not in (None, "")},
+    }
+
+def _read_batch(
+    rows: Iterator[Row],
+    fila_inicial: int,
+    tipo: ImportType,
+    size: int
+) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[Dict[str, Any]], int]:
+    """Leer y validar un lote de filas (se ejecuta en un hilo)"""
+    validos, errores = [], []
+    leidas = 0
+    for row in itertools.islice(rows, size):
+        leidas += 1
+        fila = fila_inicial + leidas
+        try:
+            validos.append((fila, tipo.build(_row_data(row, tipo.headers))))
+        except ValidationError as e:
+            mensajes = [f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()]
+            errores.append(_row_error(fila, mensajes, row))
+        except ValueError as e:
+            errores.append(_row_error(fila, [str(e)], row))
+    return validos, errores, leidas
+
+def _skip(rows: Iterator[Row], count: int):
+    for _ in itertools.islice(rows, count):
+        pass
+
+async def save_upload(chunks: AsyncIterator[bytes], nombre_archivo: str) -> Tuple[str, str]:
+    """Guardar la planilla subida por fragmentos; devuelve (ruta, formato)"""
+    formato = os.path.splitext(nombre_archivo or "")[1].lstrip(".").lower()
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado. Permitidos: {', '.join(FORMATOS)}")
+
+    path = os.path.join(imports_dir(), f"{uuid.uuid4().hex}.{formato}")
+    size = 0
+    try:
+        async with aiofiles.open(path, "wb") as output:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > settings.IMPORT_MAX_FILE_SIZE:
+                    raise ArchivoDemasiadoGrande(
+                        f"El archivo supera el tamaño máximo de {settings.IMPORT_MAX_FILE_SIZE} bytes"
+                    )
+                await output.write(chunk)
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return path, formato
+
+class ImportEngine:
+    """
+    Procesa importaciones en segundo plano por lotes de IMPORT_BATCH_SIZE filas.
+
+    Cada lote se valida fuera del event loop y se escribe con un bulk_write
+    no ordenado; los duplicados (índice único de RUC o placa) y las filas
+    inválidas se registran en `importaciones_errores` sin detener el resto.
+    Tras cada lote se guarda `filasProcesadas`, desde donde se reanuda una
+    importación interrumpida.
+    """
+
+    def __init__(self, batch_size: int = settings.IMPORT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._tasks: Dict[asyncio.Task, Any] = {}
+
+    async def submit(
+        self,
+        entidad: str,
+        path: str,
+        nombre_archivo: str,
+        formato: str,
+        encoding: str,
+        user_id: str
+    ) -> Dict[str, Any]:
+        """Registrar una importación y procesarla en segundo plano"""
+        if entidad not in IMPORT_TYPES:
+            raise ValueError(f"Entidad no importable: {entidad}")
+        now = datetime.utcnow()
+        job = {
+            "_id": ObjectId(),
+            "entidad": entidad,
+            "nombreArchivo": os.path.basename(nombre_archivo),
+            "archivo": path,
+            "formato": formato,
+            "codificacion": encoding,
+            "estado": PENDIENTE,
+            "filasProcesadas": 0,
+            "insertados": 0,
+            "errores": 0,
+            "solicitadoPorId": user_id,
+            "creadoEn": now,
+            "actualizadoEn": now,
+        }
+        await jobs_collection().insert_one(job)
+        self._start(job)
+        return job
+
+    def _start(self, job: Dict[str, Any]):
+        task = asyncio.create_task(self._run(job))
+        self._tasks[task] = job["_id"]
+        task.add_done_callback(lambda t: self._tasks.pop(t, None))
+
+    async def resume(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Reanudar una importación con error o abandonada desde su último lote
+        confirmado. Devuelve None si no existe o no puede reanudarse.
+        """
+        try:
+            object_id = ObjectId(job_id)
+        except (InvalidId, TypeError):
+            return None
+        if object_id in self._tasks.values():
+            return None
+
+        now = datetime.utcnow()
+        job = await jobs_collection().find_one_and_update(
+            {
+                "_id": object_id,
+                "$or": [
+                    {"estado": ERROR},
+                    {"estado": {"$in": [PENDIENTE, EN_PROCESO]}, "actualizadoEn": {"$lt": now - STALE_AFTER}},
+                ],
+            },
+            {"$set": {"estado": PENDIENTE, "actualizadoEn": now}, "$unset": {"error": ""}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if job is None or not os.path.exists(job["archivo"]):
+            return None
+        self._start(job)
+        return job
+
+    async def _write(
+        self,
+        tipo: ImportType,
+        job_id: ObjectId,
+        validos: List[Tuple[int, Dict[str, Any]]],
+        user_id: str
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """Insertar un lote y su historial; devuelve (insertados, errores por fila)"""
+        if not validos:
+            return 0, []
+
+        now = datetime.utcnow()
+        for _, doc in validos:
+            doc.update({
+                "_id": ObjectId(),
+                "estaActivo": True,
+                "fechaRegistro": now,
+                "actualizadoEn": now,
+                "creadoPorId": user_id,
+                "importacionId": job_id,
+            })
+
+        fallidos: Dict[int, Dict[str, Any]] = {}
+        try:
+            await get_collection(tipo.coleccion).bulk_write(
+                [InsertOne(doc) for _, doc in validos], ordered=False
+            )
+        except BulkWriteError as e:
+            for err in e.details.get("writeErrors", []):
+                fallidos[err["index"]] = err
+
+        # Al reanudar, las filas del último lote ya insertadas por esta misma
+        # importación aparecen como duplicadas: se cuentan como importadas
+        duplicados = [validos[i][1][tipo.clave] for i, err in fallidos.items() if err.get("code") == DUPLICATE_KEY]
+        previos: Dict[str, ObjectId] = {}
+        if duplicados:
+            cursor = get_collection(tipo.coleccion).find(
+                {tipo.clave: {"$in": duplicados}, "importacionId": job_id}, {tipo.clave: 1}
+            )
+            previos = {doc[tipo.clave]: doc["_id"] async for doc in cursor}
+
+        importados: List[Tuple[int, ObjectId]] = []
+        errores = []
+        for i, (fila, doc) in enumerate(validos):
+            if i not in fallidos:
+                importados.append((fila, doc["_id"]))
+            elif doc[tipo.clave] in previos:
+                importados.append((fila, previos[doc[tipo.clave]]))
+            else:
+                err = fallidos[i]
+                mensaje = (
+                    f"{tipo.clave}: {doc[tipo.clave]} ya registrado"
+                    if err.get("code") == DUPLICATE_KEY else err.get("errmsg", "Error de escritura")
+                )
+                errores.append(_row_error(fila, [mensaje], {tipo.clave: doc[tipo.clave]}))
+
+        if importados:
+            # Upsert por (entidad, importación): reprocesar un lote no duplica el historial
+            await get_collection(tipo.historial).bulk_write([
+                UpdateOne(
+                    {tipo.referencia: entity_id, "tipoCambio": "IMPORTACION", "detalles.importacionId": str(job_id)},
+                    {"$setOnInsert": {
+                        "fechaCambio": now,
+                        "usuarioId": user_id,
+                        "detalles": {"importacionId": str(job_id), "fila": fila},
+                    }},
+                    upsert=True,
+                )
+                for fila, entity_id in importados
+            ], ordered=False)
+        return len(importados), errores
+
+    async def _save_errors(self, job_id: ObjectId, errores: List[Dict[str, Any]]):
+        if not errores:
+            return
+        try:
+            await errors_collection().insert_many(
+                [{"importacionId": job_id, **error} for error in errores], ordered=False
+            )
+        except BulkWriteError as e:
+            if any(err.get("code") != DUPLICATE_KEY for err in e.details.get("writeErrors", [])):
+                raise
+
+    async def _run(self, job: Dict[str, Any]):
+        tipo = IMPORT_TYPES[job["entidad"]]
+        job_id = job["_id"]
+        fila = job["filasProcesadas"]
+        started = datetime.utcnow()
+        await jobs_collection().update_one(
+            {"_id": job_id},
+            {"$set": {"estado": EN_PROCESO, "iniciadoEn": started, "actualizadoEn": started}}
+        )
+
+        rows = None
+        try:
+            rows = _open_rows(job["archivo"], job["formato"], job["codificacion"])
+            if fila:
+                await asyncio.to_thread(_skip, rows, fila)
+
+            while True:
+                validos, errores, leidas = await asyncio.to_thread(
+                    _read_batch, rows, fila, tipo, self.batch_size
+                )
+                if not leidas:
+                    break
+                if tipo.resolve:
+                    validos, no_resueltos = await tipo.resolve(validos)
+                    errores.extend(no_resueltos)
+                insertados, fallidos = await self._write(tipo, job_id, validos, job["solicitadoPorId"])
+                errores.extend(fallidos)
+                await self._save_errors(job_id, errores)
+                # Al reanudar, los errores del lote repetido ya estaban registrados:
+                # el total se toma de importaciones_errores en lugar de acumularlo
+                total_errores = await errors_collection().count_documents({"importacionId": job_id})
+
+                fila += leidas
+                await jobs_collection().update_one(
+                    {"_id": job_id},
+                    {
+                        "$set": {
+                            "filasProcesadas": fila,
+                            "errores": total_errores,
+                            "actualizadoEn": datetime.utcnow(),
+                        },
+                        "$inc": {"insertados": insertados},
+                    }
+                )
+
+            await jobs_collection().update_one(
+                {"_id": job_id},
+                {"$set": {"estado": COMPLETADO, "finalizadoEn": datetime.utcnow()}}
+            )
+            os.remove(job["archivo"])
+            stats_rebuilder.schedule()
+            seconds = (datetime.utcnow() - started).total_seconds()
+            logger.info(
+                "Importación completada",
+                importacion_id=str(job_id),
+                entidad=job["entidad"],
+                filas=fila,
+                filas_por_segundo=round(fila / seconds, 1) if seconds else None
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Error en importación", importacion_id=str(job_id), fila=fila, error=str(e))
+            await jobs_collection().update_one(
+                {"_id": job_id},
+                {"$set": {"estado": ERROR, "error": str(e), "finalizadoEn": datetime.utcnow()}}
+            )
+            stats_rebuilder.schedule()
+        finally:
+            if rows is not None:
+                try:
+                    rows.close()
+                except ValueError:
+                    # Cancelado mientras el hilo de lectura aún recorre la planilla
+                    pass
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return await jobs_collection().find_one({"_id": ObjectId(job_id)})
+        except (InvalidId, TypeError):
+            return None
+
+    async def get_errors(self, job_id: str, desde_fila: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """Errores por fila, paginados por número de fila"""
+        try:
+            object_id = ObjectId(job_id)
+        except (InvalidId, TypeError):
+            return []
+        cursor = errors_collection() \
+            .find({"importacionId": object_id, "fila": {"$gt": desde_fila}}, {"_id": 0, "importacionId": 0}) \
+            .sort("fila", 1) \
+            .limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def shutdown(self):
+        """Detener las importaciones en curso; quedan en ERROR para reanudarse"""
+        if not self._tasks:
+            return
+        job_ids = list(self._tasks.values())
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        await jobs_collection().update_many(
+            {"_id": {"$in": job_ids}, "estado": {"$in": [PENDIENTE, EN_PROCESO]}},
+            {"$set": {"estado": ERROR, "error": "Interrumpida al detener el servidor"}}
+        )
+
+# Instancia global del motor de importación
+import_engine = ImportEngine()
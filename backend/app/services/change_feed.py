@@ -0,0 +1,450 @@
+"""
+Bus de invalidación: change streams de MongoDB (o polling sobre actualizadoEn)
+"""
+
+import asyncio
+import json
+import os
+import socket
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pydantic import BaseModel
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError, OperationFailure
+import structlog
+
+from app.core.config import settings
+from app.core import database
+from app.core.auth import invalidate_user
+from app.core.cache import cache, invalidate_empresa
+from app.core.database import get_collection, tucs_collection
+from app.core.pagination import encode_cursor, keyset_filter
+from app.services import tuc_verification
+from app.services.cumplimiento_service import snapshot_refresher
+
+logger = structlog.get_logger()
+
+CHECKPOINT_COLLECTION = "scheduler_checkpoints"
+LEASE_ID = "cambios:lease"
+
+# Un solo proceso consume el bus; los demás reintentan tomar el lease
+LEASE_TTL = 30.0
+LEASE_RENEW_INTERVAL = 10.0
+
+# Últimos campos conocidos por documento, para resolver borrados y cambios sin pre-imagen
+KNOWN_FIELDS_PREFIX = "drtc:cambios"
+
+WATERMARK_FIELD = "actualizadoEn"
+
+# Campos que necesitan los manejadores de cada colección observada
+EVENT_FIELDS: Dict[str, List[str]] = {
+    "empresas": ["ruc", "estado"],
+    "vehiculos": ["placa", "empresaId", "estado"],
+    "tucs": ["numero", "empresaId", "vehiculoId", "estado"],
+    "conductores": ["dni", "empresasAsociadasIds", "estado"],
+    "resoluciones": ["numero", "empresaId", "estado"],
+    "usuarios": ["estado", "rol", "estaActivo"],
+}
+
+# Códigos de error de change streams que invalidan el token de reanudación
+RESUME_TOKEN_LOST = {260, 280, 286}
+
+# Intervalo mínimo entre escrituras del token de reanudación (segundos)
+CHECKPOINT_INTERVAL = 1.0
+
+# Documentos por consulta en modo polling
+POLL_BATCH_SIZE = 500
+
+class ChangeEvent(BaseModel):
+    """Cambio observado en una colección"""
+
+    coleccion: str
+    operacion: str
+    documentoId: str
+    documento: Optional[Dict[str, Any]] = None
+    # Campos previos a la modificación (pre-imagen o últimos conocidos), si se tienen
+    anterior: Optional[Dict[str, Any]] = None
+
+Handler = Callable[[ChangeEvent], Awaitable[None]]
+
+def checkpoints_collection():
+    return get_collection(CHECKPOINT_COLLECTION)
+
+def _checkpoint_id(coleccion: str) -> str:
+    return f"cambios:{coleccion}"
+
+def _object_id(value: Any) -> Any:
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return value
+
+class ChangeFeed:
+    """
+    Consumidor en segundo plano que publica los cambios de las colecciones
+    observadas a los manejadores registrados, sin importar quién escribió
+    (endpoints, scripts o correcciones directas en MongoDB).
+
+    Con replica set se usan change streams con el token de reanudación
+    guardado en `scheduler_checkpoints`; en un nodo único se consulta
+    periódicamente por `actualizadoEn` (no detecta borrados físicos ni
+    escrituras que no actualicen ese campo). Tras un reinicio pueden repetirse
+    algunos eventos: los manejadores deben ser idempotentes.
+
+    Solo el proceso que tiene el lease (`cambios:lease` en
+    `scheduler_checkpoints`) consume los cambios; los manejadores actúan sobre
+    Redis y MongoDB, compartidos por todos los workers.
+
+    Los borrados no traen `fullDocument`: se usa la pre-imagen cuando MongoDB
+    (6.0+) la tiene habilitada y, si no, los últimos campos observados del
+    documento, guardados en Redis.
+    """
+
+    def __init__(self, collections: List[str] = list(EVENT_FIELDS), poll_interval: float = settings.CHANGE_FEED_POLL_INTERVAL):
+        self.collections = collections
+        self.poll_interval = poll_interval
+        self.modo: Optional[str] = None
+        self.eventos: Dict[str, int] = defaultdict(int)
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self._tasks: Dict[asyncio.Task, str] = {}
+        self._leader_task: Optional[asyncio.Task] = None
+        self._pre_images: set = set()
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+
+    def subscribe(self, coleccion: str, handler: Handler):
+        """Registrar un manejador para los cambios de una colección"""
+        self._handlers[coleccion].append(handler)
+
+    async def publish(self, event: ChangeEvent):
+        """Entregar un evento a los manejadores; un fallo no detiene a los demás"""
+        self.eventos[event.coleccion] += 1
+        for handler in self._handlers[event.coleccion]:
+            try:
+                await handler(event)
+            except Exception as e:
+                logger.error(
+                    "Error en manejador de cambios",
+                    coleccion=event.coleccion,
+                    documento_id=event.documentoId,
+                    handler=getattr(handler, "__name__", repr(handler)),
+                    error=str(e)
+                )
+
+    async def _supports_change_streams(self) -> bool:
+        if settings.CHANGE_FEED_MODE != "auto":
+            return settings.CHANGE_FEED_MODE == "change_stream"
+        hello = await database.mongodb_client.admin.command("hello")
+        return "setName" in hello or hello.get("msg") == "isdbgrid"
+
+    async def start(self):
+        if not settings.CHANGE_FEED_ENABLED or self._leader_task is not None:
+            return
+        self.modo = "change_stream" if await self._supports_change_streams() else "polling"
+        self._leader_task = asyncio.create_task(self._lead())
+
+    async def stop(self):
+        if self._leader_task is None:
+            return
+        self._leader_task.cancel()
+        try:
+            await self._leader_task
+        except asyncio.CancelledError:
+            pass
+        self._leader_task = None
+        await self._stop_workers()
+        try:
+            await self._release_lease()
+        except Exception as e:
+            logger.warning("No se pudo liberar el lease del bus de invalidación", error=str(e))
+
+    async def _acquire_lease(self) -> bool:
+        """Tomar o renovar el lease del consumidor"""
+        now = datetime.utcnow()
+        try:
+            await checkpoints_collection().update_one(
+                {"_id": LEASE_ID, "$or": [{"expiraEn": {"$lt": now}}, {"propietario": self.owner}]},
+                {"$set": {"propietario": self.owner, "expiraEn": now + timedelta(seconds=LEASE_TTL)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def _release_lease(self):
+        await checkpoints_collection().delete_one({"_id": LEASE_ID, "propietario": self.owner})
+
+    async def _lead(self):
+        """Iniciar los consumidores mientras se tenga el lease y detenerlos si se pierde"""
+        while True:
+            try:
+                if await self._acquire_lease():
+                    if not self._tasks:
+                        await self._start_workers()
+                elif self._tasks:
+                    logger.warning("Lease del bus de invalidación perdido")
+                    await self._stop_workers()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Error al renovar el lease del bus de invalidación", error=str(e))
+            await asyncio.sleep(LEASE_RENEW_INTERVAL)
+
+    async def _start_workers(self):
+        if self.modo == "change_stream":
+            await self._enable_pre_images()
+        worker = self._watch if self.modo == "change_stream" else self._poll
+        for coleccion in self.collections:
+            task = asyncio.create_task(worker(coleccion))
+            self._tasks[task] = coleccion
+        logger.info("Bus de invalidación iniciado", modo=self.modo, colecciones=self.collections)
+
+    async def _stop_workers(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        self._tasks.clear()
+
+    async def _enable_pre_images(self):
+        """Habilitar pre-imágenes (MongoDB 6.0+) para recibir los campos de los borrados"""
+        for coleccion in self.collections:
+            try:
+                await database.mongodb_database.command(
+                    "collMod", coleccion, changeStreamPreAndPostImages={"enabled": True}
+                )
+                self._pre_images.add(coleccion)
+            except OperationFailure as e:
+                logger.info("Pre-imágenes no disponibles", coleccion=coleccion, error=str(e))
+
+    async def _remember(self, coleccion: str, documento_id: str, documento: Optional[Dict[str, Any]]):
+        """Guardar los campos de eventos del documento para un cambio o borrado posterior"""
+        client = database.redis_client
+        if client is None or not documento:
+            return
+        fields = {field: documento[field] for field in EVENT_FIELDS[coleccion] if field in documento}
+        try:
+            await client.hset(f"{KNOWN_FIELDS_PREFIX}:{coleccion}", documento_id, json.dumps(fields, default=str))
+        except Exception as e:
+            logger.warning("No se pudieron guardar los campos del documento", coleccion=coleccion, error=str(e))
+
+    async def _recall(self, coleccion: str, documento_id: str, forget: bool = True) -> Optional[Dict[str, Any]]:
+        """Últimos campos conocidos de un documento (se olvidan si fue borrado)"""
+        client = database.redis_client
+        if client is None:
+            return None
+        key = f"{KNOWN_FIELDS_PREFIX}:{coleccion}"
+        try:
+            value = await client.hget(key, documento_id)
+            if forget:
+                await client.hdel(key, documento_id)
+        except Exception as e:
+            logger.warning("No se pudieron leer los campos del documento", coleccion=coleccion, error=str(e))
+            return None
+        return json.loads(value) if value else None
+
+    async def _swap(self, coleccion: str, documento_id: str, documento: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Reemplazar los campos conocidos del documento y devolver los anteriores"""
+        anterior = await self._recall(coleccion, documento_id, forget=False)
+        await self._remember(coleccion, documento_id, documento)
+        return anterior
+
+    async def _save_checkpoint(self, coleccion: str, **values: Any):
+        await checkpoints_collection().update_one(
+            {"_id": _checkpoint_id(coleccion)},
+            {"$set": {**values, "ejecutadoEn": datetime.utcnow()}},
+            upsert=True
+        )
+
+    def _pipeline(self, coleccion: str) -> List[Dict[str, Any]]:
+        projection = {f"fullDocument.{field}": 1 for field in EVENT_FIELDS[coleccion]}
+        if coleccion in self._pre_images:
+            projection.update({f"fullDocumentBeforeChange.{field}": 1 for field in EVENT_FIELDS[coleccion]})
+        return [
+            {"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}},
+            {"$project": {"operationType": 1, "documentKey": 1, "fullDocument.estaActivo": 1, **projection}},
+        ]
+
+    async def _event(self, coleccion: str, change: Dict[str, Any]) -> ChangeEvent:
+        """
+        Construir el evento; el estado anterior viene de la pre-imagen o de Redis.
+
+        En los borrados el documento es el estado anterior.
+        """
+        documento_id = str(change["documentKey"]["_id"])
+        anterior = change.get("fullDocumentBeforeChange")
+        if change["operationType"] == "delete":
+            documento = anterior
+            if documento is None:
+                documento = anterior = await self._recall(coleccion, documento_id)
+        else:
+            documento = change.get("fullDocument")
+            if coleccion not in self._pre_images:
+                anterior = await self._swap(coleccion, documento_id, documento)
+        return ChangeEvent(
+            coleccion=coleccion,
+            operacion=change["operationType"],
+            documentoId=documento_id,
+            documento=documento,
+            anterior=anterior,
+        )
+
+    async def _watch(self, coleccion: str):
+        """Consumir el change stream de una colección reanudando desde el último token"""
+        checkpoint = await checkpoints_collection().find_one({"_id": _checkpoint_id(coleccion)})
+        token = (checkpoint or {}).get("resumeToken")
+
+        options: Dict[str, Any] = {}
+        if coleccion in self._pre_images:
+            options["full_document_before_change"] = "whenAvailable"
+
+        while True:
+            saved_at = time.monotonic()
+            try:
+                async with get_collection(coleccion).watch(
+                    self._pipeline(coleccion),
+                    full_document="updateLookup",
+                    resume_after=token,
+                    **options
+                ) as stream:
+                    async for change in stream:
+                        await self.publish(await self._event(coleccion, change))
+                        token = stream.resume_token
+                        if time.monotonic() - saved_at >= CHECKPOINT_INTERVAL:
+                            await self._save_checkpoint(coleccion, resumeToken=token)
+                            saved_at = time.monotonic()
+                # El stream solo termina por un evento "invalidate" (colección eliminada)
+                token = None
+            except asyncio.CancelledError:
+                if token is not None:
+                    await self._save_checkpoint(coleccion, resumeToken=token)
+                raise
+            except OperationFailure as e:
+                if e.code in RESUME_TOKEN_LOST:
+                    logger.warning("Token de reanudación perdido, se reinicia el stream", coleccion=coleccion)
+                    token = None
+                else:
+                    logger.error("Error en change stream", coleccion=coleccion, error=str(e))
+                    await asyncio.sleep(5)
+            except Exception as e:
+                logger.error("Error en change stream", coleccion=coleccion, error=str(e))
+                await asyncio.sleep(5)
+
+    async def _initial_cursor(self, coleccion: str) -> Optional[str]:
+        """Sin checkpoint se parte del último documento modificado (no se reprocesa el histórico)"""
+        last = await get_collection(coleccion).find_one(
+            {WATERMARK_FIELD: {"$exists": True}},
+            {WATERMARK_FIELD: 1},
+            sort=[(WATERMARK_FIELD, DESCENDING), ("_id", DESCENDING)]
+        )
+        return encode_cursor(WATERMARK_FIELD, ASCENDING, last) if last else None
+
+    async def _poll(self, coleccion: str):
+        """
+        Polling por keyset sobre (actualizadoEn, _id).
+
+        Solo se leen documentos modificados hasta hace `poll_interval` segundos
+        para no adelantar el cursor sobre escrituras aún en curso.
+        """
+        checkpoint = await checkpoints_collection().find_one({"_id": _checkpoint_id(coleccion)})
+        cursor = (checkpoint or {}).get("cursor") or await self._initial_cursor(coleccion)
+        projection = {field: 1 for field in EVENT_FIELDS[coleccion]}
+        projection.update({"estaActivo": 1, WATERMARK_FIELD: 1})
+
+        while True:
+            try:
+                hasta = datetime.utcnow() - timedelta(seconds=self.poll_interval)
+                query = keyset_filter({WATERMARK_FIELD: {"$lte": hasta}}, WATERMARK_FIELD, ASCENDING, cursor)
+                docs = await get_collection(coleccion).find(query, projection) \
+                    .sort([(WATERMARK_FIELD, ASCENDING), ("_id", ASCENDING)]) \
+                    .limit(POLL_BATCH_SIZE) \
+                    .to_list(length=POLL_BATCH_SIZE)
+
+                for doc in docs:
+                    documento_id = str(doc["_id"])
+                    await self.publish(ChangeEvent(
+                        coleccion=coleccion,
+                        operacion="update",
+                        documentoId=documento_id,
+                        documento=doc,
+                        anterior=await self._swap(coleccion, documento_id, doc),
+                    ))
+                if docs:
+                    cursor = encode_cursor(WATERMARK_FIELD, ASCENDING, docs[-1])
+                    await self._save_checkpoint(coleccion, cursor=cursor)
+                if len(docs) < POLL_BATCH_SIZE:
+                    await asyncio.sleep(self.poll_interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Error en polling de cambios", coleccion=coleccion, error=str(e))
+                await asyncio.sleep(5)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "habilitado": settings.CHANGE_FEED_ENABLED,
+            "modo": self.modo,
+            "lider": bool(self._tasks),
+            "preImagenes": sorted(self._pre_images),
+            "colecciones": sorted(self._tasks.values()),
+            "eventos": dict(self.eventos),
+        }
+
+async def _tuc_numeros(query: Dict[str, Any]) -> List[str]:
+    return [doc["numero"] async for doc in tucs_collection().find(query, {"numero": 1}) if doc.get("numero")]
+
+def _empresa_ids(event: ChangeEvent) -> Set[str]:
+    """Empresa actual y anterior (si el documento cambió de empresa, ambas se recalculan)"""
+    values = ((event.documento or {}).get("empresaId"), (event.anterior or {}).get("empresaId"))
+    return {str(value) for value in values if value}
+
+async def _on_empresa(event: ChangeEvent):
+    await invalidate_empresa(event.documentoId)
+    snapshot_refresher.schedule(event.documentoId)
+    # La verificación pública muestra la razón social y el RUC de la empresa
+    numeros = await _tuc_numeros({"empresaId": {"$in": [_object_id(event.documentoId), event.documentoId]}})
+    if numeros:
+        await cache.invalidate(tuc_verification.NAMESPACE, *numeros)
+
+async def _on_vehiculo(event: ChangeEvent):
+    snapshot_refresher.schedule(*_empresa_ids(event))
+    # La verificación pública muestra la placa del vehículo
+    numeros = await _tuc_numeros({"vehiculoId": {"$in": [_object_id(event.documentoId), event.documentoId]}})
+    if numeros:
+        await cache.invalidate(tuc_verification.NAMESPACE, *numeros)
+
+async def _on_tuc(event: ChangeEvent):
+    numero = (event.documento or {}).get("numero")
+    if numero:
+        await tuc_verification.invalidate_tuc_verification(numero)
+    snapshot_refresher.schedule(*_empresa_ids(event))
+
+async def _on_conductor(event: ChangeEvent):
+    # Incluye las empresas de las que el conductor fue desasociado
+    empresas = set((event.documento or {}).get("empresasAsociadasIds") or [])
+    empresas.update((event.anterior or {}).get("empresasAsociadasIds") or [])
+    snapshot_refresher.schedule(*{str(e) for e in empresas})
+
+async def _on_resolucion(event: ChangeEvent):
+    snapshot_refresher.schedule(*_empresa_ids(event))
+
+async def _on_usuario(event: ChangeEvent):
+    # Cualquier escritura (estado, rol, contraseña, desactivación) invalida
+    # el usuario cacheado por get_current_user
+    await invalidate_user(event.documentoId)
+
+def register_invalidation_handlers(feed: ChangeFeed):
+    """Manejadores de las vistas cacheadas y modelos de lectura existentes"""
+    feed.subscribe("empresas", _on_empresa)
+    feed.subscribe("vehiculos", _on_vehiculo)
+    feed.subscribe("tucs", _on_tuc)
+    feed.subscribe("conductores", _on_conductor)
+    feed.subscribe("resoluciones", _on_resolucion)
+    feed.subscribe("usuarios", _on_usuario)
+
+# Instancia global del bus de invalidación
+change_feed = ChangeFeed()
+register_invalidation_handlers(change_feed)
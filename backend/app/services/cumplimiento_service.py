@@ -0,0 +1,229 @@
+"""
+Snapshot materializado de cumplimiento por empresa
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReplaceOne
+import structlog
+
+from app.core.config import settings
+from app.core.database import (
+    get_collection,
+    empresas_collection,
+    vehiculos_collection,
+    conductores_collection,
+    resoluciones_collection,
+    tucs_collection
+)
+from app.core.cache import cache
+
+logger = structlog.get_logger()
+
+SNAPSHOT_COLLECTION = "empresas_cumplimiento"
+
+def cumplimiento_collection():
+    return get_collection(SNAPSHOT_COLLECTION)
+
+def _id_values(empresa_id: str) -> List[Any]:
+    """Valores posibles de una referencia a empresa (ObjectId o string)"""
+    try:
+        return [ObjectId(empresa_id), empresa_id]
+    except (InvalidId, TypeError):
+        return [empresa_id]
+
+async def _count(collection, query: Dict[str, Any]) -> int:
+    return await collection.count_documents(query)
+
+async def compute_snapshot(empresa_id: str) -> Dict[str, Any]:
+    """Calcular el cumplimiento de una empresa consultando sus entidades relacionadas"""
+    now = datetime.utcnow()
+    limite = now + timedelta(days=settings.NOTIFICATION_VENCIMIENTO_ANTICIPADO)
+    ref = {"$in": _id_values(empresa_id)}
+
+    vehiculos = vehiculos_collection()
+    tucs = tucs_collection()
+    conductores = conductores_collection()
+    resoluciones = resoluciones_collection()
+
+    (
+        vehiculos_activos,
+        tucs_vigentes,
+        tucs_vencidas,
+        tucs_por_vencer,
+        conductores_total,
+        licencias_vencidas,
+        licencias_por_vencer,
+        resoluciones_vigentes,
+        resoluciones_vencidas,
+    ) = await asyncio.gather(
+        _count(vehiculos, {"empresaId": ref, "estaActivo": True}),
+        _count(tucs, {"empresaId": ref, "estaActivo": True, "estado": "VIGENTE",
+                      "fechaVencimiento": {"$gte": now}}),
+        _count(tucs, {"empresaId": ref, "estaActivo": True, "estado": "VIGENTE",
+                      "fechaVencimiento": {"$lt": now}}),
+        _count(tucs, {"empresaId": ref, "estaActivo": True, "estado": "VIGENTE",
+                      "fechaVencimiento": {"$gte": now, "$lt": limite}}),
+        _count(conductores, {"empresasAsociadasIds": ref, "estaActivo": True}),
+        _count(conductores, {"empresasAsociadasIds": ref, "estaActivo": True,
+                             "fechaVencimientoLicencia": {"$lt": now}}),
+        _count(conductores, {"empresasAsociadasIds": ref, "estaActivo": True,
+                             "fechaVencimientoLicencia": {"$gte": now, "$lt": limite}}),
+        _count(resoluciones, {"empresaId": ref, "estaActivo": True,
+                              "fechaVigenciaFin": {"$gte": now}}),
+        _count(resoluciones, {"empresaId": ref, "estaActivo": True,
+                              "fechaVigenciaFin": {"$lt": now}}),
+    )
+
+    observaciones = []
+    if tucs_vencidas:
+        observaciones.append(f"{tucs_vencidas} TUC vencida(s)")
+    if licencias_vencidas:
+        observaciones.append(f"{licencias_vencidas} licencia(s) de conducir vencida(s)")
+    if not resoluciones_vigentes:
+        observaciones.append("Sin resolución vigente")
+
+    return {
+        "_id": _id_values(empresa_id)[0],
+        "empresaId": empresa_id,
+        "calculadoEn": now,
+        "vehiculos": {"activos": vehiculos_activos},
+        "tucs": {
+            "vigentes": tucs_vigentes,
+            "vencidas": tucs_vencidas,
+            "porVencer": tucs_por_vencer,
+        },
+        "conductores": {
+            "total": conductores_total,
+            "licenciasVencidas": licencias_vencidas,
+            "licenciasPorVencer": licencias_por_vencer,
+        },
+        "resoluciones": {
+            "vigentes": resoluciones_vigentes,
+            "vencidas": resoluciones_vencidas,
+        },
+        "cumple": not observaciones,
+        "observaciones": observaciones,
+    }
+
+def _to_response(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    snapshot = dict(snapshot)
+    snapshot.pop("_id", None)
+    return snapshot
+
+async def refresh_snapshot(empresa_id: str) -> Dict[str, Any]:
+    """Recalcular y guardar el snapshot de una empresa"""
+    snapshot = await compute_snapshot(empresa_id)
+    await cumplimiento_collection().replace_one({"_id": snapshot["_id"]}, snapshot, upsert=True)
+    await cache.invalidate("empresa_cumplimiento", empresa_id)
+    return _to_response(snapshot)
+
+async def get_snapshot(empresa_id: str) -> Optional[Dict[str, Any]]:
+    """Leer el snapshot de cumplimiento; se calcula la primera vez si aún no existe"""
+    snapshot = await cumplimiento_collection().find_one({"_id": {"$in": _id_values(empresa_id)}})
+    if snapshot:
+        return _to_response(snapshot)
+
+    exists = await empresas_collection().count_documents(
+        {"_id": {"$in": _id_values(empresa_id)}}, limit=1
+    )
+    if not exists:
+        return None
+    return await refresh_snapshot(empresa_id)
+
+async def get_snapshots(empresa_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Leer en una sola consulta los snapshots de varias empresas"""
+    ids: List[Any] = []
+    for empresa_id in set(empresa_ids):
+        ids.extend(_id_values(empresa_id))
+
+    cursor = cumplimiento_collection().find({"_id": {"$in": ids}})
+    return {doc["empresaId"]: _to_response(doc) async for doc in cursor}
+
+async def rebuild_all(concurrency: int = 8, batch_size: int = 500) -> int:
+    """
+    Reconstrucción completa (nocturna) de los snapshots de todas las empresas activas.
+
+    Al final se eliminan los snapshots de empresas borradas o desactivadas.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    collection = cumplimiento_collection()
+    total = 0
+    active_ids: List[Any] = []
+
+    async def compute(empresa_id: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await compute_snapshot(empresa_id)
+
+    batch: List[str] = []
+
+    async def write(ids: List[str]):
+        snapshots = await asyncio.gather(*(compute(empresa_id) for empresa_id in ids))
+        await collection.bulk_write(
+            [ReplaceOne({"_id": s["_id"]}, s, upsert=True) for s in snapshots],
+            ordered=False
+        )
+        await cache.invalidate("empresa_cumplimiento", *ids)
+
+    async for doc in empresas_collection().find({"estaActivo": True}, {"_id": 1}):
+        empresa_id = str(doc["_id"])
+        active_ids.append(_id_values(empresa_id)[0])
+        batch.append(empresa_id)
+        if len(batch) >= batch_size:
+            await write(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        await write(batch)
+        total += len(batch)
+
+    stale_query = {"_id": {"$nin": active_ids}}
+    stale = [doc["empresaId"] async for doc in collection.find(stale_query, {"empresaId": 1})]
+    if stale:
+        result = await collection.delete_many(stale_query)
+        await cache.invalidate("empresa_cumplimiento", *stale)
+        logger.info("Snapshots de empresas inactivas eliminados", total=result.deleted_count)
+
+    logger.info("Snapshots de cumplimiento reconstruidos", total=total)
+    return total
+
+class SnapshotRefresher:
+    """
+    Recalculo incremental con coalescencia.
+
+    Los cambios en vehículos, TUC, conductores o resoluciones marcan la empresa
+    como pendiente; un ciclo en segundo plano recalcula cada empresa una sola vez
+    aunque haya recibido varios cambios seguidos.
+    """
+
+    def __init__(self, delay: float = 1.0):
+        self.delay = delay
+        self._pending: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def schedule(self, *empresa_ids: str):
+        """Marcar empresas para recalcular su snapshot"""
+        self._pending.update(e for e in empresa_ids if e)
+        if self._pending and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._drain())
+
+    async def _drain(self):
+        await asyncio.sleep(self.delay)
+        while self._pending:
+            pending, self._pending = self._pending, set()
+            for empresa_id in pending:
+                try:
+                    await refresh_snapshot(empresa_id)
+                except Exception as e:
+                    logger.error(
+                        "Error al recalcular cumplimiento",
+                        empresa_id=empresa_id,
+                        error=str(e)
+                    )
+
+# Instancia global del recalculador incremental
+snapshot_refresher = SnapshotRefresher()
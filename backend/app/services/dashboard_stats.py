@@ -0,0 +1,225 @@
+"""
+Contadores pre-agregados para el dashboard, mantenidos de forma incremental
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+import structlog
+
+from app.core.config import settings
+from app.core.database import get_collection, tucs_collection
+
+logger = structlog.get_logger()
+
+STATS_COLLECTION = "estadisticas_dashboard"
+
+# Dimensiones contadas por colección: nombre de la dimensión -> ruta del campo
+DIMENSIONS: Dict[str, Dict[str, str]] = {
+    "empresas": {
+        "estado": "estado",
+        "tipoEmpresa": "tipoEmpresa",
+        "provincia": "direccion.provincia",
+    },
+    "vehiculos": {
+        "estado": "estado",
+        "categoria": "categoria",
+    },
+    "tucs": {
+        "estado": "estado",
+    },
+    "expedientes": {
+        "estado": "estado",
+    },
+}
+
+# Ventanas (días) de TUC vigentes por vencer
+VENCIMIENTO_VENTANAS = (30, 60, 90)
+
+# Tiempo máximo de cada conteo de TUC por vencer (ms)
+VENCIMIENTO_MAX_TIME_MS = 2000
+
+SIN_DATO = "SIN_DATO"
+
+def stats_collection():
+    return get_collection(STATS_COLLECTION)
+
+def _value(doc: Dict[str, Any], path: str) -> Any:
+    value: Any = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+def _key(value: Any) -> str:
+    """Los valores se usan como claves de subdocumento: sin puntos ni '$' inicial"""
+    if value is None or value == "":
+        return SIN_DATO
+    return str(value).replace(".", "_").lstrip("$") or SIN_DATO
+
+def _projection(coleccion: str) -> Dict[str, int]:
+    projection = {path: 1 for path in DIMENSIONS[coleccion].values()}
+    projection["estaActivo"] = 1
+    return projection
+
+async def load_dimensions(coleccion: str, entity_id: str) -> Optional[Dict[str, Any]]:
+    """Leer los campos contados de una entidad (antes o después de una mutación)"""
+    try:
+        object_id = ObjectId(entity_id)
+    except (InvalidId, TypeError):
+        return None
+    return await get_collection(coleccion).find_one({"_id": object_id}, _projection(coleccion))
+
+async def apply_change(
+    coleccion: str,
+    before: Optional[Dict[str, Any]],
+    after: Optional[Dict[str, Any]]
+):
+    """
+    Ajustar los contadores con la diferencia entre el estado anterior y el nuevo.
+
+    Solo se cuentan entidades activas; before=None indica creación y un documento
+    inactivo (o None) en after indica eliminación. Los fallos se registran sin
+    interrumpir la mutación: la reconstrucción programada corrige la deriva.
+    """
+    await apply_changes(coleccion, [(before, after)])
+
+async def apply_changes(
+    coleccion: str,
+    changes: Iterable[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]
+):
+    """Ajustar los contadores de varias mutaciones (antes, después) en una sola escritura"""
+    inc: Dict[str, int] = {}
+
+    def add(doc: Optional[Dict[str, Any]], delta: int):
+        if not doc or doc.get("estaActivo") is False:
+            return
+        inc["total"] = inc.get("total", 0) + delta
+        for dimension, path in DIMENSIONS[coleccion].items():
+            field = f"{dimension}.{_key(_value(doc, path))}"
+            inc[field] = inc.get(field, 0) + delta
+
+    for before, after in changes:
+        add(before, -1)
+        add(after, 1)
+    inc = {field: delta for field, delta in inc.items() if delta}
+    if not inc:
+        return
+
+    try:
+        await stats_collection().update_one(
+            {"_id": coleccion},
+            {"$inc": inc, "$set": {"actualizadoEn": datetime.utcnow()}},
+            upsert=True
+        )
+    except Exception as e:
+        logger.warning("No se pudieron actualizar contadores del dashboard", coleccion=coleccion, error=str(e))
+
+async def _aggregate_collection(coleccion: str) -> Dict[str, Any]:
+    dimensions = DIMENSIONS[coleccion]
+    facets: Dict[str, Any] = {"total": [{"$count": "n"}]}
+    for dimension, path in dimensions.items():
+        facets[dimension] = [{"$group": {"_id": f"${path}", "n": {"$sum": 1}}}]
+
+    result = await get_collection(coleccion).aggregate([
+        {"$match": {"estaActivo": True}},
+        {"$project": {path: 1 for path in dimensions.values()}},
+        {"$facet": facets},
+    ], allowDiskUse=True).to_list(length=1)
+    facet = result[0] if result else {}
+
+    doc: Dict[str, Any] = {
+        "_id": coleccion,
+        "total": facet["total"][0]["n"] if facet.get("total") else 0,
+        "actualizadoEn": datetime.utcnow(),
+    }
+    for dimension in dimensions:
+        counts: Dict[str, int] = {}
+        for row in facet.get(dimension, []):
+            key = _key(row["_id"])
+            counts[key] = counts.get(key, 0) + row["n"]
+        doc[dimension] = counts
+    return doc
+
+async def count_vencimientos() -> Dict[str, Any]:
+    """
+    TUC vigentes por vencer en cada ventana, contadas al momento de la lectura.
+
+    Dependen de la fecha actual, así que no se mantienen como contador: cada
+    conteo recorre solo el rango de la ventana en el índice parcial
+    (estado, fechaVencimiento) de TUC activas.
+    """
+    now = datetime.utcnow()
+    tucs = tucs_collection()
+    counts = await asyncio.gather(*(
+        tucs.count_documents({
+            "estaActivo": True,
+            "estado": "VIGENTE",
+            "fechaVencimiento": {"$gte": now, "$lt": now + timedelta(days=dias)},
+        }, maxTimeMS=VENCIMIENTO_MAX_TIME_MS)
+        for dias in VENCIMIENTO_VENTANAS
+    ))
+    return {
+        **{f"dias{dias}": n for dias, n in zip(VENCIMIENTO_VENTANAS, counts)},
+        "actualizadoEn": now,
+    }
+
+async def rebuild_stats() -> Dict[str, Any]:
+    """
+    Recalcular todos los contadores desde las colecciones (ejecución programada).
+
+    Corrige la deriva de los ajustes incrementales.
+    """
+    docs = await asyncio.gather(*(_aggregate_collection(coleccion) for coleccion in DIMENSIONS))
+    collection = stats_collection()
+    for doc in docs:
+        await collection.replace_one({"_id": doc["_id"]}, doc, upsert=True)
+    logger.info("Contadores del dashboard reconstruidos", colecciones=len(docs))
+    return await get_dashboard_stats()
+
+async def get_dashboard_stats() -> Dict[str, Any]:
+    """Leer los contadores del dashboard (un documento por colección) y las TUC por vencer"""
+    stats = {
+        doc.pop("_id"): doc
+        async for doc in stats_collection().find({"_id": {"$in": list(DIMENSIONS)}})
+    }
+    stats["tucs_por_vencer"] = await count_vencimientos()
+    return stats
+
+class StatsRebuilder:
+    """
+    Reconstrucción diferida y coalescida de los contadores.
+
+    Solo para operaciones masivas que no ajustan los contadores documento a
+    documento (importaciones, cascadas de transiciones en lote): varias
+    solicitudes seguidas producen una sola reconstrucción tras `delay`
+    segundos. Las escrituras externas a la API se corrigen con la
+    reconstrucción programada (scripts.dashboard).
+    """
+
+    def __init__(self, delay: float = settings.DASHBOARD_REBUILD_DELAY):
+        self.delay = delay
+        self._dirty = False
+        self._task: Optional[asyncio.Task] = None
+
+    def schedule(self):
+        """Marcar los contadores para reconstruir"""
+        self._dirty = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._drain())
+
+    async def _drain(self):
+        while self._dirty:
+            await asyncio.sleep(self.delay)
+            self._dirty = False
+            try:
+                await rebuild_stats()
+            except Exception as e:
+                logger.error("Error al reconstruir contadores del dashboard", error=str(e))
+
+# Instancia global del reconstructor diferido
+stats_rebuilder = StatsRebuilder()
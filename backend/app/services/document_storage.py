@@ -0,0 +1,223 @@
+"""
+Almacenamiento de documentos direccionado por contenido (local o S3)
+"""
+
+import hashlib
+import os
+import uuid
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import AsyncIterator, Optional
+
+import aiofiles
+import aiofiles.os
+from pydantic import BaseModel
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+class ArchivoDemasiadoGrande(ValueError):
+    """El contenido supera MAX_FILE_SIZE"""
+
+class StoredObject(BaseModel):
+    """Resultado de guardar un contenido"""
+
+    clave: str
+    hash: str
+    tamano: int
+    duplicado: bool = False
+
+def content_key(digest: str) -> str:
+    """Clave del objeto a partir de su SHA-256 (dos niveles de directorios)"""
+    return f"objetos/{digest[:2]}/{digest[2:4]}/{digest}"
+
+class DocumentStorage(ABC):
+    """
+    Interfaz común de almacenamiento.
+
+    `save` consume el contenido por fragmentos, calcula el SHA-256 mientras lo
+    escribe y corta la carga al superar `max_size`. Un contenido idéntico a uno
+    existente no se vuelve a almacenar (deduplicación por hash).
+    """
+
+    nombre: str
+
+    @abstractmethod
+    async def save(self, chunks: AsyncIterator[bytes], max_size: int) -> StoredObject:
+        ...
+
+    @abstractmethod
+    async def delete(self, clave: str):
+        ...
+
+    def local_path(self, clave: str) -> Optional[str]:
+        """Ruta en disco del objeto (solo almacenamiento local)"""
+        return None
+
+    async def download_url(self, clave: str, filename: str) -> Optional[str]:
+        """URL temporal de descarga directa (solo almacenamiento remoto)"""
+        return None
+
+class LocalStorage(DocumentStorage):
+    """Almacenamiento en UPLOAD_DIR; también sirve como reemplazo de S3 en pruebas"""
+
+    nombre = "local"
+
+    def __init__(self, root: str = settings.UPLOAD_DIR):
+        self.root = root
+
+    def local_path(self, clave: str) -> Optional[str]:
+        path = os.path.normpath(os.path.join(self.root, clave))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            return None
+        return path
+
+    async def save(self, chunks: AsyncIterator[bytes], max_size: int) -> StoredObject:
+        tmp_dir = os.path.join(self.root, "tmp")
+        await aiofiles.os.makedirs(tmp_dir, exist_ok=True)
+        tmp_path = os.path.join(tmp_dir, uuid.uuid4().hex)
+
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async with aiofiles.open(tmp_path, "wb") as output:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > max_size:
+                        raise ArchivoDemasiadoGrande(
+                            f"El archivo supera el tamaño máximo de {max_size} bytes"
+                        )
+                    digest.update(chunk)
+                    await output.write(chunk)
+
+            clave = content_key(digest.hexdigest())
+            path = self.local_path(clave)
+            if await aiofiles.os.path.exists(path):
+                await aiofiles.os.remove(tmp_path)
+                return StoredObject(clave=clave, hash=digest.hexdigest(), tamano=size, duplicado=True)
+
+            await aiofiles.os.makedirs(os.path.dirname(path), exist_ok=True)
+            await aiofiles.os.replace(tmp_path, path)
+            return StoredObject(clave=clave, hash=digest.hexdigest(), tamano=size)
+        except BaseException:
+            if await aiofiles.os.path.exists(tmp_path):
+                await aiofiles.os.remove(tmp_path)
+            raise
+
+    async def delete(self, clave: str):
+        path = self.local_path(clave)
+        if path and await aiofiles.os.path.exists(path):
+            await aiofiles.os.remove(path)
+
+class S3Storage(DocumentStorage):
+    """
+    Almacenamiento en AWS S3 (requiere aioboto3).
+
+    El contenido se sube por partes (multipart) a una clave temporal mientras se
+    calcula el hash y luego se copia en el servidor a su clave definitiva.
+    """
+
+    nombre = "s3"
+
+    # Tamaño mínimo de parte admitido por S3 (salvo la última)
+    PART_SIZE = 5 * 1024 * 1024
+
+    def __init__(self, bucket: Optional[str] = settings.AWS_S3_BUCKET):
+        try:
+            import aioboto3
+        except ImportError:
+            raise ValueError("Almacenamiento S3 no disponible (instalar aioboto3)")
+        self.bucket = bucket
+        self.session = aioboto3.Session(
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=settings.AWS_REGION,
+        )
+
+    async def _exists(self, client, clave: str) -> bool:
+        try:
+            await client.head_object(Bucket=self.bucket, Key=clave)
+            return True
+        except client.exceptions.ClientError:
+            return False
+
+    async def save(self, chunks: AsyncIterator[bytes], max_size: int) -> StoredObject:
+        tmp_key = f"tmp/{uuid.uuid4().hex}"
+        digest = hashlib.sha256()
+        size = 0
+
+        async with self.session.client("s3") as client:
+            upload = await client.create_multipart_upload(Bucket=self.bucket, Key=tmp_key)
+            upload_id = upload["UploadId"]
+            parts = []
+            buffer = bytearray()
+
+            async def flush_part():
+                response = await client.upload_part(
+                    Bucket=self.bucket, Key=tmp_key, UploadId=upload_id,
+                    PartNumber=len(parts) + 1, Body=bytes(buffer),
+                )
+                parts.append({"ETag": response["ETag"], "PartNumber": len(parts) + 1})
+                buffer.clear()
+
+            try:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > max_size:
+                        raise ArchivoDemasiadoGrande(
+                            f"El archivo supera el tamaño máximo de {max_size} bytes"
+                        )
+                    digest.update(chunk)
+                    buffer.extend(chunk)
+                    if len(buffer) >= self.PART_SIZE:
+                        await flush_part()
+                if buffer or not parts:
+                    await flush_part()
+                await client.complete_multipart_upload(
+                    Bucket=self.bucket, Key=tmp_key, UploadId=upload_id,
+                    MultipartUpload={"Parts": parts},
+                )
+            except BaseException:
+                await client.abort_multipart_upload(Bucket=self.bucket, Key=tmp_key, UploadId=upload_id)
+                raise
+
+            clave = content_key(digest.hexdigest())
+            duplicado = await self._exists(client, clave)
+            if not duplicado:
+                await client.copy_object(
+                    Bucket=self.bucket, Key=clave,
+                    CopySource={"Bucket": self.bucket, "Key": tmp_key},
+                )
+            await client.delete_object(Bucket=self.bucket, Key=tmp_key)
+
+        return StoredObject(clave=clave, hash=digest.hexdigest(), tamano=size, duplicado=duplicado)
+
+    async def delete(self, clave: str):
+        async with self.session.client("s3") as client:
+            await client.delete_object(Bucket=self.bucket, Key=clave)
+
+    async def download_url(self, clave: str, filename: str) -> Optional[str]:
+        # S3 atiende Range directamente sobre la URL firmada
+        async with self.session.client("s3") as client:
+            return await client.generate_presigned_url(
+                "get_object",
+                Params={
+                    "Bucket": self.bucket,
+                    "Key": clave,
+                    "ResponseContentDisposition": f'attachment; filename="{filename}"',
+                },
+                ExpiresIn=300,
+            )
+
+def create_storage() -> DocumentStorage:
+    """Almacenamiento según DOCUMENT_STORAGE ("local" o "s3")"""
+    if settings.DOCUMENT_STORAGE == "s3":
+        return S3Storage()
+    return LocalStorage()
+
+@lru_cache()
+def get_storage() -> DocumentStorage:
+    """Instancia compartida del almacenamiento configurado"""
+    return create_storage()
@@ -0,0 +1,113 @@
+"""
+Registro de documentos (colección `documentos`) sobre el almacenamiento por contenido
+"""
+
+import mimetypes
+import os
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+import structlog
+
+from app.core.config import settings
+from app.core.database import documentos_collection
+from app.services.document_storage import get_storage
+
+logger = structlog.get_logger()
+
+def validate_filename(nombre_archivo: str) -> str:
+    """Normalizar el nombre y verificar la extensión contra ALLOWED_FILE_TYPES"""
+    nombre = os.path.basename(nombre_archivo or "").strip()
+    extension = os.path.splitext(nombre)[1].lstrip(".").lower()
+    if not nombre or extension not in settings.ALLOWED_FILE_TYPES:
+        raise ValueError(
+            f"Tipo de archivo no permitido. Permitidos: {', '.join(settings.ALLOWED_FILE_TYPES)}"
+        )
+    return nombre
+
+def _content_type(nombre: str, declarado: Optional[str]) -> str:
+    if declarado and declarado != "application/octet-stream":
+        return declarado
+    return mimetypes.guess_type(nombre)[0] or "application/octet-stream"
+
+async def save_document(
+    chunks: AsyncIterator[bytes],
+    nombre_archivo: str,
+    tipo_documento: str,
+    entidad_asociada_id: Optional[str],
+    user_id: str,
+    content_type: Optional[str] = None
+) -> Dict[str, Any]:
+    """Guardar el contenido en el almacenamiento y registrar el documento"""
+    nombre = validate_filename(nombre_archivo)
+    storage = get_storage()
+    stored = await storage.save(chunks, settings.MAX_FILE_SIZE)
+
+    documento_id = ObjectId()
+    doc = {
+        "_id": documento_id,
+        "nombreArchivo": nombre,
+        "url": f"/api/v1/documentos/{documento_id}/descargar",
+        "tipoDocumento": tipo_documento,
+        "entidadAsociadaId": entidad_asociada_id,
+        "contentType": _content_type(nombre, content_type),
+        "tamano": stored.tamano,
+        "hash": stored.hash,
+        "almacenamiento": storage.nombre,
+        "clave": stored.clave,
+        "fechaSubida": datetime.utcnow(),
+        "usuarioSubidaId": user_id,
+        "estaActivo": True,
+    }
+    await documentos_collection().insert_one(doc)
+
+    logger.info(
+        "Documento almacenado",
+        documento_id=str(documento_id),
+        tamano=stored.tamano,
+        duplicado=stored.duplicado
+    )
+    return doc
+
+async def get_document(documento_id: str) -> Optional[Dict[str, Any]]:
+    """Metadatos de un documento activo"""
+    try:
+        object_id = ObjectId(documento_id)
+    except (InvalidId, TypeError):
+        return None
+    return await documentos_collection().find_one({"_id": object_id, "estaActivo": True})
+
+async def delete_document(documento_id: str) -> bool:
+    """
+    Borrado lógico del documento.
+
+    El contenido se conserva: por la deduplicación puede estar referenciado por
+    otros documentos con el mismo hash.
+    """
+    try:
+        object_id = ObjectId(documento_id)
+    except (InvalidId, TypeError):
+        return False
+    result = await documentos_collection().update_one(
+        {"_id": object_id, "estaActivo": True},
+        {"$set": {"estaActivo": False, "fechaEliminacion": datetime.utcnow()}}
+    )
+    return result.modified_count > 0
+
+async def delete_documents(documento_ids: Iterable[Any]) -> int:
+    """Borrado lógico de varios documentos en una sola escritura"""
+    object_ids = []
+    for documento_id in documento_ids:
+        try:
+            object_ids.append(ObjectId(documento_id))
+        except (InvalidId, TypeError):
+            continue
+    if not object_ids:
+        return 0
+    result = await documentos_collection().update_many(
+        {"_id": {"$in": object_ids}, "estaActivo": True},
+        {"$set": {"estaActivo": False, "fechaEliminacion": datetime.utcnow()}}
+    )
+    return result.modified_count
@@ -0,0 +1,101 @@
+"""
+Construcción de consultas y paginación por cursor para empresas
+"""
+
+from typing import Any, Dict, Optional
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import ExecutionTimeout
+
+from app.core.database import empresas_collection
+from app.core.pagination import paginate_keyset
+from app.models.empresa import EmpresaTransporte, EmpresaFilters
+from app.services.empresa_search import build_search_query
+from app.schemas.pagination import CursorPaginatedResponse
+
+# Campos por los que se permite ordenar en la paginación por cursor
+EMPRESA_SORT_FIELDS = {
+    "fechaRegistro": "fechaRegistro",
+    "ruc": "ruc",
+    "razonSocial": "razonSocial.principal",
+}
+
+# El conteo se detiene en este número de documentos o tiempo (ms); al
+# alcanzarlo el total se reporta como cota inferior (total_estimado)
+COUNT_LIMIT = 10000
+COUNT_MAX_TIME_MS = 2000
+
+def build_empresa_query(filters: Optional[EmpresaFilters]) -> Dict[str, Any]:
+    """Traducir EmpresaFilters a un filtro de MongoDB"""
+    query: Dict[str, Any] = {"estaActivo": True}
+    if not filters:
+        return query
+
+    if filters.tipoEmpresa:
+        query["tipoEmpresa"] = filters.tipoEmpresa
+    if filters.categoria:
+        query["categoria"] = filters.categoria
+    if filters.estado:
+        query["estado"] = filters.estado
+    if filters.departamento:
+        query["direccion.departamento"] = filters.departamento
+    if filters.provincia:
+        query["direccion.provincia"] = filters.provincia
+
+    if filters.search:
+        query.update(build_search_query(filters.search))
+
+    return query
+
+def empresa_from_document(doc: Dict[str, Any]) -> EmpresaTransporte:
+    """Convertir un documento de MongoDB al modelo de respuesta"""
+    doc["id"] = str(doc.pop("_id"))
+    return EmpresaTransporte(**doc)
+
+async def list_empresas_cursor(
+    cursor: Optional[str],
+    limit: int,
+    filters: Optional[EmpresaFilters],
+    sort_by: str = "fechaRegistro",
+    descending: bool = True,
+    incluir_total: bool = False
+) -> CursorPaginatedResponse[EmpresaTransporte]:
+    """
+    Listar empresas con paginación keyset.
+
+    El total solo se calcula si se solicita, con un count_documents sobre el
+    mismo filtro (incluye estaActivo) acotado en documentos y tiempo.
+    """
+    if sort_by not in EMPRESA_SORT_FIELDS:
+        raise ValueError(f"Campo de ordenamiento no permitido: {sort_by}")
+
+    collection = empresas_collection()
+    query = build_empresa_query(filters)
+    docs, next_cursor = await paginate_keyset(
+        collection,
+        query,
+        EMPRESA_SORT_FIELDS[sort_by],
+        DESCENDING if descending else ASCENDING,
+        limit,
+        cursor or None,
+    )
+
+    total = None
+    total_estimado = False
+    if incluir_total:
+        try:
+            total = await collection.count_documents(
+                query, limit=COUNT_LIMIT, maxTimeMS=COUNT_MAX_TIME_MS
+            )
+            total_estimado = total >= COUNT_LIMIT
+        except ExecutionTimeout:
+            total = None
+
+    return CursorPaginatedResponse[EmpresaTransporte](
+        data=[empresa_from_document(doc) for doc in docs],
+        limit=limit,
+        next_cursor=next_cursor,
+        has_more=next_cursor is not None,
+        total=total,
+        total_estimado=total_estimado,
+    )
@@ -0,0 +1,240 @@
+"""
+Búsqueda de empresas por RUC, razón social y representante legal
+"""
+
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import UpdateOne
+import structlog
+
+from app.core.database import empresas_collection
+
+logger = structlog.get_logger()
+
+# Campos de texto que alimentan los términos de búsqueda
+RAZON_SOCIAL_FIELDS = ("principal", "sunat", "minimo")
+
+# Proyección mínima devuelta por la búsqueda
+SEARCH_PROJECTION = {
+    "ruc": 1,
+    "razonSocial": 1,
+    "estado": 1,
+    "representanteLegal.dni": 1,
+    "representanteLegal.nombres": 1,
+    "representanteLegal.apellidos": 1,
+    "busqueda.terminos": 1,
+    "busqueda.razonSocial": 1,
+}
+
+# Candidatos por resultado pedido: la relevancia se calcula sobre a lo sumo
+# `limit * CANDIDATE_FACTOR` documentos leídos en el orden del índice
+CANDIDATE_FACTOR = 20
+
+_TOKEN_SPLIT = re.compile(r"[^0-9a-z]+")
+
+def normalize(text: Optional[str]) -> str:
+    """Pasar a minúsculas y eliminar tildes/diacríticos"""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower().strip()
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Separar un texto normalizado en términos"""
+    return [token for token in _TOKEN_SPLIT.split(normalize(text)) if token]
+
+def build_search_fields(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Calcular el subdocumento `busqueda` precomputado de una empresa"""
+    razon_social = doc.get("razonSocial") or {}
+    if isinstance(razon_social, str):
+        razon_social = {"principal": razon_social}
+    representante = doc.get("representanteLegal") or {}
+
+    terminos = set()
+    for field in RAZON_SOCIAL_FIELDS:
+        terminos.update(tokenize(razon_social.get(field)))
+    terminos.update(tokenize(representante.get("nombres")))
+    terminos.update(tokenize(representante.get("apellidos")))
+
+    return {
+        "terminos": sorted(terminos),
+        "razonSocial": normalize(razon_social.get("principal")),
+    }
+
+async def update_search_fields(empresa_id: str):
+    """
+    Recalcular los términos de búsqueda de una empresa tras crearla o actualizarla.
+
+    Los endpoints de creación y actualización la llaman después de confirmada
+    la escritura de la empresa, por lo que un fallo aquí no debe convertir la operación en un error: se
+    registra y los términos se corrigen con `python -m scripts.search rebuild`.
+    """
+    collection = empresas_collection()
+    try:
+        doc = await collection.find_one(
+            {"_id": ObjectId(empresa_id)},
+            {"razonSocial": 1, "representanteLegal": 1}
+        )
+        if not doc:
+            return
+        await collection.update_one(
+            {"_id": doc["_id"]},
+            {"$set": {"busqueda": build_search_fields(doc)}}
+        )
+    except Exception as e:
+        logger.error("No se pudieron actualizar los términos de búsqueda", empresa_id=empresa_id, error=str(e))
+
+async def rebuild_search_fields(batch_size: int = 1000) -> int:
+    """Recalcular los términos de búsqueda de todas las empresas"""
+    collection = empresas_collection()
+    cursor = collection.find({}, {"razonSocial": 1, "representanteLegal": 1})
+    updated = 0
+    batch: List[UpdateOne] = []
+
+    async for doc in cursor:
+        batch.append(UpdateOne(
+            {"_id": doc["_id"]},
+            {"$set": {"busqueda": build_search_fields(doc)}}
+        ))
+        if len(batch) >= batch_size:
+            await collection.bulk_write(batch, ordered=False)
+            updated += len(batch)
+            batch = []
+
+    if batch:
+        await collection.bulk_write(batch, ordered=False)
+        updated += len(batch)
+
+    logger.info("Términos de búsqueda de empresas recalculados", total=updated)
+    return updated
+
+def build_search_query(search: str) -> Dict[str, Any]:
+    """
+    Construir el filtro de búsqueda.
+
+    - 11 dígitos: RUC exacto (índice único)
+    - 8 dígitos: DNI del representante legal o prefijo de RUC
+    - otros dígitos: prefijo de RUC
+    - texto: prefijo de cada término sobre `busqueda.terminos`
+    """
+    term = search.strip()
+    if term.isdigit():
+        if len(term) == 11:
+            return {"ruc": term}
+        if len(term) == 8:
+            return {"$or": [
+                {"representanteLegal.dni": term},
+                {"ruc": {"$regex": f"^{term}"}},
+            ]}
+        return {"ruc": {"$regex": f"^{term}"}}
+
+    tokens = tokenize(term)
+    if not tokens:
+        return {}
+    clauses = [{"busqueda.terminos": {"$regex": f"^{re.escape(token)}"}} for token in tokens]
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def build_exact_query(search: str) -> Dict[str, Any]:
+    """
+    Filtro de coincidencias exactas, que se leen antes que los prefijos:
+    RUC u 8 dígitos (DNI o RUC) y texto con todos sus términos completos.
+    """
+    term = search.strip()
+    if term.isdigit():
+        if len(term) == 8:
+            return {"$or": [{"representanteLegal.dni": term}, {"ruc": term}]}
+        return {"ruc": term} if len(term) == 11 else {}
+
+    tokens = tokenize(term)
+    return {"busqueda.terminos": {"$all": tokens}} if tokens else {}
+
+def _starts_with(expression: Any, prefix: str) -> Dict[str, Any]:
+    return {"$eq": [{"$indexOfBytes": [{"$ifNull": [expression, ""]}, prefix]}, 0]}
+
+def relevance_expression(search: str) -> Dict[str, Any]:
+    """
+    Puntaje de relevancia calculado en MongoDB sobre el conjunto acotado de
+    candidatos, antes de aplicar el límite
+    """
+    term = search.strip()
+    terminos = {"$ifNull": ["$busqueda.terminos", []]}
+    parts: List[Any] = [
+        {"$cond": [{"$eq": ["$ruc", term]}, 1000, 0]},
+        {"$cond": [{"$eq": ["$representanteLegal.dni", term]}, 500, 0]},
+        {"$cond": [_starts_with("$busqueda.razonSocial", normalize(term)), 20, 0]} if normalize(term) else 0,
+    ]
+    if term.isdigit():
+        parts.append({"$cond": [_starts_with("$ruc", term), 100, 0]})
+    for token in tokenize(term):
+        parts.append({"$cond": [
+            {"$in": [token, terminos]},
+            10,
+            {"$cond": [
+                {"$gt": [{"$size": {"$filter": {
+                    "input": terminos,
+                    "cond": _starts_with("$$this", token),
+                }}}, 0]},
+                5,
+                0,
+            ]},
+        ]})
+    return {"$add": parts}
+
+async def search_empresas(search: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    Buscar empresas activas ordenadas por relevancia.
+
+    Los candidatos se acotan antes de puntuar: primero las coincidencias
+    exactas (RUC, DNI o términos completos) y luego un recorrido por prefijo
+    en el orden del índice, cada uno con un tope de `limit * CANDIDATE_FACTOR`
+    documentos. Un prefijo común ("trans", "sac") no recorre toda la colección.
+    """
+    query = build_search_query(search)
+    if not query:
+        return []
+
+    cap = limit * CANDIDATE_FACTOR
+    prefix_stages = [{"$match": {"estaActivo": True, **query}}, {"$limit": cap}]
+    exact = build_exact_query(search)
+    if exact and exact != query:
+        candidates = [
+            {"$match": {"estaActivo": True, **exact}},
+            {"$limit": cap},
+            {"$unionWith": {"coll": empresas_collection().name, "pipeline": prefix_stages}},
+            # Un documento exacto también aparece en el recorrido por prefijo
+            {"$group": {"_id": "$_id", "doc": {"$first": "$$ROOT"}}},
+            {"$replaceRoot": {"newRoot": "$doc"}},
+        ]
+    else:
+        candidates = prefix_stages
+
+    pipeline = [
+        *candidates,
+        {"$project": SEARCH_PROJECTION},
+        {"$addFields": {
+            "relevancia": relevance_expression(search),
+            "longitud": {"$strLenCP": {"$ifNull": ["$busqueda.razonSocial", ""]}},
+        }},
+        {"$sort": {"relevancia": -1, "longitud": 1, "_id": 1}},
+        {"$limit": limit},
+    ]
+    docs = await empresas_collection().aggregate(pipeline).to_list(length=limit)
+
+    results = []
+    for doc in docs:
+        razon_social = doc.get("razonSocial") or {}
+        representante = doc.get("representanteLegal") or {}
+        results.append({
+            "id": str(doc["_id"]),
+            "ruc": doc.get("ruc"),
+            "razonSocial": razon_social.get("principal") if isinstance(razon_social, dict) else razon_social,
+            "estado": doc.get("estado"),
+            "representanteLegal": " ".join(
+                part for part in (representante.get("nombres"), representante.get("apellidos")) if part
+            ) or None,
+            "relevancia": doc.get("relevancia", 0),
+        })
+    return results
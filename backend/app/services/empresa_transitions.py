@@ -0,0 +1,241 @@
+"""
+Transiciones de estado de empresas en lote (suspender, reactivar, eliminar)
+"""
+
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
+import structlog
+
+from app.core import database
+from app.core.cache import cache
+from app.core.database import (
+    get_collection,
+    empresas_collection,
+    vehiculos_collection,
+    rutas_collection,
+    tucs_collection,
+    conductores_collection,
+)
+from app.services import tuc_verification
+from app.services.cumplimiento_service import snapshot_refresher
+from app.services.dashboard_stats import DIMENSIONS, apply_changes, stats_rebuilder
+
+logger = structlog.get_logger()
+
+# Código de MongoDB cuando el servidor no admite transacciones (nodo único)
+ILLEGAL_OPERATION = 20
+
+# Acción -> (estado destino, estados de origen admitidos)
+TRANSICIONES: Dict[str, Tuple[str, List[str]]] = {
+    "suspender": ("SUSPENDIDA", ["HABILITADA"]),
+    "reactivar": ("HABILITADA", ["SUSPENDIDA"]),
+    "eliminar": ("CANCELADA", ["HABILITADA", "SUSPENDIDA"]),
+}
+
+def _projection() -> Dict[str, int]:
+    projection = {path: 1 for path in DIMENSIONS["empresas"].values()}
+    projection.update({"estaActivo": 1, "ruc": 1})
+    return projection
+
+async def _in_transaction(operation: Callable[[Any], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Ejecutar la operación en una transacción (con los reintentos de with_transaction).
+
+    En un nodo único sin replica set la primera escritura falla sin efectos y
+    se repite la operación sin sesión.
+    """
+    async with await database.mongodb_client.start_session() as session:
+        try:
+            return await session.with_transaction(operation)
+        except OperationFailure as e:
+            if e.code != ILLEGAL_OPERATION:
+                raise
+    logger.warning("MongoDB sin soporte de transacciones, lote aplicado sin transacción")
+    return await operation(None)
+
+async def _unlink(
+    session,
+    empresa_ids: List[Any],
+    motivo: str,
+    user_id: str,
+    lote_id: ObjectId,
+    now: datetime
+) -> Dict[str, Any]:
+    """
+    Desvincular vehículos, rutas y conductores de las empresas eliminadas y dar
+    de baja sus TUC vigentes, con una actualización por colección.
+    """
+    refs = empresa_ids + [str(i) for i in empresa_ids]
+    desvincular = [{"$set": {"empresaAnteriorId": "$empresaId", "empresaId": None, "actualizadoEn": now}}]
+
+    vehiculos = await vehiculos_collection().find(
+        {"empresaId": {"$in": refs}, "estaActivo": True}, {"empresaId": 1}, session=session
+    ).to_list(length=None)
+    if vehiculos:
+        await vehiculos_collection().update_many(
+            {"_id": {"$in": [v["_id"] for v in vehiculos]}}, desvincular, session=session
+        )
+        await get_collection("vehiculos_historial").insert_many([
+            {
+                "vehiculoId": v["_id"],
+                "fechaCambio": now,
+                "tipoCambio": "DESVINCULACION",
+                "usuarioId": user_id,
+                "detalles": {"empresaAnteriorId": str(v["empresaId"]), "motivo": motivo, "loteId": str(lote_id)},
+            }
+            for v in vehiculos
+        ], session=session)
+
+    rutas = await rutas_collection().update_many(
+        {"empresaId": {"$in": refs}, "estaActivo": True}, desvincular, session=session
+    )
+
+    numeros = await tucs_collection().distinct(
+        "numero", {"empresaId": {"$in": refs}, "estado": "VIGENTE", "estaActivo": True}, session=session
+    )
+    if numeros:
+        await tucs_collection().update_many(
+            {"empresaId": {"$in": refs}, "estado": "VIGENTE", "estaActivo": True},
+            {"$set": {"estado": "DADA_DE_BAJA", "razonBaja": motivo, "fechaBaja": now, "actualizadoEn": now}},
+            session=session
+        )
+
+    conductores = await conductores_collection().update_many(
+        {"empresasAsociadasIds": {"$in": refs}},
+        {"$pull": {"empresasAsociadasIds": {"$in": refs}}, "$set": {"actualizadoEn": now}},
+        session=session
+    )
+
+    return {
+        "vehiculosDesvinculados": len(vehiculos),
+        "rutasDesvinculadas": rutas.modified_count,
+        "tucsDadasDeBaja": len(numeros),
+        "conductoresDesvinculados": conductores.modified_count,
+        "tucNumeros": numeros,
+    }
+
+async def transition_empresas(
+    accion: str,
+    empresa_ids: List[str],
+    motivo: str,
+    user_id: str
+) -> Dict[str, Any]:
+    """
+    Aplicar una transición de estado a varias empresas en una sola transacción.
+
+    Solo cambian las empresas activas cuyo estado admite la transición; el
+    resto se informa en `omitidas`. Las actualizaciones de empresas van en un
+    bulk_write con el estado de origen como condición, y el historial se
+    inserta en bloque.
+    """
+    if accion not in TRANSICIONES:
+        raise ValueError(f"Acción no soportada: {accion}")
+    estado_destino, estados_origen = TRANSICIONES[accion]
+
+    object_ids: List[ObjectId] = []
+    omitidas: List[Dict[str, str]] = []
+    for empresa_id in dict.fromkeys(empresa_ids):
+        try:
+            object_ids.append(ObjectId(empresa_id))
+        except (InvalidId, TypeError):
+            omitidas.append({"empresaId": empresa_id, "motivo": "ID inválido"})
+
+    lote_id = ObjectId()
+    condicion = {"estaActivo": True, "estado": {"$in": estados_origen}}
+
+    async def operation(session) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        empresas = await empresas_collection().find(
+            {"_id": {"$in": object_ids}, **condicion}, _projection(), session=session
+        ).to_list(length=None)
+        result: Dict[str, Any] = {"empresas": empresas, "cascada": None}
+        if not empresas:
+            return result
+
+        cambios: Dict[str, Any] = {"estado": estado_destino, "actualizadoEn": now}
+        if accion == "eliminar":
+            cambios.update({"estaActivo": False, "fechaEliminacion": now, "eliminadoPorId": user_id})
+        elif accion == "suspender":
+            cambios.update({"motivoSuspension": motivo, "fechaSuspension": now})
+
+        await empresas_collection().bulk_write([
+            UpdateOne({"_id": empresa["_id"], **condicion}, {"$set": cambios})
+            for empresa in empresas
+        ], ordered=False, session=session)
+
+        if accion == "eliminar":
+            result["cascada"] = await _unlink(
+                session, [e["_id"] for e in empresas], motivo, user_id, lote_id, now
+            )
+
+        await get_collection("empresas_historial").insert_many([
+            {
+                "empresaId": empresa["_id"],
+                "fechaCambio": now,
+                "tipoCambio": "CAMBIO_ESTADO",
+                "usuarioId": user_id,
+                "detalles": {
+                    "accion": accion.upper(),
+                    "estadoAnterior": empresa.get("estado"),
+                    "estadoNuevo": estado_destino,
+                    "motivo": motivo,
+                    "loteId": str(lote_id),
+                },
+            }
+            for empresa in empresas
+        ], session=session)
+        return result
+
+    result = await _in_transaction(operation)
+    empresas = result["empresas"]
+    cascada = result["cascada"] or {}
+
+    # Efectos posteriores al commit: caches, contadores y snapshots
+    procesadas = [str(e["_id"]) for e in empresas]
+    encontradas = set(procesadas)
+    omitidas.extend(
+        {"empresaId": str(i), "motivo": f"No encontrada o estado no admite '{accion}'"}
+        for i in object_ids if str(i) not in encontradas
+    )
+    if procesadas:
+        await cache.delete(*[
+            cache.key(namespace, empresa_id)
+            for empresa_id in procesadas
+            for namespace in ("empresa", "empresa_historial", "empresa_cumplimiento")
+        ])
+        after: Dict[str, Any] = {"estado": estado_destino}
+        if accion == "eliminar":
+            after["estaActivo"] = False
+        await apply_changes("empresas", [(empresa, {**empresa, **after}) for empresa in empresas])
+        snapshot_refresher.schedule(*procesadas)
+    numeros = cascada.pop("tucNumeros", [])
+    if numeros:
+        await cache.invalidate(tuc_verification.NAMESPACE, *numeros)
+    # La cascada no ajusta los contadores documento a documento
+    if any(cascada.values()):
+        stats_rebuilder.schedule()
+
+    logger.info(
+        "Transición de empresas en lote",
+        accion=accion,
+        lote_id=str(lote_id),
+        procesadas=len(procesadas),
+        omitidas=len(omitidas),
+        **cascada
+    )
+    return {
+        "loteId": str(lote_id),
+        "accion": accion,
+        "estado": estado_destino,
+        "procesadas": procesadas,
+        "omitidas": omitidas,
+        "vehiculosDesvinculados": cascada.get("vehiculosDesvinculados", 0),
+        "rutasDesvinculadas": cascada.get("rutasDesvinculadas", 0),
+        "tucsDadasDeBaja": cascada.get("tucsDadasDeBaja", 0),
+        "conductoresDesvinculados": cascada.get("conductoresDesvinculados", 0),
+    }
@@ -0,0 +1,261 @@
+"""
+Escáner incremental de vencimientos (TUC, licencias de conducir, habilitaciones)
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pydantic import BaseModel
+import structlog
+
+from app.core.config import settings
+from app.core.database import get_collection, empresas_collection
+from app.services.notificaciones_service import new_notification, insert_notifications
+
+logger = structlog.get_logger()
+
+CHECKPOINT_COLLECTION = "scheduler_checkpoints"
+
+# Documentos por lote de inserción de notificaciones
+BATCH_SIZE = 500
+
+class ExpiryTarget(BaseModel):
+    """Campo de vencimiento a vigilar en una colección"""
+
+    nombre: str
+    coleccion: str
+    campo: str
+    tipo: str
+    titulo: str
+    filtro: Dict[str, Any]
+    proyeccion: Dict[str, int]
+
+EXPIRY_TARGETS: List[ExpiryTarget] = [
+    ExpiryTarget(
+        nombre="tucs",
+        coleccion="tucs",
+        campo="fechaVencimiento",
+        tipo="VENCIMIENTO_TUC",
+        titulo="TUC próxima a vencer",
+        filtro={"estaActivo": True, "estado": "VIGENTE"},
+        proyeccion={"numero": 1, "empresaId": 1, "vehiculoId": 1, "fechaVencimiento": 1},
+    ),
+    ExpiryTarget(
+        nombre="licencias",
+        coleccion="conductores",
+        campo="fechaVencimientoLicencia",
+        tipo="VENCIMIENTO_LICENCIA",
+        titulo="Licencia de conducir próxima a vencer",
+        filtro={"estaActivo": True},
+        proyeccion={
+            "dni": 1, "nombres": 1, "apellidos": 1, "contacto.email": 1,
+            "empresasAsociadasIds": 1, "fechaVencimientoLicencia": 1,
+        },
+    ),
+    ExpiryTarget(
+        nombre="habilitaciones",
+        coleccion="empresas",
+        campo="fechaVencimiento",
+        tipo="VENCIMIENTO_HABILITACION",
+        titulo="Habilitación de empresa próxima a vencer",
+        filtro={"estaActivo": True},
+        proyeccion={"ruc": 1, "razonSocial.principal": 1, "contacto.email": 1, "fechaVencimiento": 1},
+    ),
+]
+
+def checkpoints_collection():
+    return get_collection(CHECKPOINT_COLLECTION)
+
+def _checkpoint_id(target: ExpiryTarget) -> str:
+    return f"vencimientos:{target.nombre}"
+
+def _object_id(value: Any) -> Any:
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return value
+
+async def _empresa_emails(ids: List[Any]) -> Dict[str, Optional[str]]:
+    """Correo de contacto de las empresas referenciadas en un lote (una sola consulta)"""
+    if not ids:
+        return {}
+    cursor = empresas_collection().find(
+        {"_id": {"$in": [_object_id(i) for i in set(ids)]}},
+        {"contacto.email": 1}
+    )
+    return {str(doc["_id"]): (doc.get("contacto") or {}).get("email") async for doc in cursor}
+
+def _fecha(value: datetime) -> str:
+    return value.strftime("%d/%m/%Y")
+
+async def _build_notifications(target: ExpiryTarget, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    notifications = []
+
+    if target.nombre == "tucs":
+        emails = await _empresa_emails([d.get("empresaId") for d in docs if d.get("empresaId")])
+        for doc in docs:
+            empresa_id = str(doc.get("empresaId") or "")
+            vence = doc[target.campo]
+            notifications.append(new_notification(
+                target.tipo,
+                target.titulo,
+                f"La TUC {doc.get('numero')} vence el {_fecha(vence)}.",
+                {"tipo": "EMPRESA", "id": empresa_id, "email": emails.get(empresa_id)},
+                f"{target.tipo}:{doc['_id']}:{vence:%Y-%m-%d}",
+                entidad=target.coleccion,
+                entidadId=str(doc["_id"]),
+                fechaVencimiento=vence,
+            ))
+
+    elif target.nombre == "licencias":
+        for doc in docs:
+            vence = doc[target.campo]
+            nombre = " ".join(p for p in (doc.get("nombres"), doc.get("apellidos")) if p)
+            notifications.append(new_notification(
+                target.tipo,
+                target.titulo,
+                f"La licencia de conducir de {nombre} (DNI {doc.get('dni')}) vence el {_fecha(vence)}.",
+                {
+                    "tipo": "CONDUCTOR",
+                    "id": str(doc["_id"]),
+                    "email": (doc.get("contacto") or {}).get("email"),
+                },
+                f"{target.tipo}:{doc['_id']}:{vence:%Y-%m-%d}",
+                entidad=target.coleccion,
+                entidadId=str(doc["_id"]),
+                empresasIds=[str(e) for e in doc.get("empresasAsociadasIds") or []],
+                fechaVencimiento=vence,
+            ))
+
+    else:
+        for doc in docs:
+            vence = doc[target.campo]
+            razon_social = (doc.get("razonSocial") or {}).get("principal")
+            notifications.append(new_notification(
+                target.tipo,
+                target.titulo,
+                f"La habilitación de {razon_social} (RUC {doc.get('ruc')}) vence el {_fecha(vence)}.",
+                {
+                    "tipo": "EMPRESA",
+                    "id": str(doc["_id"]),
+                    "email": (doc.get("contacto") or {}).get("email"),
+                },
+                f"{target.tipo}:{doc['_id']}:{vence:%Y-%m-%d}",
+                entidad=target.coleccion,
+                entidadId=str(doc["_id"]),
+                fechaVencimiento=vence,
+            ))
+
+    return notifications
+
+# Margen sobre la ejecución anterior para cubrir escrituras concurrentes con ella
+MODIFIED_MARGIN = timedelta(minutes=1)
+
+async def _notify(target: ExpiryTarget, query: Dict[str, Any]) -> int:
+    """Generar las notificaciones de los documentos que cumplen la consulta, por lotes"""
+    cursor = get_collection(target.coleccion) \
+        .find(query, target.proyeccion) \
+        .sort(target.campo, 1) \
+        .batch_size(BATCH_SIZE)
+
+    created = 0
+    batch: List[Dict[str, Any]] = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= BATCH_SIZE:
+            created += await insert_notifications(await _build_notifications(target, batch))
+            batch = []
+    if batch:
+        created += await insert_notifications(await _build_notifications(target, batch))
+    return created
+
+async def scan_target(target: ExpiryTarget, now: Optional[datetime] = None) -> int:
+    """
+    Procesar los documentos que entraron en la ventana de aviso desde la última ejecución.
+
+    La ventana es [checkpoint, ahora + NOTIFICATION_VENCIMIENTO_ANTICIPADO); al
+    terminar, el checkpoint avanza al límite superior. Cada ejecución recorre
+    solo el tramo nuevo del índice sobre el campo de vencimiento. Si falla antes
+    de avanzar, el tramo se reprocesa y el índice único evita duplicados.
+
+    Una segunda pasada cubre los documentos creados o renovados después de la
+    ejecución anterior cuyo vencimiento cae en el tramo ya recorrido (p. ej. una
+    TUC emitida hoy que vence en 10 días).
+    """
+    now = now or datetime.utcnow()
+    horizonte = now + timedelta(days=settings.NOTIFICATION_VENCIMIENTO_ANTICIPADO)
+    checkpoint = await checkpoints_collection().find_one({"_id": _checkpoint_id(target)})
+    desde = max(checkpoint["hasta"], now) if checkpoint else now
+
+    created = 0
+    if desde < horizonte:
+        created += await _notify(target, {**target.filtro, target.campo: {"$gte": desde, "$lt": horizonte}})
+
+    if checkpoint and checkpoint.get("ejecutadoEn") and desde > now:
+        modificados_desde = checkpoint["ejecutadoEn"] - MODIFIED_MARGIN
+        created += await _notify(target, {
+            **target.filtro,
+            target.campo: {"$gte": now, "$lt": desde},
+            "$or": [
+                {"actualizadoEn": {"$gte": modificados_desde}},
+                {"_id": {"$gte": ObjectId.from_datetime(modificados_desde)}},
+            ],
+        })
+
+    await checkpoints_collection().update_one(
+        {"_id": _checkpoint_id(target)},
+        {"$set": {"hasta": max(horizonte, desde), "ejecutadoEn": now, "creadas": created}},
+        upsert=True
+    )
+    logger.info(
+        "Vencimientos procesados",
+        objetivo=target.nombre,
+        desde=desde.isoformat(),
+        hasta=horizonte.isoformat(),
+        notificaciones=created
+    )
+    return created
+
+async def scan_all() -> Dict[str, int]:
+    """Ejecutar el escáner sobre todos los campos de vencimiento"""
+    results = {}
+    for target in EXPIRY_TARGETS:
+        try:
+            results[target.nombre] = await scan_target(target)
+        except Exception as e:
+            logger.error("Error al procesar vencimientos", objetivo=target.nombre, error=str(e))
+    return results
+
+class ExpiryScheduler:
+    """Ejecución periódica del escáner dentro del proceso de la API"""
+
+    def __init__(self, interval: float = settings.EXPIRY_SCAN_INTERVAL):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if not settings.EXPIRY_SCAN_ENABLED or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info("Escáner de vencimientos iniciado", intervalo=self.interval)
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await scan_all()
+            await asyncio.sleep(self.interval)
+
+# Instancia global del programador de vencimientos
+expiry_scheduler = ExpiryScheduler()
@@ -0,0 +1,218 @@
+"""
+Exportación en streaming (CSV / XLSX) de listados de empresas y vehículos
+"""
+
+import asyncio
+import csv
+import io
+import os
+import uuid
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+# Cada columna: clave -> (encabezado, ruta con puntos o función sobre el documento)
+ColumnSpec = Tuple[str, Union[str, Callable[[Dict[str, Any]], Any]]]
+
+def _nombre_representante(doc: Dict[str, Any]) -> str:
+    representante = doc.get("representanteLegal") or {}
+    return " ".join(p for p in (representante.get("nombres"), representante.get("apellidos")) if p)
+
+# Claves alineadas con el selector de columnas del frontend
+EMPRESA_EXPORT_COLUMNS: Dict[str, ColumnSpec] = {
+    "ruc": ("RUC", "ruc"),
+    "razonSocial": ("Razón Social", "razonSocial.principal"),
+    "razonSocialSunat": ("Razón Social SUNAT", "razonSocial.sunat"),
+    "nombreCorto": ("Nombre Corto", "razonSocial.minimo"),
+    "nombreComercial": ("Nombre Comercial", "nombreComercial"),
+    "tipoEmpresa": ("Tipo", "tipoEmpresa"),
+    "representanteLegal.dni": ("DNI Representante", "representanteLegal.dni"),
+    "representanteLegal.nombre": ("Representante Legal", _nombre_representante),
+    "contacto.telefono": ("Teléfono", "contacto.telefono"),
+    "contacto.email": ("Email", "contacto.email"),
+    "direccion.departamento": ("Departamento", "direccion.departamento"),
+    "direccion.provincia": ("Provincia", "direccion.provincia"),
+    "direccion.distrito": ("Distrito", "direccion.distrito"),
+    "expediente.numero": ("Expediente", "expediente.numero"),
+    "expediente.fecha": ("Fecha Expediente", "expediente.fecha"),
+    "estado": ("Estado", "estado"),
+    "fechaCreacion": ("Fecha Registro", "fechaRegistro"),
+}
+
+EMPRESA_DEFAULT_COLUMNS = [
+    "ruc", "razonSocial", "nombreComercial", "representanteLegal.nombre",
+    "contacto.telefono", "contacto.email", "direccion.distrito",
+    "expediente.numero", "estado", "fechaCreacion",
+]
+
+VEHICULO_EXPORT_COLUMNS: Dict[str, ColumnSpec] = {
+    "placa": ("Placa", "placa"),
+    "empresaId": ("Empresa", "empresaId"),
+    "rutaId": ("Ruta", "rutaId"),
+    "categoria": ("Categoría", "categoria"),
+    "marca": ("Marca", "marca"),
+    "modelo": ("Modelo", "modelo"),
+    "anioFabricacion": ("Año de Fabricación", "anioFabricacion"),
+    "estado": ("Estado", "estado"),
+    "tuc.nroTuc": ("TUC", "tuc.nroTuc"),
+    "tuc.fechaEmision": ("Fecha Emisión TUC", "tuc.fechaEmision"),
+    "datosTecnicos.motor": ("Motor", "datosTecnicos.motor"),
+    "datosTecnicos.chasis": ("Chasis", "datosTecnicos.chasis"),
+    "datosTecnicos.asientos": ("Asientos", "datosTecnicos.asientos"),
+}
+
+VEHICULO_DEFAULT_COLUMNS = [
+    "placa", "empresaId", "categoria", "marca", "anioFabricacion", "estado", "tuc.nroTuc",
+]
+
+# Filas por fragmento emitido al cliente
+CHUNK_ROWS = 500
+
+def select_columns(
+    available: Dict[str, ColumnSpec],
+    requested: Optional[str],
+    default: List[str]
+) -> List[Tuple[str, ColumnSpec]]:
+    """Resolver la lista de columnas pedida (separada por comas)"""
+    keys = [k.strip() for k in requested.split(",") if k.strip()] if requested else default
+    unknown = [k for k in keys if k not in available]
+    if unknown:
+        raise ValueError(f"Columnas no disponibles: {', '.join(unknown)}")
+    return [(k, available[k]) for k in keys]
+
+def projection_for(columns: List[Tuple[str, ColumnSpec]]) -> Dict[str, int]:
+    """Proyección mínima de MongoDB para las columnas seleccionadas"""
+    projection: Dict[str, int] = {"_id": 0}
+    for _, (_, source) in columns:
+        if callable(source):
+            projection["representanteLegal"] = 1
+        else:
+            projection[source] = 1
+    return projection
+
+def _extract(doc: Dict[str, Any], source: Union[str, Callable[[Dict[str, Any]], Any]]) -> Any:
+    if callable(source):
+        return source(doc)
+    value: Any = doc
+    for part in source.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+def format_value(value: Any) -> Any:
+    """Formatear un valor para una celda"""
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return "; ".join(str(v) for v in value)
+    if isinstance(value, (int, float, str, bool)):
+        return value
+    return str(value)
+
+def _row(doc: Dict[str, Any], columns: List[Tuple[str, ColumnSpec]]) -> List[Any]:
+    return [format_value(_extract(doc, source)) for _, (_, source) in columns]
+
+async def stream_csv(cursor, columns: List[Tuple[str, ColumnSpec]]) -> AsyncIterator[bytes]:
+    """Generar un CSV por fragmentos directamente desde un cursor de Motor"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # BOM para que Excel reconozca UTF-8
+    buffer.write("\ufeff")
+    writer.writerow([header for _, (header, _) in columns])
+
+    rows = 0
+    async for doc in cursor:
+        writer.writerow(_row(doc, columns))
+        rows += 1
+        if rows % CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+async def write_xlsx(cursor, columns: List[Tuple[str, ColumnSpec]], path: str) -> int:
+    """
+    Escribir un XLSX en modo write_only (las filas se vuelcan a disco).
+
+    openpyxl es opcional; si no está instalado se lanza ValueError.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ValueError("Exportación XLSX no disponible (instalar openpyxl)")
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Datos")
+    sheet.append([header for _, (header, _) in columns])
+
+    rows = 0
+    batch: List[List[Any]] = []
+    async for doc in cursor:
+        batch.append(_row(doc, columns))
+        if len(batch) >= CHUNK_ROWS:
+            await asyncio.to_thread(lambda b=batch: [sheet.append(r) for r in b])
+            rows += len(batch)
+            batch = []
+    if batch:
+        await asyncio.to_thread(lambda b=batch: [sheet.append(r) for r in b])
+        rows += len(batch)
+
+    await asyncio.to_thread(workbook.save, path)
+    return rows
+
+# Formatos de las exportaciones que se pueden descargar (los .tmp están en escritura)
+EXPORT_FORMATS = ("csv", "xlsx")
+
+def exports_dir(owner_id: str) -> str:
+    """Directorio de exportaciones de un usuario: solo él puede descargarlas"""
+    owner = os.path.basename(str(owner_id))
+    if not owner or owner in (".", ".."):
+        raise ValueError("Usuario de exportación inválido")
+    path = os.path.join(settings.REPORTS_DIR, "exportaciones", owner)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def new_export_path(prefix: str, formato: str, owner_id: str) -> Tuple[str, str]:
+    """Nombre y ruta para una exportación en segundo plano del usuario `owner_id`"""
+    name = f"{prefix}-{datetime.utcnow():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}.{formato}"
+    return name, os.path.join(exports_dir(owner_id), name)
+
+def resolve_export_path(name: str, owner_id: str) -> Optional[str]:
+    """
+    Ruta de una exportación terminada del usuario (sin permitir salir de su
+    directorio ni descargar el temporal de una exportación en curso).
+    """
+    if os.path.basename(name) != name or os.path.splitext(name)[1].lstrip(".") not in EXPORT_FORMATS:
+        return None
+    path = os.path.join(exports_dir(owner_id), name)
+    return path if os.path.isfile(path) else None
+
+async def export_to_file(cursor, columns: List[Tuple[str, ColumnSpec]], formato: str, path: str):
+    """Exportación en segundo plano a REPORTS_DIR; se escribe a un temporal y luego se renombra"""
+    tmp_path = path + ".tmp"
+    try:
+        if formato == "xlsx":
+            await write_xlsx(cursor, columns, tmp_path)
+        else:
+            with open(tmp_path, "wb") as output:
+                async for chunk in stream_csv(cursor, columns):
+                    await asyncio.to_thread(output.write, chunk)
+        os.replace(tmp_path, path)
+        logger.info("Exportación generada", path=path)
+    except Exception as e:
+        logger.error("Error al generar exportación", path=path, error=str(e))
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -0,0 +1,173 @@
+"""
+Historial de cambios por entidad (colecciones *_historial) y línea de tiempo combinada
+"""
+
+import heapq
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import DESCENDING
+
+from app.core.database import get_collection, vehiculos_collection, conductores_collection
+from app.core.pagination import encode_cursor, keyset_filter, paginate_keyset
+from app.services.archiver import find_archived
+
+SORT_FIELD = "fechaCambio"
+
+# Entidad -> (colección de historial, campo de referencia a la entidad)
+HISTORY_COLLECTIONS: Dict[str, Tuple[str, str]] = {
+    "empresas": ("empresas_historial", "empresaId"),
+    "vehiculos": ("vehiculos_historial", "vehiculoId"),
+    "conductores": ("conductores_historial", "conductorId"),
+    "expedientes": ("expedientes_historial", "expedienteId"),
+}
+
+# Fuentes admitidas en la línea de tiempo de una empresa
+TIMELINE_SOURCES = ("empresas", "vehiculos", "conductores")
+
+def _refs(entity_id: Any) -> List[Any]:
+    """Las referencias pueden estar guardadas como ObjectId o como texto"""
+    try:
+        return [ObjectId(entity_id), str(entity_id)]
+    except (InvalidId, TypeError):
+        return [entity_id]
+
+def _projection(detalles: bool) -> Optional[Dict[str, int]]:
+    # `detalles` guarda los valores anteriores y nuevos y puede ser grande
+    return None if detalles else {"detalles": 0}
+
+def _to_item(doc: Dict[str, Any], entidad: str, referencia: str) -> Dict[str, Any]:
+    item = dict(doc)
+    item["id"] = str(item.pop("_id"))
+    item["entidad"] = entidad
+    item["entidadId"] = str(item.pop(referencia, ""))
+    return item
+
+async def get_historial(
+    entidad: str,
+    entity_id: str,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    detalles: bool = False,
+    incluir_archivo: bool = False
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Página del historial de una entidad, del cambio más reciente al más antiguo.
+
+    Con `incluir_archivo`, al agotarse la colección principal la página se
+    completa con las particiones archivadas usando el mismo cursor.
+    """
+    if entidad not in HISTORY_COLLECTIONS:
+        raise ValueError(f"Entidad sin historial: {entidad}")
+    coleccion, referencia = HISTORY_COLLECTIONS[entidad]
+    refs = _refs(entity_id)
+
+    docs, next_cursor = await paginate_keyset(
+        get_collection(coleccion),
+        {referencia: {"$in": refs}},
+        SORT_FIELD,
+        DESCENDING,
+        limit,
+        cursor,
+        _projection(detalles)
+    )
+
+    if incluir_archivo and next_cursor is None:
+        desde = encode_cursor(SORT_FIELD, DESCENDING, docs[-1]) if docs else cursor
+        archived = await find_archived(
+            coleccion, referencia, refs, SORT_FIELD, limit - len(docs) + 1, desde, _projection(detalles)
+        )
+        docs.extend(archived)
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_cursor(SORT_FIELD, DESCENDING, docs[-1])
+
+    return [_to_item(doc, entidad, referencia) for doc in docs], next_cursor
+
+def _desc_key(doc: Dict[str, Any]) -> Tuple[float, bytes]:
+    """Clave ascendente equivalente al orden (fechaCambio, _id) descendente"""
+    oid = doc["_id"]
+    inverted = bytes(255 - b for b in oid.binary) if isinstance(oid, ObjectId) else b""
+    return -doc[SORT_FIELD].timestamp(), inverted
+
+async def _next(cursor) -> Optional[Dict[str, Any]]:
+    try:
+        return await cursor.next()
+    except StopAsyncIteration:
+        return None
+
+async def _empresa_sources(empresa_id: str, fuentes: List[str]) -> List[Tuple[str, List[Any]]]:
+    """Entidades cuyo historial forma parte de la línea de tiempo de la empresa"""
+    refs = _refs(empresa_id)
+    sources: List[Tuple[str, List[Any]]] = []
+    if "empresas" in fuentes:
+        sources.append(("empresas", refs))
+    if "vehiculos" in fuentes:
+        # Incluye los vehículos desvinculados de la empresa
+        ids = await vehiculos_collection().distinct(
+            "_id", {"$or": [{"empresaId": {"$in": refs}}, {"empresaAnteriorId": {"$in": refs}}]}
+        )
+        if ids:
+            sources.append(("vehiculos", ids + [str(i) for i in ids]))
+    if "conductores" in fuentes:
+        ids = await conductores_collection().distinct("_id", {"empresasAsociadasIds": {"$in": refs}})
+        if ids:
+            sources.append(("conductores", ids + [str(i) for i in ids]))
+    return sources
+
+async def get_empresa_timeline(
+    empresa_id: str,
+    fuentes: List[str],
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    detalles: bool = False
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Línea de tiempo de una empresa combinando varias colecciones de historial.
+
+    Cada fuente se consulta ordenada por (fechaCambio, _id) descendente desde
+    el cursor y con límite de una página, y las fuentes se mezclan con un heap
+    (k-way merge): nunca se leen más de limit + 1 documentos por colección.
+    """
+    unknown = set(fuentes) - set(TIMELINE_SOURCES)
+    if unknown:
+        raise ValueError(f"Fuentes no soportadas: {', '.join(sorted(unknown))}")
+
+    cursors = []
+    for entidad, ids in await _empresa_sources(empresa_id, fuentes):
+        coleccion, referencia = HISTORY_COLLECTIONS[entidad]
+        query = keyset_filter({referencia: {"$in": ids}}, SORT_FIELD, DESCENDING, cursor)
+        cursors.append((
+            entidad,
+            referencia,
+            get_collection(coleccion).find(query, _projection(detalles))
+                .sort([(SORT_FIELD, DESCENDING), ("_id", DESCENDING)])
+                .limit(limit + 1)
+                .batch_size(limit + 1),
+        ))
+
+    heap: List[Tuple[Tuple[float, bytes], int, Dict[str, Any]]] = []
+    for index, (_, _, source) in enumerate(cursors):
+        doc = await _next(source)
+        if doc is not None:
+            heapq.heappush(heap, (_desc_key(doc), index, doc))
+
+    docs: List[Tuple[int, Dict[str, Any]]] = []
+    while heap and len(docs) <= limit:
+        _, index, doc = heapq.heappop(heap)
+        docs.append((index, doc))
+        nxt = await _next(cursors[index][2])
+        if nxt is not None:
+            heapq.heappush(heap, (_desc_key(nxt), index, nxt))
+
+    for _, _, source in cursors:
+        await source.close()
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(SORT_FIELD, DESCENDING, docs[-1][1])
+
+    items = [_to_item(doc, cursors[index][0], cursors[index][1]) for index, doc in docs]
+    return items, next_cursor
@@ -0,0 +1,254 @@
+"""
+Cliente compartido de consultas externas (SUNAT - RUC, RENIEC - DNI)
+"""
+
+import asyncio
+import json
+import re
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import httpx
+import structlog
+
+from app.core.audit import AuditWriter
+from app.core.cache import cache
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+RUC_PATTERN = re.compile(r"^(10|15|17|20)\d{9}$")
+DNI_PATTERN = re.compile(r"^\d{8}$")
+
+# Marca cacheada cuando el proveedor responde 404, para no repetir la consulta
+# externa en cada validación de un RUC/DNI inexistente
+NO_ENCONTRADO = {"encontrado": False}
+
+class ProveedorNoDisponible(RuntimeError):
+    """El proveedor externo no está configurado, falla o tiene el circuito abierto"""
+
+class CircuitBreaker:
+    """
+    Circuito por proveedor.
+
+    Tras `threshold` fallos consecutivos se abre durante `reset_timeout`
+    segundos (las consultas fallan de inmediato); luego deja pasar una consulta
+    de prueba (semiabierto) y se cierra si ésta tiene éxito.
+    """
+
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "CERRADO"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "SEMIABIERTO"
+        return "ABIERTO"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "CERRADO":
+            return True
+        if state == "SEMIABIERTO" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.opened_at is not None or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+class Provider:
+    """Configuración y límites de un proveedor externo"""
+
+    def __init__(
+        self,
+        nombre: str,
+        base_url: Optional[str],
+        api_key: Optional[str],
+        path: str,
+        cache_namespace: str,
+        max_concurrency: int
+    ):
+        self.nombre = nombre
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.api_key = api_key
+        self.path = path
+        self.cache_namespace = cache_namespace
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.breaker = CircuitBreaker(settings.INTEROP_BREAKER_THRESHOLD, settings.INTEROP_BREAKER_RESET)
+
+class InteroperatividadClient:
+    """
+    Un único httpx.AsyncClient por proceso (conexiones reutilizadas) para todos
+    los proveedores, con:
+
+    - cache Redis de respuestas por RUC/DNI con TTL largo;
+    - coalescencia: consultas simultáneas de la misma clave comparten una sola
+      llamada externa;
+    - límite de concurrencia y circuit breaker por proveedor;
+    - registro asíncrono de cada consulta externa en `interoperatividad`.
+    """
+
+    def __init__(self):
+        self.providers: Dict[str, Provider] = {
+            "SUNAT": Provider(
+                "SUNAT", settings.SUNAT_API_URL, settings.SUNAT_API_KEY,
+                "/ruc/{valor}", "sunat_ruc", settings.INTEROP_MAX_CONCURRENCY,
+            ),
+            "RENIEC": Provider(
+                "RENIEC", settings.RENIEC_API_URL, settings.RENIEC_API_KEY,
+                "/dni/{valor}", "reniec_dni", settings.INTEROP_MAX_CONCURRENCY,
+            ),
+        }
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.log_writer = AuditWriter(collection="interoperatividad", metrics_prefix="interop_log")
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            limit = settings.INTEROP_MAX_CONCURRENCY * len(self.providers)
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(settings.INTEROP_TIMEOUT),
+                limits=httpx.Limits(max_connections=limit, max_keepalive_connections=limit),
+            )
+        return self._client
+
+    async def start(self):
+        await self.log_writer.start()
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        await self.log_writer.stop()
+
+    async def consultar_ruc(self, ruc: str, entidad_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Datos de SUNAT para un RUC (None si SUNAT no lo encuentra)"""
+        if not RUC_PATTERN.match(ruc):
+            raise ValueError("RUC inválido")
+        return await self._lookup("SUNAT", ruc, "EMPRESA", entidad_id)
+
+    async def consultar_dni(self, dni: str, entidad_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Datos de RENIEC para un DNI (None si RENIEC no lo encuentra)"""
+        if not DNI_PATTERN.match(dni):
+            raise ValueError("DNI inválido")
+        return await self._lookup("RENIEC", dni, "CONDUCTOR", entidad_id)
+
+    async def _lookup(
+        self,
+        proveedor: str,
+        valor: str,
+        entidad: str,
+        entidad_id: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        provider = self.providers[proveedor]
+        if not provider.base_url:
+            raise ProveedorNoDisponible(f"{proveedor} no configurado")
+
+        async def load() -> Dict[str, Any]:
+            return await self._fetch(provider, valor, entidad, entidad_id) or NO_ENCONTRADO
+
+        key = f"{proveedor}:{valor}"
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(cache.get_or_load(
+                provider.cache_namespace,
+                valor,
+                load,
+                # Los "no encontrado" se cachean menos tiempo: el RUC/DNI puede registrarse después
+                ttl=lambda text: settings.INTEROP_CACHE_TTL_NO_ENCONTRADO if json.loads(text) == NO_ENCONTRADO else None
+            ))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # shield: la cancelación de un solicitante no cancela la consulta compartida
+        data = await asyncio.shield(task)
+        return None if data == NO_ENCONTRADO else data
+
+    async def _fetch(
+        self,
+        provider: Provider,
+        valor: str,
+        entidad: str,
+        entidad_id: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        if not provider.breaker.allow():
+            raise ProveedorNoDisponible(f"{provider.nombre} no disponible temporalmente")
+
+        headers = {"Authorization": f"Bearer {provider.api_key}"} if provider.api_key else None
+        url = provider.base_url + provider.path.format(valor=valor)
+        started = time.perf_counter()
+
+        try:
+            async with provider.semaphore:
+                response = await self._http().get(url, headers=headers)
+            if response.status_code == 404:
+                data = None
+            else:
+                response.raise_for_status()
+                data = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            provider.breaker.record_failure()
+            self._log(provider, valor, entidad, entidad_id, None, str(e), started)
+            logger.warning(
+                "Fallo en consulta externa",
+                proveedor=provider.nombre,
+                circuito=provider.breaker.state,
+                error=str(e)
+            )
+            raise ProveedorNoDisponible(f"{provider.nombre} no disponible") from e
+
+        provider.breaker.record_success()
+        self._log(provider, valor, entidad, entidad_id, data, None, started)
+        return data
+
+    def _log(
+        self,
+        provider: Provider,
+        valor: str,
+        entidad: str,
+        entidad_id: Optional[str],
+        datos: Optional[Dict[str, Any]],
+        error: Optional[str],
+        started: float
+    ):
+        self.log_writer.enqueue({
+            "fecha": datetime.utcnow(),
+            "servicioOrigen": provider.nombre,
+            "entidadConsultada": entidad,
+            "idEntidad": entidad_id,
+            "valorConsultado": valor,
+            "datosConsultados": datos,
+            "estadoConsulta": "FALLIDA" if error else "EXITOSA",
+            "error": error,
+            "duracionMs": round((time.perf_counter() - started) * 1000, 1),
+        })
+
+    def status(self) -> Dict[str, Any]:
+        """Estado de los circuitos por proveedor"""
+        return {
+            nombre: {
+                "configurado": bool(p.base_url),
+                "circuito": p.breaker.state,
+                "fallos": p.breaker.failures,
+            }
+            for nombre, p in self.providers.items()
+        }
+
+# Instancia global del cliente de interoperatividad
+interoperatividad = InteroperatividadClient()
@@ -0,0 +1,97 @@
+"""
+Cola de notificaciones: inserción deduplicada y reintentos con backoff exponencial
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from pymongo.errors import BulkWriteError
+import structlog
+
+from app.core.config import settings
+from app.core.database import notificaciones_collection
+
+logger = structlog.get_logger()
+
+# Estados de entrega
+PENDIENTE = "PENDIENTE"
+ENVIADA = "ENVIADA"
+FALLIDA = "FALLIDA"
+
+# Código de error de MongoDB para clave duplicada
+DUPLICATE_KEY = 11000
+
+def new_notification(
+    tipo: str,
+    titulo: str,
+    mensaje: str,
+    destinatario: Dict[str, Any],
+    clave: str,
+    **extra: Any
+) -> Dict[str, Any]:
+    """Documento de notificación pendiente; `clave` identifica el evento para deduplicar"""
+    now = datetime.utcnow()
+    return {
+        "tipo": tipo,
+        "titulo": titulo,
+        "mensaje": mensaje,
+        "destinatario": destinatario,
+        "canal": "EMAIL",
+        "estado": PENDIENTE,
+        "intentos": 0,
+        "proximoIntento": now,
+        "fechaCreacion": now,
+        "fechaEnvio": None,
+        "claveDeduplicacion": clave,
+        **extra,
+    }
+
+async def insert_notifications(docs: List[Dict[str, Any]]) -> int:
+    """
+    Insertar notificaciones en bloque ignorando las ya registradas.
+
+    La deduplicación se apoya en el índice único de claveDeduplicacion, por lo
+    que reprocesar un rango (o dos procesos en paralelo) no genera duplicados.
+    """
+    if not docs:
+        return 0
+    try:
+        result = await notificaciones_collection().insert_many(docs, ordered=False)
+        return len(result.inserted_ids)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        other = [err for err in errors if err.get("code") != DUPLICATE_KEY]
+        if other:
+            raise
+        return e.details.get("nInserted", 0)
+
+def retry_delay(intentos: int) -> timedelta:
+    """Espera antes del siguiente intento: base * 2^(intentos-1), acotada"""
+    seconds = settings.NOTIFICATION_RETRY_BASE_DELAY * (2 ** max(intentos - 1, 0))
+    return timedelta(seconds=min(seconds, settings.NOTIFICATION_RETRY_MAX_DELAY))
+
+def failure_update(intentos_previos: int, error: str) -> Dict[str, Any]:
+    """
+    Actualización tras un envío fallido.
+
+    Se reprograma con backoff exponencial hasta NOTIFICATION_MAX_RETRY intentos;
+    luego la notificación queda FALLIDA.
+    """
+    intentos = intentos_previos + 1
+    now = datetime.utcnow()
+    fields: Dict[str, Any] = {"intentos": intentos, "ultimoError": error, "ultimoIntento": now}
+    if intentos >= settings.NOTIFICATION_MAX_RETRY:
+        fields["estado"] = FALLIDA
+    else:
+        fields["estado"] = PENDIENTE
+        fields["proximoIntento"] = now + retry_delay(intentos)
+    return {"$set": fields}
+
+def sent_update() -> Dict[str, Any]:
+    """Actualización tras un envío exitoso"""
+    now = datetime.utcnow()
+    return {"$set": {"estado": ENVIADA, "fechaEnvio": now, "ultimoIntento": now}, "$inc": {"intentos": 1}}
+
+def due_query(now: datetime) -> Dict[str, Any]:
+    """Notificaciones pendientes cuyo próximo intento ya venció"""
+    return {"estado": PENDIENTE, "proximoIntento": {"$lte": now}}
@@ -0,0 +1,260 @@
+"""
+Despachador asíncrono de notificaciones por correo (SMTP con conexiones reutilizadas)
+"""
+
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+import structlog
+
+from app.core.config import settings
+from app.core.database import notificaciones_collection
+from app.services.notificaciones_service import (
+    PENDIENTE,
+    FALLIDA,
+    due_query,
+    failure_update,
+    sent_update,
+)
+
+logger = structlog.get_logger()
+
+# Estado transitorio mientras un proceso envía la notificación
+ENVIANDO = "ENVIANDO"
+
+# Tiempo tras el cual una notificación ENVIANDO se considera abandonada (caída del proceso)
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+# Las conexiones inactivas más de este tiempo (segundos) se cierran en lugar de
+# reutilizarse: los servidores SMTP suelen cortar las sesiones ociosas
+SMTP_IDLE_TIMEOUT = 60.0
+
+class SMTPPool:
+    """
+    Pool pequeño de conexiones SMTP reutilizadas entre mensajes.
+
+    Cada conexión se abre (y autentica) una sola vez; si falla un envío la
+    conexión se descarta y se abre otra en el siguiente uso. Una conexión
+    reutilizada que el servidor ya cerró se reemplaza y el mensaje se
+    reintenta una vez con la conexión nueva.
+    """
+
+    def __init__(
+        self,
+        host: Optional[str] = settings.SMTP_HOST,
+        port: int = settings.SMTP_PORT,
+        username: Optional[str] = settings.SMTP_USER,
+        password: Optional[str] = settings.SMTP_PASSWORD,
+        tls: bool = settings.SMTP_TLS,
+        size: int = settings.SMTP_POOL_SIZE
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.tls = tls
+        self.size = size
+        self._idle: asyncio.LifoQueue = asyncio.LifoQueue()
+        self._slots = asyncio.Semaphore(size)
+
+    async def _connect(self):
+        import aiosmtplib
+
+        client = aiosmtplib.SMTP(
+            hostname=self.host,
+            port=self.port,
+            use_tls=self.tls and self.port == 465,
+            start_tls=self.tls and self.port != 465,
+            timeout=30,
+        )
+        await client.connect()
+        if self.username:
+            await client.login(self.username, self.password or "")
+        return client
+
+    async def _acquire(self):
+        """Conexión libre y vigente del pool, o None si hay que abrir una"""
+        while not self._idle.empty():
+            candidate, last_used = self._idle.get_nowait()
+            if candidate.is_connected and time.monotonic() - last_used < SMTP_IDLE_TIMEOUT:
+                return candidate
+            await self._discard(candidate)
+        return None
+
+    async def send(self, message: EmailMessage):
+        """Enviar un mensaje usando una conexión libre del pool"""
+        import aiosmtplib
+
+        async with self._slots:
+            client = await self._acquire()
+            reused = client is not None
+            if client is None:
+                client = await self._connect()
+
+            try:
+                await client.send_message(message)
+            except aiosmtplib.SMTPServerDisconnected:
+                await self._discard(client)
+                if not reused:
+                    raise
+                client = await self._connect()
+                try:
+                    await client.send_message(message)
+                except Exception:
+                    await self._discard(client)
+                    raise
+            except Exception:
+                await self._discard(client)
+                raise
+            self._idle.put_nowait((client, time.monotonic()))
+
+    async def _discard(self, client):
+        try:
+            client.close()
+        except Exception:
+            pass
+
+    async def close(self):
+        """Cerrar las conexiones abiertas"""
+        while not self._idle.empty():
+            client, _ = self._idle.get_nowait()
+            try:
+                await client.quit()
+            except Exception:
+                await self._discard(client)
+
+def build_message(notification: Dict[str, Any], sender: str) -> EmailMessage:
+    """Construir el correo de una notificación"""
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = notification["destinatario"]["email"]
+    message["Subject"] = notification.get("titulo") or "Notificación DRTC Puno"
+    message.set_content(notification.get("mensaje") or "")
+    return message
+
+class NotificationDispatcher:
+    """
+    Envía en lotes las notificaciones pendientes.
+
+    - Reclama un lote (PENDIENTE -> ENVIANDO) con un token propio, de modo que
+      varios procesos no envían la misma notificación.
+    - Envía con concurrencia acotada por el tamaño del pool SMTP.
+    - Registra el resultado de todo el lote con un solo bulk_write
+      (ENVIADA, o reintento con backoff / FALLIDA).
+    """
+
+    def __init__(
+        self,
+        pool: Optional[SMTPPool] = None,
+        batch_size: int = settings.NOTIFICATION_BATCH_SIZE,
+        interval: float = settings.NOTIFICATION_DISPATCH_INTERVAL,
+        sender: str = settings.SMTP_FROM
+    ):
+        self.pool = pool or SMTPPool()
+        self.batch_size = batch_size
+        self.interval = interval
+        self.sender = sender
+        self._task: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.failed = 0
+
+    async def send_batch(self, notifications: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], Optional[str]]]:
+        """Enviar un lote; devuelve (notificación, error o None) por cada una"""
+        async def send_one(notification: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str]]:
+            if not (notification.get("destinatario") or {}).get("email"):
+                return notification, "Destinatario sin correo electrónico"
+            try:
+                await self.pool.send(build_message(notification, self.sender))
+                return notification, None
+            except Exception as e:
+                return notification, str(e) or type(e).__name__
+
+        return await asyncio.gather(*(send_one(n) for n in notifications))
+
+    async def _claim(self) -> List[Dict[str, Any]]:
+        collection = notificaciones_collection()
+        now = datetime.utcnow()
+
+        # Liberar notificaciones reclamadas por un proceso que no terminó
+        await collection.update_many(
+            {"estado": ENVIANDO, "reclamadoEn": {"$lt": now - CLAIM_TIMEOUT}},
+            {"$set": {"estado": PENDIENTE}, "$unset": {"envioToken": ""}}
+        )
+
+        candidates = await collection.find(due_query(now), {"_id": 1}) \
+            .sort("proximoIntento", 1) \
+            .limit(self.batch_size) \
+            .to_list(length=self.batch_size)
+        if not candidates:
+            return []
+
+        token = uuid.uuid4().hex
+        await collection.update_many(
+            {"_id": {"$in": [c["_id"] for c in candidates]}, "estado": PENDIENTE},
+            {"$set": {"estado": ENVIANDO, "envioToken": token, "reclamadoEn": now}}
+        )
+        return await collection.find({"envioToken": token}).to_list(length=self.batch_size)
+
+    async def dispatch_once(self) -> int:
+        """Reclamar, enviar y registrar un lote; devuelve la cantidad procesada"""
+        notifications = await self._claim()
+        if not notifications:
+            return 0
+
+        results = await self.send_batch(notifications)
+
+        operations = []
+        for notification, error in results:
+            if error is None:
+                update = sent_update()
+                self.sent += 1
+            elif not (notification.get("destinatario") or {}).get("email"):
+                update = {"$set": {"estado": FALLIDA, "ultimoError": error}}
+                self.failed += 1
+            else:
+                update = failure_update(notification.get("intentos", 0), error)
+                self.failed += 1
+            update.setdefault("$unset", {})["envioToken"] = ""
+            operations.append(UpdateOne({"_id": notification["_id"]}, update))
+
+        await notificaciones_collection().bulk_write(operations, ordered=False)
+        logger.info(
+            "Lote de notificaciones despachado",
+            total=len(results),
+            errores=sum(1 for _, error in results if error)
+        )
+        return len(results)
+
+    def start(self):
+        if not settings.NOTIFICATION_DISPATCH_ENABLED or not self.pool.host or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info("Despachador de notificaciones iniciado", pool=self.pool.size)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.pool.close()
+
+    async def _run(self):
+        while True:
+            try:
+                # Mientras haya lotes completos se continúa sin esperar
+                if await self.dispatch_once() >= self.batch_size:
+                    continue
+            except Exception as e:
+                logger.error("Error en el despachador de notificaciones", error=str(e))
+            await asyncio.sleep(self.interval)
+
+# Instancia global del despachador de notificaciones
+notification_dispatcher = NotificationDispatcher()
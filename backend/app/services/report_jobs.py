@@ -0,0 +1,412 @@
+"""
+Motor de generación de reportes en segundo plano (resultados en REPORTS_DIR)
+"""
+
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+import structlog
+
+from app.core.config import settings
+from app.core.database import get_collection
+
+logger = structlog.get_logger()
+
+JOBS_COLLECTION = "reportes_jobs"
+
+# Estados de un trabajo
+PENDIENTE = "PENDIENTE"
+EN_PROCESO = "EN_PROCESO"
+COMPLETADO = "COMPLETADO"
+ERROR = "ERROR"
+
+# Intervalo mínimo entre limpiezas de archivos generados (segundos)
+CLEANUP_INTERVAL = 600
+
+# Cada cuánto un trabajo pendiente o en curso renueva `actualizadoEn` (segundos);
+# debe ser bastante menor que REPORT_JOB_STALE_TIMEOUT
+HEARTBEAT_INTERVAL = 30
+
+def _fecha(value: Any, default: datetime) -> datetime:
+    if not value:
+        return default
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+def _vehiculos_por_empresa(params: Dict[str, Any]) -> Tuple[str, List[Dict[str, Any]]]:
+    match: Dict[str, Any] = {"estaActivo": True}
+    if params.get("estado"):
+        match["estado"] = params["estado"]
+    return "vehiculos", [
+        {"$match": match},
+        {"$group": {"_id": "$empresaId", "vehiculos": {"$sum": 1}}},
+        {"$lookup": {
+            "from": "empresas",
+            "localField": "_id",
+            "foreignField": "_id",
+            "as": "empresa",
+        }},
+        {"$unwind": {"path": "$empresa", "preserveNullAndEmptyArrays": True}},
+        {"$project": {
+            "_id": 0,
+            "empresaId": {"$toString": "$_id"},
+            "ruc": "$empresa.ruc",
+            "razonSocial": "$empresa.razonSocial.principal",
+            "vehiculos": 1,
+        }},
+        {"$sort": {"vehiculos": -1}},
+    ]
+
+def _tucs_por_vencer_por_provincia(params: Dict[str, Any]) -> Tuple[str, List[Dict[str, Any]]]:
+    now = datetime.utcnow()
+    dias = int(params.get("dias", settings.NOTIFICATION_VENCIMIENTO_ANTICIPADO))
+    return "tucs", [
+        {"$match": {
+            "estaActivo": True,
+            "estado": "VIGENTE",
+            "fechaVencimiento": {"$gte": now, "$lt": now + timedelta(days=dias)},
+        }},
+        {"$lookup": {
+            "from": "empresas",
+            "localField": "empresaId",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"direccion.provincia": 1}}],
+            "as": "empresa",
+        }},
+        {"$unwind": {"path": "$empresa", "preserveNullAndEmptyArrays": True}},
+        {"$group": {
+            "_id": {"$ifNull": ["$empresa.direccion.provincia", "SIN_PROVINCIA"]},
+            "tucs": {"$sum": 1},
+            "proximoVencimiento": {"$min": "$fechaVencimiento"},
+        }},
+        {"$project": {"_id": 0, "provincia": "$_id", "tucs": 1, "proximoVencimiento": 1}},
+        {"$sort": {"tucs": -1}},
+    ]
+
+def _infracciones_por_ruta(params: Dict[str, Any]) -> Tuple[str, List[Dict[str, Any]]]:
+    hasta = _fecha(params.get("hasta"), datetime.utcnow())
+    desde = _fecha(params.get("desde"), hasta - timedelta(days=365))
+    return "fiscalizaciones", [
+        {"$match": {
+            "estaActivo": True,
+            "resultado": "CON_INFRACCION",
+            "fechaHora": {"$gte": desde, "$lt": hasta},
+        }},
+        {"$lookup": {
+            "from": "vehiculos",
+            "localField": "vehiculoInspeccionado.placa",
+            "foreignField": "placa",
+            "pipeline": [{"$project": {"rutaId": 1}}],
+            "as": "vehiculo",
+        }},
+        {"$unwind": {"path": "$vehiculo", "preserveNullAndEmptyArrays": True}},
+        {"$group": {
+            "_id": "$vehiculo.rutaId",
+            "infracciones": {"$sum": {"$size": {"$ifNull": ["$papeleta.infraccionesIds", []]}}},
+            "papeletas": {"$sum": 1},
+            "montoTotal": {"$sum": {"$ifNull": ["$papeleta.montoTotal", 0]}},
+        }},
+        {"$lookup": {
+            "from": "rutas",
+            "localField": "_id",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"codigo": 1, "nombre": 1}}],
+            "as": "ruta",
+        }},
+        {"$unwind": {"path": "$ruta", "preserveNullAndEmptyArrays": True}},
+        {"$project": {
+            "_id": 0,
+            "rutaId": {"$toString": "$_id"},
+            "codigo": "$ruta.codigo",
+            "nombre": "$ruta.nombre",
+            "papeletas": 1,
+            "infracciones": 1,
+            "montoTotal": 1,
+        }},
+        {"$sort": {"infracciones": -1}},
+    ]
+
+# Tipos de reporte disponibles: nombre -> (descripción, constructor del pipeline)
+REPORT_TYPES: Dict[str, Tuple[str, Callable[[Dict[str, Any]], Tuple[str, List[Dict[str, Any]]]]]] = {
+    "vehiculos_por_empresa": (
+        "Vehículos activos por empresa (parámetro opcional: estado)",
+        _vehiculos_por_empresa,
+    ),
+    "tucs_por_vencer_por_provincia": (
+        "TUC vigentes que vencen en los próximos N días por provincia (parámetro: dias)",
+        _tucs_por_vencer_por_provincia,
+    ),
+    "infracciones_por_ruta": (
+        "Infracciones y montos por ruta en un rango de fechas (parámetros: desde, hasta)",
+        _infracciones_por_ruta,
+    ),
+}
+
+def jobs_collection():
+    return get_collection(JOBS_COLLECTION)
+
+def params_hash(tipo: str, parametros: Dict[str, Any], formato: str) -> str:
+    """Hash estable de una solicitud, usado para deduplicar y cachear resultados"""
+    canonical = json.dumps(
+        {"tipo": tipo, "parametros": parametros, "formato": formato},
+        sort_keys=True,
+        default=str,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def reports_output_dir() -> str:
+    path = os.path.join(settings.REPORTS_DIR, "generados")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def _write_result(path: str, rows: List[Dict[str, Any]], formato: str):
+    rows = jsonable_encoder(rows, custom_encoder={ObjectId: str})
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as output:
+        if formato == "csv":
+            fields: List[str] = []
+            for row in rows:
+                fields.extend(k for k in row if k not in fields)
+            writer = csv.DictWriter(output, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            json.dump(rows, output, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def _remove_stale_files(directory: str, vigentes: set, older_than: float) -> int:
+    """
+    Eliminar resultados (y .tmp abandonados) anteriores a `older_than` cuyo
+    hash no pertenece a un trabajo vigente.
+    """
+    removed = 0
+    for entry in os.scandir(directory):
+        if not entry.is_file() or entry.name.split(".", 1)[0] in vigentes:
+            continue
+        try:
+            if entry.stat().st_mtime < older_than:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+class ReportEngine:
+    """
+    Ejecuta reportes en un pool acotado (REPORT_MAX_WORKERS) dentro del proceso.
+
+    Las solicitudes idénticas (mismo hash de tipo + parámetros + formato) se
+    deduplican: si hay un trabajo en curso o un resultado no expirado, se
+    devuelve ese trabajo en lugar de crear otro. El índice único parcial
+    sobre `hash` con `vigente: true` garantiza un solo trabajo vigente por
+    hash aunque varios workers reciban la misma solicitud a la vez.
+
+    Mientras un trabajo está pendiente o en curso, su proceso renueva
+    `actualizadoEn`. Si el proceso muere, el trabajo deja de renovarse y, pasado
+    REPORT_JOB_STALE_TIMEOUT, la siguiente solicitud idéntica lo marca como
+    ERROR y crea uno nuevo.
+    """
+
+    def __init__(self, max_workers: int = settings.REPORT_MAX_WORKERS):
+        self._semaphore = asyncio.Semaphore(max_workers)
+        self._tasks: Dict[asyncio.Task, Any] = {}
+        self._last_cleanup = 0.0
+
+    async def submit(self, tipo: str, parametros: Dict[str, Any], formato: str, user_id: str) -> Dict[str, Any]:
+        """Registrar (o reutilizar) un trabajo de reporte"""
+        if tipo not in REPORT_TYPES:
+            raise ValueError(f"Tipo de reporte no soportado: {tipo}")
+
+        now = datetime.utcnow()
+        digest = params_hash(tipo, parametros, formato)
+        collection = jobs_collection()
+        # Un trabajo abandonado (su proceso murió) deja de ser vigente. La condición
+        # sobre el latido evita descartar un trabajo que sigue avanzando
+        stale = now - timedelta(seconds=settings.REPORT_JOB_STALE_TIMEOUT)
+        await collection.update_many(
+            {
+                "hash": digest,
+                "vigente": True,
+                "estado": {"$in": [PENDIENTE, EN_PROCESO]},
+                "$or": [
+                    {"actualizadoEn": {"$lte": stale}},
+                    {"actualizadoEn": {"$exists": False}, "creadoEn": {"$lte": stale}},
+                ],
+            },
+            {
+                "$set": {"estado": ERROR, "error": "Trabajo abandonado sin progreso", "finalizadoEn": now},
+                "$unset": {"vigente": ""},
+            }
+        )
+        # Un resultado expirado deja de ser vigente y no bloquea una nueva ejecución
+        await collection.update_many(
+            {"hash": digest, "vigente": True, "expiraEn": {"$lte": now}},
+            {"$unset": {"vigente": ""}}
+        )
+
+        new_id = ObjectId()
+        job = None
+        while job is None:
+            try:
+                job = await collection.find_one_and_update(
+                    {"hash": digest, "vigente": True},
+                    {"$setOnInsert": {
+                        "_id": new_id,
+                        "hash": digest,
+                        "vigente": True,
+                        "tipo": tipo,
+                        "parametros": parametros,
+                        "formato": formato,
+                        "estado": PENDIENTE,
+                        "solicitadoPorId": user_id,
+                        "creadoEn": now,
+                        "actualizadoEn": now,
+                        "expiraEn": now + timedelta(seconds=settings.REPORT_CACHE_TTL),
+                    }},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+            except DuplicateKeyError:
+                # Otro worker insertó el trabajo vigente entre la búsqueda y la inserción
+                job = await collection.find_one({"hash": digest, "vigente": True})
+
+        self._schedule_cleanup()
+        if job["_id"] == new_id:
+            task = asyncio.create_task(self._run(job))
+            self._tasks[task] = job["_id"]
+            task.add_done_callback(lambda t: self._tasks.pop(t, None))
+        return job
+
+    async def _heartbeat(self, job_id: ObjectId):
+        """Renovar `actualizadoEn` mientras el trabajo espera o se ejecuta"""
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            try:
+                await jobs_collection().update_one(
+                    {"_id": job_id, "estado": {"$in": [PENDIENTE, EN_PROCESO]}},
+                    {"$set": {"actualizadoEn": datetime.utcnow()}}
+                )
+            except Exception as e:
+                logger.warning("No se pudo renovar el trabajo de reporte", job_id=str(job_id), error=str(e))
+
+    async def _run(self, job: Dict[str, Any]):
+        heartbeat = asyncio.create_task(self._heartbeat(job["_id"]))
+        try:
+            await self._execute(job)
+        finally:
+            heartbeat.cancel()
+
+    async def _execute(self, job: Dict[str, Any]):
+        async with self._semaphore:
+            collection = jobs_collection()
+            now = datetime.utcnow()
+            result = await collection.update_one(
+                {"_id": job["_id"], "estado": PENDIENTE},
+                {"$set": {"estado": EN_PROCESO, "iniciadoEn": now, "actualizadoEn": now}}
+            )
+            if not result.matched_count:
+                # Se dio por abandonado mientras esperaba; ya hay otro trabajo vigente
+                logger.warning("Trabajo de reporte descartado antes de iniciar", job_id=str(job["_id"]))
+                return
+            try:
+                source, pipeline = REPORT_TYPES[job["tipo"]][1](job["parametros"])
+                rows = await get_collection(source) \
+                    .aggregate(pipeline, allowDiskUse=True) \
+                    .to_list(length=None)
+
+                path = os.path.join(reports_output_dir(), f"{job['hash']}.{job['formato']}")
+                await asyncio.to_thread(_write_result, path, rows, job["formato"])
+
+                await collection.update_one(
+                    {"_id": job["_id"]},
+                    {"$set": {
+                        "estado": COMPLETADO,
+                        "archivo": path,
+                        "filas": len(rows),
+                        "finalizadoEn": datetime.utcnow(),
+                    }}
+                )
+                logger.info("Reporte generado", tipo=job["tipo"], filas=len(rows))
+            except Exception as e:
+                logger.error("Error al generar reporte", tipo=job["tipo"], error=str(e))
+                await collection.update_one(
+                    {"_id": job["_id"]},
+                    {
+                        "$set": {"estado": ERROR, "error": str(e), "finalizadoEn": datetime.utcnow()},
+                        "$unset": {"vigente": ""},
+                    }
+                )
+
+    def _schedule_cleanup(self):
+        """Lanzar la limpieza de archivos generados como máximo cada CLEANUP_INTERVAL"""
+        if time.monotonic() - self._last_cleanup < CLEANUP_INTERVAL:
+            return
+        self._last_cleanup = time.monotonic()
+        task = asyncio.create_task(self.cleanup_files())
+        self._tasks[task] = None
+        task.add_done_callback(lambda t: self._tasks.pop(t, None))
+
+    async def cleanup_files(self) -> int:
+        """
+        Eliminar de REPORTS_DIR/generados los resultados sin trabajo vigente.
+
+        El índice TTL solo elimina los registros de `reportes_jobs`; los
+        archivos se eliminan aquí una vez vencido REPORT_CACHE_TTL.
+        """
+        try:
+            vigentes = set(await jobs_collection().distinct(
+                "hash", {"expiraEn": {"$gt": datetime.utcnow()}, "estado": {"$ne": ERROR}}
+            ))
+            removed = await asyncio.to_thread(
+                _remove_stale_files,
+                reports_output_dir(),
+                vigentes,
+                time.time() - settings.REPORT_CACHE_TTL,
+            )
+            if removed:
+                logger.info("Archivos de reportes expirados eliminados", eliminados=removed)
+            return removed
+        except Exception as e:
+            logger.error("Error al limpiar archivos de reportes", error=str(e))
+            return 0
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Consultar el estado de un trabajo"""
+        try:
+            return await jobs_collection().find_one({"_id": ObjectId(job_id)})
+        except Exception:
+            return None
+
+    async def shutdown(self):
+        """Cancelar los trabajos en curso al detener la aplicación"""
+        if not self._tasks:
+            return
+        job_ids = [job_id for job_id in self._tasks.values() if job_id is not None]
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+        # Evitar que un trabajo interrumpido quede deduplicando solicitudes hasta expirar
+        await jobs_collection().update_many(
+            {"_id": {"$in": job_ids}, "estado": {"$in": [PENDIENTE, EN_PROCESO]}},
+            {
+                "$set": {"estado": ERROR, "error": "Interrumpido al detener el servidor"},
+                "$unset": {"vigente": ""},
+            }
+        )
+        logger.info("Motor de reportes detenido", interrumpidos=len(job_ids))
+
+# Instancia global del motor de reportes
+report_engine = ReportEngine()
@@ -0,0 +1,211 @@
+"""
+Sincronización delta (offline-first) para la app móvil de fiscalización
+"""
+
+import base64
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError
+import structlog
+
+from app.core.config import settings
+from app.core.database import get_collection
+from app.core.pagination import encode_cursor, keyset_filter
+from app.schemas.sync import FiscalizacionSync, ResultadoItemSync, FiscalizacionesLoteResponse
+
+logger = structlog.get_logger()
+
+# Campo de modificación usado como marca de agua
+WATERMARK_FIELD = "actualizadoEn"
+
+# Colecciones sincronizables y proyección compacta de cada una
+SYNC_PROJECTIONS: Dict[str, Dict[str, int]] = {
+    "vehiculos": {
+        "placa": 1, "empresaId": 1, "rutaId": 1, "categoria": 1, "marca": 1,
+        "anioFabricacion": 1, "estado": 1, "tuc": 1,
+    },
+    "conductores": {
+        "dni": 1, "nombres": 1, "apellidos": 1, "licencia": 1, "estado": 1,
+        "empresasAsociadasIds": 1,
+    },
+    "tucs": {
+        "numero": 1, "vehiculoId": 1, "empresaId": 1, "estado": 1,
+        "fechaEmision": 1, "fechaVencimiento": 1,
+    },
+    "rutas": {
+        "codigo": 1, "nombre": 1, "origen": 1, "destino": 1, "estado": 1,
+    },
+    "infracciones": {
+        "codigo": 1, "descripcion": 1, "montoMulta": 1, "normativa": 1,
+    },
+}
+
+def encode_watermark(cursors: Dict[str, Optional[str]]) -> str:
+    """Marca de agua opaca: cursor keyset por colección"""
+    raw = json.dumps(cursors, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_watermark(watermark: Optional[str]) -> Dict[str, Optional[str]]:
+    if not watermark:
+        return {}
+    try:
+        padded = watermark + "=" * (-len(watermark) % 4)
+        cursors = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Marca de agua de sincronización inválida")
+    if not isinstance(cursors, dict):
+        raise ValueError("Marca de agua de sincronización inválida")
+    return cursors
+
+def _compact(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Documento compacto: ids como texto y registros inactivos como lápidas"""
+    doc_id = str(doc.pop("_id"))
+    if doc.pop("estaActivo", True) is False:
+        return {"id": doc_id, "eliminado": True}
+    doc.pop(WATERMARK_FIELD, None)
+    return {"id": doc_id, **doc}
+
+async def _changes(
+    collection_name: str,
+    cursor: Optional[str],
+    limit: int
+) -> Tuple[List[Dict[str, Any]], Optional[str], bool]:
+    """
+    Cambios de una colección posteriores al cursor.
+
+    Solo se leen documentos con `actualizadoEn` anterior a ahora menos
+    SYNC_WATERMARK_LAG: una escritura que confirma tarde con un valor anterior
+    al último entregado quedaría fuera del cursor para siempre. Los documentos
+    sin `actualizadoEn` se omiten (ver backfill_watermarks).
+    """
+    hasta = datetime.utcnow() - timedelta(seconds=settings.SYNC_WATERMARK_LAG)
+    base_query: Dict[str, Any] = {WATERMARK_FIELD: {"$type": "date", "$lt": hasta}}
+    if not cursor:
+        # En la primera sincronización no se envían lápidas
+        base_query["estaActivo"] = {"$ne": False}
+    query = keyset_filter(base_query, WATERMARK_FIELD, ASCENDING, cursor)
+    projection = {**SYNC_PROJECTIONS[collection_name], "estaActivo": 1, WATERMARK_FIELD: 1}
+
+    docs = await get_collection(collection_name).find(query, projection) \
+        .sort([(WATERMARK_FIELD, ASCENDING), ("_id", ASCENDING)]) \
+        .limit(limit + 1) \
+        .to_list(length=limit + 1)
+
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    next_cursor = encode_cursor(WATERMARK_FIELD, ASCENDING, docs[-1]) if docs else cursor
+    return [_compact(doc) for doc in docs], next_cursor, has_more
+
+async def get_changes(
+    watermark: Optional[str],
+    collections: List[str],
+    limit: int
+) -> Dict[str, Any]:
+    """Changeset de todas las colecciones solicitadas desde la marca de agua"""
+    cursors = decode_watermark(watermark)
+    unknown = set(collections) - set(SYNC_PROJECTIONS)
+    if unknown:
+        raise ValueError(f"Colecciones no sincronizables: {', '.join(sorted(unknown))}")
+
+    cambios: Dict[str, List[Dict[str, Any]]] = {}
+    has_more = False
+    for name in collections:
+        docs, cursors[name], more = await _changes(name, cursors.get(name), limit)
+        cambios[name] = docs
+        has_more = has_more or more
+
+    return {
+        "cambios": cambios,
+        "watermark": encode_watermark(cursors),
+        "hayMas": has_more,
+        "servidorEn": datetime.utcnow(),
+    }
+
+async def backfill_watermarks(collections: List[str] = list(SYNC_PROJECTIONS)) -> Dict[str, int]:
+    """
+    Asignar `actualizadoEn` a los documentos que no lo tienen.
+
+    Se usa la fecha actual (no la de creación) para que los dispositivos que ya
+    sincronizaron también reciban esos documentos.
+    """
+    now = datetime.utcnow()
+    results = {}
+    for name in collections:
+        result = await get_collection(name).update_many(
+            {WATERMARK_FIELD: {"$not": {"$type": "date"}}},
+            {"$set": {WATERMARK_FIELD: now}}
+        )
+        results[name] = result.modified_count
+    logger.info("Marcas de agua completadas", **results)
+    return results
+
+async def upload_fiscalizaciones(
+    items: List[FiscalizacionSync],
+    user_id: str
+) -> FiscalizacionesLoteResponse:
+    """
+    Registrar un lote de fiscalizaciones en una sola escritura.
+
+    Cada acta se inserta con upsert sobre su idempotencyKey, de modo que los
+    reintentos del dispositivo no generan duplicados.
+    """
+    collection = get_collection("fiscalizaciones")
+    now = datetime.utcnow()
+    operations = []
+    keys: List[str] = []
+    for item in items:
+        doc = item.dict()
+        doc.update({
+            "estaActivo": True,
+            "registradoPorId": user_id,
+            "fechaSincronizacion": now,
+            WATERMARK_FIELD: now,
+        })
+        operations.append(UpdateOne(
+            {"idempotencyKey": item.idempotencyKey},
+            {"$setOnInsert": doc},
+            upsert=True
+        ))
+        keys.append(item.idempotencyKey)
+
+    errors: Dict[int, str] = {}
+    try:
+        result = await collection.bulk_write(operations, ordered=False)
+        upserted = result.upserted_ids
+    except BulkWriteError as e:
+        details = e.details
+        upserted = {u["index"]: u["_id"] for u in details.get("upserted", [])}
+        for error in details.get("writeErrors", []):
+            # E11000: otro request insertó la misma clave de forma concurrente
+            if error.get("code") != 11000:
+                errors[error["index"]] = error.get("errmsg", "Error de escritura")
+
+    resultados = []
+    for index, key in enumerate(keys):
+        if index in errors:
+            resultados.append(ResultadoItemSync(idempotencyKey=key, estado="ERROR", error=errors[index]))
+        elif index in upserted:
+            resultados.append(ResultadoItemSync(
+                idempotencyKey=key, estado="CREADO", id=str(upserted[index])
+            ))
+        else:
+            resultados.append(ResultadoItemSync(idempotencyKey=key, estado="DUPLICADO"))
+
+    creados = sum(1 for r in resultados if r.estado == "CREADO")
+    errores = len(errors)
+    logger.info(
+        "Fiscalizaciones sincronizadas",
+        user_id=user_id,
+        creados=creados,
+        errores=errores,
+        total=len(items)
+    )
+    return FiscalizacionesLoteResponse(
+        creados=creados,
+        duplicados=len(items) - creados - errores,
+        errores=errores,
+        resultados=resultados,
+    )
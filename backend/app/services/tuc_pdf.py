@@ -0,0 +1,121 @@
+"""
+Renderizado de la TUC en PDF con código QR (se ejecuta en procesos del pool)
+
+Las funciones de este módulo no usan asyncio ni MongoDB: reciben datos planos y
+escriben el PDF en disco, para poder ejecutarse en un ProcessPoolExecutor.
+"""
+
+import hashlib
+import io
+import os
+from typing import Any, Dict, Optional
+
+# Recursos cacheados por proceso (se cargan una sola vez en worker_init)
+_resources: Dict[str, Any] = {}
+
+# Tarjeta en A6 horizontal (mm -> puntos)
+MM = 72 / 25.4
+PAGE_WIDTH = 148 * MM
+PAGE_HEIGHT = 105 * MM
+MARGIN = 8 * MM
+QR_SIZE = 32 * MM
+
+def worker_init(font_path: Optional[str], font_bold_path: Optional[str], logo_path: Optional[str]):
+    """
+    Inicializador de cada proceso del pool.
+
+    Registra las fuentes TTF y carga el logo una sola vez por proceso; si no se
+    configuran se usan las fuentes base de reportlab y se omite el logo.
+    """
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    font, font_bold = "Helvetica", "Helvetica-Bold"
+    if font_path and os.path.isfile(font_path):
+        pdfmetrics.registerFont(TTFont("TUC", font_path))
+        font = "TUC"
+    if font_bold_path and os.path.isfile(font_bold_path):
+        pdfmetrics.registerFont(TTFont("TUC-Bold", font_bold_path))
+        font_bold = "TUC-Bold"
+
+    _resources["font"] = font
+    _resources["font_bold"] = font_bold
+    _resources["logo"] = ImageReader(logo_path) if logo_path and os.path.isfile(logo_path) else None
+
+def _ensure_resources():
+    if not _resources:
+        worker_init(None, None, None)
+
+def _qr_image(url: str):
+    import qrcode
+    from reportlab.lib.utils import ImageReader
+
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=4, border=1)
+    qr.add_data(url)
+    qr.make(fit=True)
+    buffer = io.BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(buffer, format="PNG")
+    buffer.seek(0)
+    return ImageReader(buffer)
+
+def _draw_card(pdf, data: Dict[str, Any]):
+    font, font_bold, logo = _resources["font"], _resources["font_bold"], _resources["logo"]
+
+    pdf.setLineWidth(1.2)
+    pdf.roundRect(MARGIN / 2, MARGIN / 2, PAGE_WIDTH - MARGIN, PAGE_HEIGHT - MARGIN, 6)
+
+    top = PAGE_HEIGHT - MARGIN
+    if logo is not None:
+        pdf.drawImage(logo, MARGIN, top - 14 * MM, 14 * MM, 14 * MM, preserveAspectRatio=True, mask="auto")
+    pdf.setFont(font_bold, 10)
+    pdf.drawCentredString(PAGE_WIDTH / 2, top - 5 * MM, data.get("entidad") or "DRTC PUNO")
+    pdf.setFont(font_bold, 13)
+    pdf.drawCentredString(PAGE_WIDTH / 2, top - 11 * MM, "TARJETA ÚNICA DE CIRCULACIÓN")
+    pdf.setFont(font_bold, 11)
+    pdf.drawCentredString(PAGE_WIDTH / 2, top - 17 * MM, f"N° {data['numero']}")
+
+    rows = [
+        ("Placa", data.get("placa")),
+        ("Marca / Modelo", " ".join(p for p in (data.get("marca"), data.get("modelo")) if p)),
+        ("Empresa", data.get("razonSocial")),
+        ("RUC", data.get("ruc")),
+        ("Resolución", data.get("resolucion")),
+        ("Emisión", data.get("fechaEmision")),
+        ("Vencimiento", data.get("fechaVencimiento")),
+    ]
+    y = top - 26 * MM
+    for label, value in rows:
+        pdf.setFont(font_bold, 8)
+        pdf.drawString(MARGIN, y, f"{label}:")
+        pdf.setFont(font, 8)
+        pdf.drawString(MARGIN + 26 * MM, y, str(value or "-")[:60])
+        y -= 5.5 * MM
+
+    qr_x = PAGE_WIDTH - MARGIN - QR_SIZE
+    qr_y = MARGIN
+    pdf.drawImage(_qr_image(data["urlVerificacion"]), qr_x, qr_y, QR_SIZE, QR_SIZE)
+    pdf.setFont(font, 6)
+    pdf.drawCentredString(qr_x + QR_SIZE / 2, qr_y - 3 * MM + 1, "Verifique escaneando el código")
+
+def render_tuc_pdf(data: Dict[str, Any], output_path: str) -> Dict[str, Any]:
+    """Generar el PDF de una TUC en `output_path`; devuelve tamaño y SHA-256"""
+    from reportlab.pdfgen import canvas
+
+    _ensure_resources()
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=(PAGE_WIDTH, PAGE_HEIGHT))
+    pdf.setTitle(f"TUC {data['numero']}")
+    _draw_card(pdf, data)
+    pdf.showPage()
+    pdf.save()
+
+    content = buffer.getvalue()
+    with open(output_path, "wb") as output:
+        output.write(content)
+    return {
+        "numero": data["numero"],
+        "path": output_path,
+        "tamano": len(content),
+        "hash": hashlib.sha256(content).hexdigest(),
+    }
@@ -0,0 +1,285 @@
+"""
+Pipeline de generación de TUC en PDF (pool de procesos) y registro en documentos
+"""
+
+import asyncio
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import aiofiles
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+import structlog
+
+from app.core.config import settings
+from app.core.database import (
+    get_collection,
+    tucs_collection,
+    vehiculos_collection,
+    empresas_collection,
+    resoluciones_collection,
+)
+from app.services.documento_service import delete_documents, save_document
+from app.services.tuc_pdf import render_tuc_pdf, worker_init
+
+logger = structlog.get_logger()
+
+BATCHES_COLLECTION = "tucs_lotes"
+
+# TUC por tramo de un lote (consultas relacionadas y escritura en bloque)
+CHUNK_SIZE = 50
+
+def batches_collection():
+    return get_collection(BATCHES_COLLECTION)
+
+def _object_id(value: Any) -> Any:
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return value
+
+def _fecha(value: Any) -> Optional[str]:
+    return value.strftime("%d/%m/%Y") if isinstance(value, datetime) else value
+
+async def _by_id(collection, ids: List[Any], projection: Dict[str, int]) -> Dict[str, Dict[str, Any]]:
+    ids = [_object_id(i) for i in set(ids) if i]
+    if not ids:
+        return {}
+    return {str(doc["_id"]): doc async for doc in collection.find({"_id": {"$in": ids}}, projection)}
+
+async def build_render_data(tucs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Datos planos de cada TUC (vehículo, empresa y resolución en una consulta por colección)"""
+    vehiculos, empresas, resoluciones = await asyncio.gather(
+        _by_id(vehiculos_collection(), [t.get("vehiculoId") for t in tucs],
+               {"placa": 1, "marca": 1, "modelo": 1}),
+        _by_id(empresas_collection(), [t.get("empresaId") for t in tucs],
+               {"ruc": 1, "razonSocial.principal": 1}),
+        _by_id(resoluciones_collection(), [t.get("resolucionPadreId") for t in tucs],
+               {"numero": 1}),
+    )
+
+    result = []
+    for tuc in tucs:
+        vehiculo = vehiculos.get(str(tuc.get("vehiculoId")), {})
+        empresa = empresas.get(str(tuc.get("empresaId")), {})
+        resolucion = resoluciones.get(str(tuc.get("resolucionPadreId")), {})
+        result.append({
+            "tucId": str(tuc["_id"]),
+            "numero": tuc["numero"],
+            "entidad": f"DIRECCIÓN REGIONAL DE TRANSPORTES Y COMUNICACIONES - {settings.REGION}",
+            "placa": vehiculo.get("placa"),
+            "marca": vehiculo.get("marca"),
+            "modelo": vehiculo.get("modelo"),
+            "razonSocial": (empresa.get("razonSocial") or {}).get("principal"),
+            "ruc": empresa.get("ruc"),
+            "resolucion": resolucion.get("numero"),
+            "fechaEmision": _fecha(tuc.get("fechaEmision")),
+            "fechaVencimiento": _fecha(tuc.get("fechaVencimiento")),
+            "urlVerificacion": f"{settings.TUC_QR_BASE_URL.rstrip('/')}/{tuc['numero']}",
+        })
+    return result
+
+async def _read_chunks(path: str, size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    async with aiofiles.open(path, "rb") as source:
+        while True:
+            chunk = await source.read(size)
+            if not chunk:
+                break
+            yield chunk
+
+class TucRenderer:
+    """
+    Renderiza TUC en un ProcessPoolExecutor (TUC_RENDER_WORKERS procesos).
+
+    Cada proceso registra fuentes y carga el logo una sola vez (worker_init);
+    el event loop solo consulta MongoDB, espera los resultados y registra los
+    PDF en `documentos`.
+    """
+
+    def __init__(self, workers: int = settings.TUC_RENDER_WORKERS):
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._tasks: Dict[asyncio.Task, Any] = {}
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=worker_init,
+                initargs=(settings.TUC_FONT_PATH, settings.TUC_FONT_BOLD_PATH, settings.TUC_LOGO_PATH),
+            )
+        return self._pool
+
+    def _tmp_dir(self) -> str:
+        path = os.path.join(settings.UPLOAD_DIR, "tmp")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    async def render(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Renderizar una TUC en el pool; devuelve la ruta del PDF temporal"""
+        path = os.path.join(self._tmp_dir(), f"tuc-{uuid.uuid4().hex}.pdf")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor(), render_tuc_pdf, data, path)
+
+    async def _register(self, data: Dict[str, Any], rendered: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+        try:
+            return await save_document(
+                _read_chunks(rendered["path"]),
+                f"TUC_{data['numero']}.pdf",
+                "TUC",
+                data["tucId"],
+                user_id,
+                "application/pdf"
+            )
+        finally:
+            if os.path.exists(rendered["path"]):
+                os.remove(rendered["path"])
+
+    async def generate(self, tucs: List[Dict[str, Any]], user_id: str) -> Dict[str, Any]:
+        """
+        Generar y registrar los PDF de un grupo de TUC.
+
+        Los renderizados se envían juntos al pool; las TUC se actualizan con su
+        documentoId en una sola escritura en bloque, y los PDF que reemplazan
+        se dan de baja (borrado lógico) en el mismo paso.
+        """
+        datos = await build_render_data(tucs)
+        rendered = await asyncio.gather(*(self.render(d) for d in datos), return_exceptions=True)
+        anteriores = {str(t["_id"]): t.get("documentoId") for t in tucs}
+
+        operations = []
+        reemplazados = []
+        errores = []
+        now = datetime.utcnow()
+        for data, result in zip(datos, rendered):
+            try:
+                if isinstance(result, BaseException):
+                    raise result
+                documento = await self._register(data, result, user_id)
+                operations.append(UpdateOne(
+                    {"_id": _object_id(data["tucId"])},
+                    {"$set": {
+                        "documentoId": str(documento["_id"]),
+                        "qrVerificationUrl": data["urlVerificacion"],
+                        "actualizadoEn": now,
+                    }}
+                ))
+                if anteriores.get(data["tucId"]):
+                    reemplazados.append(anteriores[data["tucId"]])
+            except Exception as e:
+                logger.error("Error al generar PDF de TUC", numero=data["numero"], error=str(e))
+                errores.append({"numero": data["numero"], "error": str(e)})
+
+        if operations:
+            await tucs_collection().bulk_write(operations, ordered=False)
+            await delete_documents(reemplazados)
+        return {"generados": len(operations), "errores": errores}
+
+    async def generate_one(self, tuc_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """Generar el PDF de una TUC"""
+        tuc = await tucs_collection().find_one({"_id": _object_id(tuc_id), "estaActivo": True})
+        if not tuc:
+            return None
+        result = await self.generate([tuc], user_id)
+        if result["errores"]:
+            raise RuntimeError(result["errores"][0]["error"])
+        return await tucs_collection().find_one({"_id": tuc["_id"]}, {"documentoId": 1, "numero": 1})
+
+    async def reissue_empresa(self, empresa_id: str, user_id: str, motivo: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Registrar un lote de reemisión de todas las TUC vigentes de una empresa
+        (p. ej. tras una nueva resolución) y procesarlo en segundo plano.
+        """
+        query = {
+            "empresaId": {"$in": [_object_id(empresa_id), empresa_id]},
+            "estaActivo": True,
+            "estado": "VIGENTE",
+        }
+        total = await tucs_collection().count_documents(query)
+        lote = {
+            "_id": ObjectId(),
+            "empresaId": empresa_id,
+            "motivo": motivo,
+            "estado": "EN_PROCESO",
+            "total": total,
+            "generados": 0,
+            "errores": [],
+            "solicitadoPorId": user_id,
+            "creadoEn": datetime.utcnow(),
+        }
+        await batches_collection().insert_one(lote)
+
+        task = asyncio.create_task(self._run_batch(lote["_id"], query, user_id))
+        self._tasks[task] = lote["_id"]
+        task.add_done_callback(lambda t: self._tasks.pop(t, None))
+        return lote
+
+    async def _run_batch(self, lote_id: ObjectId, query: Dict[str, Any], user_id: str):
+        started = datetime.utcnow()
+        chunk: List[Dict[str, Any]] = []
+
+        async def process(tucs: List[Dict[str, Any]]):
+            result = await self.generate(tucs, user_id)
+            await batches_collection().update_one(
+                {"_id": lote_id},
+                {
+                    "$inc": {"generados": result["generados"]},
+                    "$push": {"errores": {"$each": result["errores"]}},
+                }
+            )
+
+        try:
+            async for tuc in tucs_collection().find(query).sort("_id", 1):
+                chunk.append(tuc)
+                if len(chunk) >= CHUNK_SIZE:
+                    await process(chunk)
+                    chunk = []
+            if chunk:
+                await process(chunk)
+            estado = "COMPLETADO"
+        except Exception as e:
+            logger.error("Error en lote de reemisión de TUC", lote_id=str(lote_id), error=str(e))
+            estado = "ERROR"
+
+        await batches_collection().update_one(
+            {"_id": lote_id},
+            {"$set": {"estado": estado, "finalizadoEn": datetime.utcnow()}}
+        )
+        lote = await batches_collection().find_one({"_id": lote_id}, {"generados": 1})
+        seconds = (datetime.utcnow() - started).total_seconds()
+        logger.info(
+            "Lote de reemisión de TUC finalizado",
+            lote_id=str(lote_id),
+            estado=estado,
+            generados=lote["generados"],
+            tarjetas_por_segundo=round(lote["generados"] / seconds, 1) if seconds else None
+        )
+
+    async def get_batch(self, lote_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return await batches_collection().find_one({"_id": ObjectId(lote_id)})
+        except (InvalidId, TypeError):
+            return None
+
+    async def shutdown(self):
+        """Cancelar los lotes en curso y cerrar el pool de procesos"""
+        lote_ids = list(self._tasks.values())
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        if lote_ids:
+            await batches_collection().update_many(
+                {"_id": {"$in": lote_ids}, "estado": "EN_PROCESO"},
+                {"$set": {"estado": "ERROR", "finalizadoEn": datetime.utcnow()}}
+            )
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+# Instancia global del generador de TUC
+tuc_renderer = TucRenderer()
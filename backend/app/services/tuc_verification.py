@@ -0,0 +1,120 @@
+"""
+Verificación pública de TUC (ruta de alto tráfico del código QR)
+"""
+
+import asyncio
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.database import tucs_collection, vehiculos_collection, empresas_collection
+
+NAMESPACE = "tuc_verificacion"
+
+# Estados que dejan la TUC sin validez
+ESTADOS_INVALIDOS = {"DADA_DE_BAJA", "DESECHADA"}
+
+TUC_PROJECTION = {
+    "_id": 0,
+    "numero": 1,
+    "estado": 1,
+    "fechaEmision": 1,
+    "fechaVencimiento": 1,
+    "vehiculoId": 1,
+    "empresaId": 1,
+}
+
+def _as_object_id(value: Any) -> Any:
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return value
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+async def _load(numero: str) -> Optional[str]:
+    """Construir la respuesta pública con consultas proyectadas"""
+    tuc = await tucs_collection().find_one({"numero": numero}, TUC_PROJECTION)
+    if not tuc:
+        return None
+
+    vehiculo, empresa = await asyncio.gather(
+        vehiculos_collection().find_one(
+            {"_id": _as_object_id(tuc.get("vehiculoId"))}, {"_id": 0, "placa": 1}
+        ),
+        empresas_collection().find_one(
+            {"_id": _as_object_id(tuc.get("empresaId"))},
+            {"_id": 0, "ruc": 1, "razonSocial.principal": 1}
+        ),
+    )
+
+    vencimiento = tuc.get("fechaVencimiento")
+    vigente = tuc.get("estado") not in ESTADOS_INVALIDOS and (
+        not isinstance(vencimiento, datetime) or vencimiento >= datetime.utcnow()
+    )
+    razon_social = (empresa or {}).get("razonSocial") or {}
+
+    body = {
+        "numero": tuc["numero"],
+        "estado": tuc.get("estado"),
+        "vigente": vigente,
+        "fechaEmision": _iso(tuc.get("fechaEmision")),
+        "fechaVencimiento": _iso(vencimiento),
+        "placa": (vehiculo or {}).get("placa"),
+        "empresa": {
+            "ruc": (empresa or {}).get("ruc"),
+            "razonSocial": razon_social.get("principal") if isinstance(razon_social, dict) else razon_social,
+        },
+    }
+    return json.dumps(body, separators=(",", ":"), ensure_ascii=False)
+
+def seconds_until_expiry(body: str) -> Optional[int]:
+    """
+    Segundos durante los que una respuesta con `vigente=true` sigue siendo válida
+    (None si no vence o ya no está vigente)
+    """
+    data = json.loads(body)
+    if not data.get("vigente") or not data.get("fechaVencimiento"):
+        return None
+    vencimiento = datetime.fromisoformat(data["fechaVencimiento"])
+    return int((vencimiento - datetime.utcnow()).total_seconds())
+
+def _ttl(body: str) -> int:
+    """TTL de cache acotado al vencimiento de la TUC"""
+    restante = seconds_until_expiry(body)
+    if restante is None:
+        return settings.CACHE_TTL_TUC_VERIFICACION
+    return max(1, min(settings.CACHE_TTL_TUC_VERIFICACION, restante))
+
+async def verify_tuc(numero: str) -> Optional[Tuple[str, str, Optional[int]]]:
+    """
+    Obtener (cuerpo JSON, ETag, segundos hasta el vencimiento) de la verificación
+    de una TUC. Una respuesta `vigente=true` nunca se cachea más allá de
+    `fechaVencimiento`.
+    """
+    body = await cache.get_or_load_text(NAMESPACE, numero, lambda: _load(numero), ttl=_ttl)
+    if body is None:
+        return None
+
+    restante = seconds_until_expiry(body)
+    if restante is not None and restante <= 0:
+        # Entrada vigente que venció mientras estaba en cache
+        await cache.invalidate(NAMESPACE, numero)
+        body = await _load(numero)
+        if body is None:
+            return None
+        restante = seconds_until_expiry(body)
+
+    etag = '"' + hashlib.sha1(body.encode("utf-8")).hexdigest()[:20] + '"'
+    return body, etag, restante
+
+async def invalidate_tuc_verification(numero: str):
+    """Invalidar la verificación cacheada; llamar cuando cambie el estado de la TUC"""
+    await cache.invalidate(NAMESPACE, numero)
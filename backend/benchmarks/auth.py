@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Costo por request de la validación del token de acceso (sin MongoDB ni Redis)
+
+Compara decode_token con AUTH_CACHE_ENABLED desactivado (cada request verifica
+la firma del JWT) y activado (los claims se reutilizan hasta su expiración).
+El ahorro de la consulta a `usuarios` se mide con benchmarks.load contra el
+servidor en ejecución.
+
+Uso:
+    python -m benchmarks.auth --tokens 100 --requests 50000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from jose import jwt
+
+from app.core.config import settings
+from app.core import auth
+
+def sample_tokens(count: int) -> List[str]:
+    exp = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return [
+        jwt.encode({"sub": f"{i:024x}", "type": "access", "exp": exp}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+        for i in range(count)
+    ]
+
+def run_benchmark(tokens: List[str], total: int, cache_enabled: bool) -> float:
+    settings.AUTH_CACHE_ENABLED = cache_enabled
+    auth.claims_cache = auth._ClaimsCache(settings.AUTH_CLAIMS_CACHE_SIZE)
+    # Calentar el cache fuera de la medición
+    for token in tokens:
+        auth.decode_token(token)
+
+    started = time.perf_counter()
+    for i in range(total):
+        auth.decode_token(tokens[i % len(tokens)])
+    return total / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de validación de tokens")
+    parser.add_argument("--tokens", type=int, default=100, help="Usuarios distintos simulados")
+    parser.add_argument("--requests", type=int, default=50000)
+    args = parser.parse_args()
+
+    tokens = sample_tokens(args.tokens)
+    antes = run_benchmark(tokens, args.requests, cache_enabled=False)
+    despues = run_benchmark(tokens, args.requests, cache_enabled=True)
+    result: Dict[str, float] = {
+        "validaciones_por_seg_sin_cache": round(antes, 1),
+        "validaciones_por_seg_con_cache": round(despues, 1),
+        "us_por_request_sin_cache": round(1e6 / antes, 2),
+        "us_por_request_con_cache": round(1e6 / despues, 2),
+    }
+    for key, value in result.items():
+        print(f"{key:>32}: {value}")
+
+if __name__ == "__main__":
+    main()
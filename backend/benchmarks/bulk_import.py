@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Throughput de la importación masiva de empresas (filas por segundo)
+
+Genera una planilla CSV sintética con los encabezados de la exportación, la
+sube a /importaciones/empresas y espera a que termine. Objetivo: 50.000 filas
+en menos de un minuto.
+
+Uso (con el backend en ejecución, sobre una base de pruebas):
+    python -m benchmarks.bulk_import --url http://localhost:8000/api/v1 \\
+        --token <jwt> --rows 50000 --max-seconds 60
+"""
+import argparse
+import asyncio
+import csv
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict
+
+import httpx
+
+HEADERS = [
+    "RUC", "Razón Social", "Nombre Comercial", "Tipo", "DNI Representante",
+    "Teléfono", "Email", "Departamento", "Provincia", "Distrito", "Expediente",
+]
+
+def write_sample(path: str, rows: int, offset: int):
+    with open(path, "w", encoding="utf-8", newline="") as output:
+        writer = csv.writer(output)
+        writer.writerow(HEADERS)
+        for i in range(offset, offset + rows):
+            writer.writerow([
+                f"20{i:09d}", f"EMPRESA DE TRANSPORTES PRUEBA {i} S.A.C.", f"PRUEBA {i}",
+                "PASAJEROS", f"{40000000 + i % 10000000:08d}", "051-351234",
+                f"empresa{i}@example.com", "PUNO", "PUNO", "PUNO", f"E-{i % 10000:04d}-2024",
+            ])
+
+async def run_import(url: str, token: str, path: str, poll: float) -> Dict[str, Any]:
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(base_url=url, headers=headers, timeout=120) as client:
+
+        async def content():
+            with open(path, "rb") as source:
+                while chunk := source.read(256 * 1024):
+                    yield chunk
+
+        started = time.perf_counter()
+        response = await client.post(
+            "/importaciones/empresas",
+            params={"nombreArchivo": os.path.basename(path)},
+            content=content(),
+            headers={"Content-Type": "text/csv"},
+        )
+        response.raise_for_status()
+        job = response.json()
+
+        while job["estado"] in ("PENDIENTE", "EN_PROCESO"):
+            await asyncio.sleep(poll)
+            job = (await client.get(f"/importaciones/{job['id']}")).json()
+        elapsed = time.perf_counter() - started
+
+    return {
+        "estado": job["estado"],
+        "filas": job["filasProcesadas"],
+        "insertados": job["insertados"],
+        "errores": job["errores"],
+        "seconds": round(elapsed, 2),
+        "filas_por_segundo": round(job["filasProcesadas"] / elapsed, 1) if elapsed else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de importación masiva de empresas")
+    parser.add_argument("--url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--offset", type=int, default=0, help="Desplazar los RUC generados entre ejecuciones")
+    parser.add_argument("--poll", type=float, default=0.5)
+    parser.add_argument("--max-seconds", type=float, default=None, help="Fallar si se supera este tiempo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "empresas.csv")
+        write_sample(path, args.rows, args.offset)
+        result = asyncio.run(run_import(args.url, args.token, path, args.poll))
+
+    for key, value in result.items():
+        print(f"{key:>18}: {value}")
+    if result["estado"] != "COMPLETADO" or (args.max_seconds and result["seconds"] > args.max_seconds):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
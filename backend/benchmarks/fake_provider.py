@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Proveedor falso de SUNAT / RENIEC para pruebas locales de interoperatividad
+
+Responde datos deterministas para cualquier RUC/DNI válido; los terminados en
+"0000" devuelven 404. Permite simular latencia y errores para observar la
+coalescencia, el cache y el circuit breaker.
+
+Uso:
+    uvicorn benchmarks.fake_provider:app --port 8090
+    FAKE_PROVIDER_LATENCY=0.5 FAKE_PROVIDER_ERROR_RATE=0.3 uvicorn benchmarks.fake_provider:app --port 8090
+
+Con el backend:
+    SUNAT_API_URL=http://localhost:8090/sunat RENIEC_API_URL=http://localhost:8090/reniec
+
+GET /stats devuelve la cantidad de consultas recibidas por proveedor.
+"""
+import asyncio
+import os
+import random
+from typing import Dict
+
+from fastapi import FastAPI, HTTPException
+
+LATENCY = float(os.getenv("FAKE_PROVIDER_LATENCY", "0.05"))
+ERROR_RATE = float(os.getenv("FAKE_PROVIDER_ERROR_RATE", "0"))
+
+app = FastAPI(title="Proveedor falso SUNAT/RENIEC")
+calls: Dict[str, int] = {"sunat": 0, "reniec": 0}
+
+async def _simulate(provider: str, value: str):
+    calls[provider] += 1
+    await asyncio.sleep(LATENCY)
+    if random.random() < ERROR_RATE:
+        raise HTTPException(status_code=503, detail="Servicio no disponible")
+    if value.endswith("0000"):
+        raise HTTPException(status_code=404, detail="No encontrado")
+
+@app.get("/sunat/ruc/{ruc}")
+async def sunat_ruc(ruc: str):
+    await _simulate("sunat", ruc)
+    return {
+        "ruc": ruc,
+        "razonSocial": f"EMPRESA DE TRANSPORTES {ruc[-4:]} S.A.C.",
+        "estado": "ACTIVO",
+        "condicion": "HABIDO",
+        "direccion": "JR. LIMA 123 PUNO - PUNO - PUNO",
+    }
+
+@app.get("/reniec/dni/{dni}")
+async def reniec_dni(dni: str):
+    await _simulate("reniec", dni)
+    return {
+        "dni": dni,
+        "nombres": "JUAN",
+        "apellidoPaterno": "QUISPE",
+        "apellidoMaterno": f"MAMANI{dni[-2:]}",
+    }
+
+@app.get("/stats")
+async def stats():
+    return calls
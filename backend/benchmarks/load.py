@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Generador de carga HTTP simple para medir requests por segundo
+
+Uso (con el backend en ejecución):
+    python -m benchmarks.load --url http://localhost:8000/api/v1/empresas/<id> \\
+        --token <jwt> --requests 5000 --concurrency 50
+
+Para comparar el costo de autenticación, ejecutar una vez con el servidor
+iniciado con AUTH_CACHE_ENABLED=false (antes) y otra con AUTH_CACHE_ENABLED=true
+(después).
+
+Verificación pública de TUC: el objetivo es de al menos 3000 verificaciones
+por segundo por worker con el cache de Redis caliente:
+    python -m benchmarks.load --url http://localhost:8000/api/v1/tucs/verificar/<numero> \
+        --requests 20000 --concurrency 100 --min-rps 3000
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+# Respuestas que cuentan como atendidas (el resto son errores o rechazos 429)
+OK_STATUS = {200, 304}
+
+async def run_load(
+    url: str,
+    total: int,
+    concurrency: int,
+    headers: Optional[Dict[str, str]] = None
+) -> Dict[str, float]:
+    """Ejecutar `total` requests GET con `concurrency` clientes simultáneos"""
+    latencies: List[float] = []
+    status_counts: Dict[int, int] = {}
+    counter = iter(range(total))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(headers=headers, limits=limits, timeout=30) as client:
+
+        async def worker():
+            for _ in counter:
+                start = time.perf_counter()
+                response = await client.get(url)
+                latencies.append(time.perf_counter() - start)
+                status_counts[response.status_code] = status_counts.get(response.status_code, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ok = sum(n for code, n in status_counts.items() if code in OK_STATUS)
+    return {
+        "requests": total,
+        "ok": ok,
+        "errors": total - ok,
+        "seconds": round(elapsed, 3),
+        # Solo las respuestas 200/304: un 429 o un 5xx no es throughput
+        "rps": round(ok / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+        "status": status_counts,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de requests por segundo")
+    parser.add_argument("--url", required=True)
+    parser.add_argument("--token", default=None, help="JWT para el header Authorization")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--min-rps", type=float, default=None, help="Fallar si no se alcanza este objetivo")
+    parser.add_argument(
+        "--max-errors", type=float, default=0.0,
+        help="Fracción máxima de respuestas distintas de 200/304 (por defecto ninguna)"
+    )
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else None
+    result = asyncio.run(run_load(args.url, args.requests, args.concurrency, headers))
+    for key, value in result.items():
+        print(f"{key:>10}: {value}")
+
+    failed = False
+    if result["errors"] > args.max_errors * result["requests"]:
+        print(f"Respuestas con error: {result['errors']} de {result['requests']} ({result['status']})")
+        failed = True
+    if args.min_rps is not None and result["rps"] < args.min_rps:
+        print(f"Objetivo no alcanzado: {result['rps']} < {args.min_rps} rps")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Throughput (mensajes/segundo) del despachador de notificaciones
+
+Levanta el servidor SMTP de prueba en memoria y envía mensajes sintéticos con
+el pool de conexiones del despachador (sin MongoDB).
+
+Uso:
+    python -m benchmarks.notifications --messages 5000 --pool 4 --batch 100
+    python -m benchmarks.notifications --messages 2000 --pool 8 --delay 0.01
+"""
+import argparse
+import asyncio
+import sys
+import time
+from typing import Dict
+
+from app.services.notification_dispatcher import NotificationDispatcher, SMTPPool
+from benchmarks.smtp_stub import StubSMTPServer
+
+async def run_benchmark(messages: int, pool_size: int, batch_size: int, delay: float) -> Dict[str, float]:
+    """Enviar `messages` notificaciones en lotes de `batch_size`"""
+    server = StubSMTPServer(delay=delay)
+    port = await server.start()
+
+    pool = SMTPPool(host="127.0.0.1", port=port, username=None, password=None, tls=False, size=pool_size)
+    dispatcher = NotificationDispatcher(pool=pool, batch_size=batch_size, sender="bench@localhost")
+
+    notifications = [
+        {
+            "_id": i,
+            "titulo": "TUC próxima a vencer",
+            "mensaje": f"La TUC BENCH-{i:06d} vence el 31/12/2030.",
+            "destinatario": {"tipo": "EMPRESA", "id": str(i), "email": f"empresa{i}@example.com"},
+            "intentos": 0,
+        }
+        for i in range(messages)
+    ]
+
+    errors = 0
+    started = time.perf_counter()
+    try:
+        for i in range(0, messages, batch_size):
+            results = await dispatcher.send_batch(notifications[i:i + batch_size])
+            errors += sum(1 for _, error in results if error)
+        elapsed = time.perf_counter() - started
+    finally:
+        await pool.close()
+        await server.stop()
+
+    return {
+        "messages": messages,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "msgs_per_sec": round(messages / elapsed, 1),
+        "smtp_connections": server.connections,
+        "received": server.messages,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del despachador de notificaciones")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--pool", type=int, default=4, help="Conexiones SMTP reutilizadas")
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--delay", type=float, default=0.0, help="Demora simulada del relay por mensaje")
+    parser.add_argument("--min-rate", type=float, default=None, help="Fallar si no se alcanza este objetivo")
+    args = parser.parse_args()
+
+    result = asyncio.run(run_benchmark(args.messages, args.pool, args.batch, args.delay))
+    for key, value in result.items():
+        print(f"{key:>16}: {value}")
+
+    if args.min_rate is not None and result["msgs_per_sec"] < args.min_rate:
+        print(f"Objetivo no alcanzado: {result['msgs_per_sec']} < {args.min_rate} msg/s")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Servidor SMTP mínimo en memoria para pruebas locales del despachador
+
+Acepta cualquier remitente y destinatario, no ofrece STARTTLS ni AUTH y solo
+cuenta los mensajes recibidos (opcionalmente con una demora por mensaje para
+simular un relay real).
+
+Uso:
+    python -m benchmarks.smtp_stub --port 8025
+
+Con el backend: SMTP_HOST=127.0.0.1 SMTP_PORT=8025 SMTP_TLS=false
+"""
+import argparse
+import asyncio
+from typing import Optional
+
+class StubSMTPServer:
+    """Servidor SMTP de prueba basado en asyncio.start_server"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay: float = 0.0):
+        self.host = host
+        self.port = port
+        self.delay = delay
+        self.messages = 0
+        self.connections = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+
+        def reply(line: str):
+            writer.write(f"{line}\r\n".encode("ascii"))
+
+        reply("220 stub ESMTP")
+        await writer.drain()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode("utf-8", "replace").strip().upper()
+
+                if command.startswith(("EHLO", "HELO")):
+                    reply("250-stub")
+                    reply("250 8BITMIME")
+                elif command.startswith("DATA"):
+                    reply("354 End data with <CR><LF>.<CR><LF>")
+                    await writer.drain()
+                    while True:
+                        data = await reader.readline()
+                        if not data or data == b".\r\n":
+                            break
+                    if self.delay:
+                        await asyncio.sleep(self.delay)
+                    self.messages += 1
+                    reply("250 OK: queued")
+                elif command.startswith("QUIT"):
+                    reply("221 Bye")
+                    await writer.drain()
+                    break
+                else:
+                    # MAIL, RCPT, RSET, NOOP
+                    reply("250 OK")
+                await writer.drain()
+        finally:
+            writer.close()
+
+async def serve(host: str, port: int, delay: float):
+    server = StubSMTPServer(host, port, delay)
+    await server.start()
+    print(f"SMTP de prueba en {host}:{server.port}")
+    try:
+        while True:
+            await asyncio.sleep(10)
+            print(f"mensajes: {server.messages} conexiones: {server.connections}")
+    finally:
+        await server.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor SMTP de prueba")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--delay", type=float, default=0.0, help="Demora por mensaje (segundos)")
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.delay))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Throughput de generación de TUC en PDF (tarjetas por segundo y por núcleo)
+
+Renderiza tarjetas sintéticas con el mismo pool de procesos del backend, sin
+MongoDB, y escribe los PDF en un directorio temporal.
+
+Uso:
+    python -m benchmarks.tuc_render --cards 500 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from app.services.tuc_pdf import render_tuc_pdf, worker_init
+
+def sample_card(i: int) -> Dict[str, str]:
+    return {
+        "tucId": str(i),
+        "numero": f"TUC-2024-{i:06d}",
+        "entidad": "DIRECCIÓN REGIONAL DE TRANSPORTES Y COMUNICACIONES - PUNO",
+        "placa": f"Z{i % 10}A-{i % 1000:03d}",
+        "marca": "TOYOTA",
+        "modelo": "HIACE",
+        "razonSocial": "EMPRESA DE TRANSPORTES EL ALTIPLANO S.A.C.",
+        "ruc": "20123456789",
+        "resolucion": "R-0123-2024-DRTC-PUNO",
+        "fechaEmision": "01/01/2024",
+        "fechaVencimiento": "31/12/2024",
+        "urlVerificacion": f"https://transportes.drtcpuno.gob.pe/api/v1/tucs/verificar/TUC-2024-{i:06d}",
+    }
+
+async def run_benchmark(cards: int, workers: int, logo: Optional[str]) -> Dict[str, float]:
+    loop = asyncio.get_running_loop()
+    with tempfile.TemporaryDirectory() as output_dir, ProcessPoolExecutor(
+        max_workers=workers, initializer=worker_init, initargs=(None, None, logo)
+    ) as pool:
+        # Calentar los procesos (importaciones y recursos) fuera de la medición
+        await asyncio.gather(*(
+            loop.run_in_executor(pool, render_tuc_pdf, sample_card(-i), os.path.join(output_dir, f"w{i}.pdf"))
+            for i in range(1, workers + 1)
+        ))
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            loop.run_in_executor(pool, render_tuc_pdf, sample_card(i), os.path.join(output_dir, f"{i}.pdf"))
+            for i in range(cards)
+        ))
+        elapsed = time.perf_counter() - started
+
+    rate = cards / elapsed
+    return {
+        "cards": cards,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "cards_per_sec": round(rate, 1),
+        "cards_per_sec_per_core": round(rate / workers, 1),
+        "avg_kb": round(sum(r["tamano"] for r in results) / len(results) / 1024, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de generación de TUC en PDF")
+    parser.add_argument("--cards", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--logo", default=None, help="Logo opcional para incluir en la tarjeta")
+    args = parser.parse_args()
+
+    result = asyncio.run(run_benchmark(args.cards, args.workers, args.logo))
+    for key, value in result.items():
+        print(f"{key:>24}: {value}")
+
+if __name__ == "__main__":
+    main()
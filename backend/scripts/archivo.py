@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Archivado de auditoría e historial como proceso separado
+
+Mueve los documentos más antiguos que ARCHIVE_AUDITORIA_DAYS / ARCHIVE_HISTORIAL_DAYS
+a particiones mensuales (ARCHIVE_MODE). Con cron, desactivar el archivado de la
+API (ARCHIVE_ENABLED=false).
+
+Uso:
+    python -m scripts.archivo run
+    python -m scripts.archivo status
+
+Ejemplo de cron:
+    30 3 * * * cd /app && python -m scripts.archivo run
+"""
+import argparse
+import asyncio
+
+from app.core.database import init_db, close_db
+from app.services.archiver import archiver
+
+async def run():
+    """Archivar los documentos antiguos de todas las colecciones"""
+    await init_db()
+    try:
+        results = await archiver.run()
+    finally:
+        await close_db()
+    for coleccion, documentos in results.items():
+        print(f"{coleccion}: {documentos} documentos archivados")
+
+async def status():
+    """Listar las particiones archivadas"""
+    await init_db()
+    try:
+        partitions = await archiver.partitions()
+    finally:
+        await close_db()
+    for partition in partitions:
+        print(
+            f"{partition['coleccion']:<24} {partition['mes']}  {partition['destino']:<10} "
+            f"{partition['documentos']:>10}  {partition['ubicacion']}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Archivado de auditoría e historial")
+    parser.add_argument("command", choices=["run", "status"])
+    args = parser.parse_args()
+    asyncio.run(run() if args.command == "run" else status())
+
+if __name__ == "__main__":
+    main()
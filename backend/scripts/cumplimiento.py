@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Reconstrucción completa de los snapshots de cumplimiento (ejecución nocturna)
+
+Uso:
+    python -m scripts.cumplimiento rebuild
+
+Ejemplo de cron:
+    0 2 * * * cd /app && python -m scripts.cumplimiento rebuild
+"""
+import argparse
+import asyncio
+
+from app.core.database import init_db, close_db
+from app.services.cumplimiento_service import rebuild_all
+
+async def rebuild(concurrency: int):
+    """Recalcular el snapshot de todas las empresas activas"""
+    await init_db()
+    try:
+        total = await rebuild_all(concurrency=concurrency)
+    finally:
+        await close_db()
+    print(f"Snapshots recalculados: {total}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshots de cumplimiento de empresas")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(rebuild(args.concurrency))
+
+if __name__ == "__main__":
+    main()
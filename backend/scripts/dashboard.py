@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Reconstrucción de los contadores del dashboard
+
+Corrige la deriva de los ajustes incrementales. Las TUC por vencer en
+30/60/90 días se cuentan en cada lectura del dashboard.
+
+Uso:
+    python -m scripts.dashboard rebuild
+
+Ejemplo de cron (cada hora):
+    0 * * * * cd /app && python -m scripts.dashboard rebuild
+"""
+import argparse
+import asyncio
+import json
+
+from app.core.database import init_db, close_db
+from app.services.dashboard_stats import rebuild_stats
+
+async def rebuild():
+    """Recalcular los contadores desde las colecciones"""
+    await init_db()
+    try:
+        stats = await rebuild_stats()
+    finally:
+        await close_db()
+    print(json.dumps(stats, indent=2, ensure_ascii=False, default=str))
+
+def main():
+    parser = argparse.ArgumentParser(description="Contadores del dashboard")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+    asyncio.run(rebuild())
+
+if __name__ == "__main__":
+    main()
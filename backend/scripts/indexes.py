@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Herramienta de índices de MongoDB
+
+Uso:
+    python -m scripts.indexes sync     # crear los índices faltantes según INDEX_SPECS
+    python -m scripts.indexes report   # índices usados por las consultas de listados
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.core.indexes import report_query_plans, sync_indexes
+
+def get_client() -> AsyncIOMotorClient:
+    """Cliente de MongoDB independiente del ciclo de vida de la aplicación"""
+    return AsyncIOMotorClient(settings.MONGODB_URL, serverSelectionTimeoutMS=5000)
+
+async def sync():
+    """Crear los índices faltantes de todas las colecciones"""
+    client = get_client()
+    try:
+        created = await sync_indexes(client[settings.MONGODB_DB])
+    finally:
+        client.close()
+
+    print(json.dumps(created, indent=2, ensure_ascii=False))
+    return 0
+
+async def report():
+    """Mostrar el plan elegido para cada consulta representativa"""
+    client = get_client()
+    try:
+        result = await report_query_plans(client[settings.MONGODB_DB])
+    finally:
+        client.close()
+
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    # Código de salida distinto de cero si alguna consulta ordena en memoria, escanea
+    # la colección o examina muchas más claves de las que devuelve
+    return 1 if any(
+        r["in_memory_sort"] or r["collection_scan"] or not r["keys_bounded"] for r in result
+    ) else 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Gestión de índices de MongoDB")
+    parser.add_argument("command", choices=["sync", "report"])
+    args = parser.parse_args()
+
+    if args.command == "sync":
+        sys.exit(asyncio.run(sync()))
+    if args.command == "report":
+        sys.exit(asyncio.run(report()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Recalcular los términos de búsqueda precomputados de empresas
+
+Uso:
+    python -m scripts.search rebuild
+"""
+import argparse
+import asyncio
+
+from app.core.database import init_db, close_db
+from app.services.empresa_search import rebuild_search_fields
+
+async def rebuild():
+    """Recalcular el campo `busqueda` de todas las empresas"""
+    await init_db()
+    try:
+        total = await rebuild_search_fields()
+    finally:
+        await close_db()
+    print(f"Empresas actualizadas: {total}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Búsqueda de empresas")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+    asyncio.run(rebuild())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Mantenimiento de la sincronización delta de la app móvil
+
+`backfill` asigna `actualizadoEn` a los documentos sincronizables que no lo
+tienen (registros anteriores a la sincronización o escritos por procesos que
+no actualizan el campo); sin él no se entregan a los dispositivos.
+
+Uso:
+    python -m scripts.sincronizacion backfill
+"""
+import argparse
+import asyncio
+
+from app.core.database import init_db, close_db
+from app.services.sync_service import backfill_watermarks
+
+async def backfill():
+    """Completar la marca de agua de las colecciones sincronizables"""
+    await init_db()
+    try:
+        results = await backfill_watermarks()
+    finally:
+        await close_db()
+    for coleccion, actualizados in results.items():
+        print(f"{coleccion}: {actualizados} documentos actualizados")
+
+def main():
+    parser = argparse.ArgumentParser(description="Sincronización delta")
+    parser.add_argument("command", choices=["backfill"])
+    parser.parse_args()
+    asyncio.run(backfill())
+
+if __name__ == "__main__":
+    main()
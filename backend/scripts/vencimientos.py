@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Escáner de vencimientos (TUC, licencias, habilitaciones) como proceso separado
+
+Cada ejecución procesa solo los documentos que entraron en la ventana de aviso
+desde el último checkpoint. Con cron, desactivar el escáner de la API
+(EXPIRY_SCAN_ENABLED=false).
+
+Uso:
+    python -m scripts.vencimientos scan
+
+Ejemplo de cron:
+    15 * * * * cd /app && python -m scripts.vencimientos scan
+"""
+import argparse
+import asyncio
+
+from app.core.database import init_db, close_db
+from app.services.expiry_scanner import scan_all
+
+async def scan():
+    """Generar las notificaciones de vencimiento pendientes"""
+    await init_db()
+    try:
+        results = await scan_all()
+    finally:
+        await close_db()
+    for nombre, creadas in results.items():
+        print(f"{nombre}: {creadas} notificaciones")
+
+def main():
+    parser = argparse.ArgumentParser(description="Escáner de vencimientos")
+    parser.add_argument("command", choices=["scan"])
+    parser.parse_args()
+    asyncio.run(scan())
+
+if __name__ == "__main__":
+    main()